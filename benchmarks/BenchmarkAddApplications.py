@@ -0,0 +1,52 @@
+from modules.parse_cv.ParsedCV import ParsedCV, roundYoE
+from modules.parse_cv.ParsedCVTokenizer import tokenizeParsedCV
+from modules.parse_cv.DateParser import parsingDateString
+from benchmarks.BenchmarkParseCVResponse import generateParsedCV
+from controller.DBController import DBController
+from langchain_chroma import Chroma
+from langchain_huggingface import HuggingFaceEmbeddings
+from sqlmodel import SQLModel, create_engine
+import sys, tempfile, time
+
+# Throughput of saving parsed CVs one by one (addApplication) against the batched path (addApplications).
+# Uses a fresh database and Chroma collection in a temporary directory: SQLite by default, or the database URL given
+# (e.g. an empty MariaDB database, its tables are created), with the embedding model of the application.
+# Run from the repository root:
+#   python -m benchmarks.BenchmarkAddApplications [<CV count, default 500>] [<database URL>]
+
+def generateParsedCVs(cvCount: int, entryCount: int = 3) -> list[ParsedCV]:
+    parsedCVs = []
+    for i in range(cvCount):
+        cvData = tokenizeParsedCV(generateParsedCV(i, entryCount))
+        for entry in cvData["workExperiences"] + cvData["projects"]:
+            entry["startDate"] = parsingDateString(entry["startDate"]) if entry["startDate"] is not None else None
+            entry["endDate"] = parsingDateString(entry["endDate"]) if entry["endDate"] is not None else None
+        cvData["totalYearsOfExperience"] = roundYoE(cvData["totalYearsOfExperience"])
+        parsedCVs.append(ParsedCV(cvData))
+    return parsedCVs
+
+def benchmark(cvCount: int, databaseUrl: str | None, batchSize: int = 20):
+    parsedCVs = generateParsedCVs(cvCount)
+    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ["addApplication", "addApplications"]:
+            engine = create_engine(databaseUrl or f"sqlite:///{directory}/{name}.sqlite3")
+            SQLModel.metadata.drop_all(engine)
+            SQLModel.metadata.create_all(engine)
+            vectorStore = Chroma(collection_name=name, embedding_function=embeddings, persist_directory=f"{directory}/{name}_vectordb")
+            dbController = DBController(engine, vectorStore)
+
+            startTime = time.perf_counter()
+            if name == "addApplication":
+                applicationIds = [dbController.addApplication(parsedCV) for parsedCV in parsedCVs]
+            else:
+                applicationIds = []
+                for i in range(0, len(parsedCVs), batchSize):
+                    applicationIds.extend(dbController.addApplications(parsedCVs[i:i + batchSize]))
+            elapsed = time.perf_counter() - startTime
+            assert len(set(applicationIds)) == cvCount
+            print(f"{name}: {cvCount} CVs in {elapsed:.2f} s, {cvCount / elapsed:.1f} CVs per second")
+            engine.dispose()
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) >= 2 else 500, sys.argv[2] if len(sys.argv) >= 3 else None)
@@ -0,0 +1,80 @@
+from benchmarks.BenchmarkAddApplications import generateParsedCVs
+from controller.DBController import DBController
+from shared.QueryObject import SearchCVQuery
+from langchain_chroma import Chroma
+from langchain_huggingface import HuggingFaceEmbeddings
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+import asyncio, random, sys, tempfile, time
+
+# Requests per second of the API read paths under a mixed load of concurrent requests (get, list and search),
+# with the blocking database calls the routes used to make on the event loop against the async database layer.
+# Uses a database seeded with generated CVs: SQLite by default (needs aiosqlite), or the given database URLs of the same
+# empty database, e.g. mysql+pymysql://... and mysql+aiomysql://... (its tables are created).
+# Run from the repository root:
+#   python -m benchmarks.BenchmarkAsyncRoutes [<request count, default 500>] [<concurrency, default 20>] [<database URL> <async database URL>]
+
+def mixedRequests(requestCount: int, applicationIds: list[int]) -> list[tuple]:
+    random.seed(0)
+    requests = []
+    for _ in range(requestCount):
+        kind = random.choices(["get", "list", "search"], weights=[6, 3, 1])[0]
+        if kind == "get":
+            requests.append(("get", random.choice(applicationIds)))
+        elif kind == "list":
+            requests.append(("list", random.randint(1, 5)))
+        else:
+            requests.append(("search", SearchCVQuery(skills=["Python", "SQL"], requirementDescription="Backend developer")))
+    return requests
+
+async def handleBlocking(dbController: DBController, request: tuple):
+    # Before the async layer, the async routes called the sync methods directly, blocking the event loop
+    kind, argument = request
+    if kind == "get":
+        return dbController.getApplication(argument)
+    if kind == "list":
+        return dbController.getAllApplications(argument, 10)
+    return dbController.searchApplications(argument)
+
+async def handleAsync(dbController: DBController, request: tuple):
+    kind, argument = request
+    if kind == "get":
+        return await dbController.agetApplication(argument)
+    if kind == "list":
+        return await dbController.agetAllApplications(argument, 10)
+    return await dbController.asearchApplications(argument)
+
+async def runLoad(handler, dbController: DBController, requests: list[tuple], concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    async def handle(request):
+        async with semaphore:
+            await handler(dbController, request)
+
+    startTime = time.perf_counter()
+    await asyncio.gather(*(handle(request) for request in requests))
+    return time.perf_counter() - startTime
+
+def benchmark(requestCount: int, concurrency: int, databaseUrl: str | None, asyncDatabaseUrl: str | None, cvCount: int = 200):
+    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(databaseUrl or f"sqlite:///{directory}/applications.sqlite3")
+        asyncEngine = create_async_engine(asyncDatabaseUrl or f"sqlite+aiosqlite:///{directory}/applications.sqlite3")
+        SQLModel.metadata.drop_all(engine)
+        SQLModel.metadata.create_all(engine)
+        vectorStore = Chroma(collection_name="applications", embedding_function=embeddings, persist_directory=f"{directory}/vectordb")
+        dbController = DBController(engine, vectorStore, asyncEngine)
+        applicationIds = dbController.addApplications(generateParsedCVs(cvCount))
+
+        requests = mixedRequests(requestCount, applicationIds)
+        async def runLoads():
+            for name, handler in [("blocking", handleBlocking), ("async", handleAsync)]:
+                elapsed = await runLoad(handler, dbController, requests, concurrency)
+                print(f"{name}: {requestCount} requests ({concurrency} concurrent) in {elapsed:.2f} s, {requestCount / elapsed:.1f} requests per second")
+            await asyncEngine.dispose()
+
+        asyncio.run(runLoads())
+        engine.dispose()
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) >= 2 else 500, int(sys.argv[2]) if len(sys.argv) >= 3 else 20,
+              sys.argv[3] if len(sys.argv) >= 5 else None, sys.argv[4] if len(sys.argv) >= 5 else None)
@@ -0,0 +1,85 @@
+from modules.read_cv_directory.ProcessCVFileClass import DOCXProcessor, ODTProcessor
+from xml.sax.saxutils import escape
+import os, sys, tempfile, time, tracemalloc, zipfile
+
+# Compare the native DOCX/ODT extractors with the unstructured loaders: latency and peak Python memory per file.
+# Uses the .docx and .odt files of the given directory, or generated CVs if no directory is given.
+# Run from the repository root:
+#   python -m benchmarks.BenchmarkCVFileExtraction [<directory of CV files>]
+
+def generateCVLines(entryCount: int) -> list[str]:
+    lines = ["John Doe", "Email: johndoe@gmail.com | Phone: +84 912 345 678", "Work Experience"]
+    for i in range(entryCount):
+        lines.append(f"Software Engineer at Company {i} (01/{2010 + i} - 12/{2011 + i})")
+        lines.extend(f"Built and maintained service {i}.{j} with Python, FastAPI and MariaDB." for j in range(5))
+    return lines
+
+def writeDOCX(filePath: str, lines: list[str]):
+    paragraphs = "".join(f"<w:p><w:r><w:t>{escape(line)}</w:t></w:r></w:p>" for line in lines)
+    table = "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>Python</w:t></w:r></w:p></w:tc><w:tc><w:p><w:r><w:t>5 years</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+    with zipfile.ZipFile(filePath, "w", zipfile.ZIP_DEFLATED) as zipFile:
+        zipFile.writestr("[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        zipFile.writestr("_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/></Relationships>')
+        zipFile.writestr("word/document.xml",
+            '<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{paragraphs}{table}</w:body></w:document>")
+
+def writeODT(filePath: str, lines: list[str]):
+    paragraphs = "".join(f"<text:p>{escape(line)}</text:p>" for line in lines)
+    table = "<table:table><table:table-row><table:table-cell><text:p>Python</text:p></table:table-cell><table:table-cell><text:p>5 years</text:p></table:table-cell></table:table-row></table:table>"
+    with zipfile.ZipFile(filePath, "w") as zipFile:
+        zipFile.writestr("mimetype", "application/vnd.oasis.opendocument.text")
+        zipFile.writestr("META-INF/manifest.xml",
+            '<?xml version="1.0" encoding="UTF-8"?><manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0">'
+            '<manifest:file-entry manifest:full-path="/" manifest:media-type="application/vnd.oasis.opendocument.text"/>'
+            '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/></manifest:manifest>')
+        zipFile.writestr("content.xml",
+            '<?xml version="1.0" encoding="UTF-8"?><office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+            'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0">'
+            f"<office:body><office:text>{paragraphs}{table}</office:text></office:body></office:document-content>")
+
+def measure(extract, filePath: str) -> tuple[float, int, int]:
+    """
+    Return the wall time in seconds, the peak traced memory in bytes and the number of extracted characters.
+    """
+    tracemalloc.start()
+    startTime = time.perf_counter()
+    documents = extract(filePath)
+    elapsed = time.perf_counter() - startTime
+    _, peakMemory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peakMemory, sum(len(document.page_content) for document in documents)
+
+def benchmark(filePaths: list[str]):
+    processors = { ".docx": DOCXProcessor(), ".odt": ODTProcessor() }
+    for filePath in filePaths:
+        processor = processors[os.path.splitext(filePath)[1].lower()]
+        results = [("native", measure(processor.extractNatively, filePath))]
+        try:
+            results.append(("unstructured", measure(processor.extractWithUnstructured, filePath)))
+        except ImportError as e:
+            print(f"unstructured is not available, only measuring the native extractor: {e}")
+        for name, (elapsed, peakMemory, characterCount) in results:
+            print(f"{os.path.basename(filePath)} {name}: {elapsed * 1000:.1f} ms, {peakMemory / 1024:.0f} KiB peak, {characterCount} characters")
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        benchmark(sorted(
+            os.path.join(sys.argv[1], fileName) for fileName in os.listdir(sys.argv[1])
+            if os.path.splitext(fileName)[1].lower() in (".docx", ".odt")
+        ))
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            filePaths = []
+            for entryCount in (5, 50):
+                for extension, write in ((".docx", writeDOCX), (".odt", writeODT)):
+                    filePath = os.path.join(directory, f"generated_cv_{entryCount}{extension}")
+                    write(filePath, generateCVLines(entryCount))
+                    filePaths.append(filePath)
+            benchmark(filePaths)
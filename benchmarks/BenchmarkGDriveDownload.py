@@ -0,0 +1,94 @@
+from modules.read_cv_directory.GDriveDownload import GDriveDownload
+from benchmarks.BenchmarkCVFileExtraction import generateCVLines, writeDOCX
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import json, os, re, sys, tempfile, threading, time
+
+# Download a Google Drive folder from a local HTTP server standing in for the Drive API, serving the files of a directory
+# (or generated CVs and non-CV files) with a simulated latency per file.
+# Compares serial and concurrent downloads, and a second download of the unchanged folder served from the cache.
+# Run from the repository root:
+#   python -m benchmarks.BenchmarkGDriveDownload [<directory of fixture files>]
+
+folderId = "fixtureFolder"
+
+class DriveStandIn(BaseHTTPRequestHandler):
+    # File id -> { 'id', 'name', 'mimeType', 'modifiedTime', 'path' }, set before starting the server
+    files: dict[str, dict] = {}
+    latency = 0.05
+    mediaRequestCount = 0
+
+    def _sendJson(self, data: dict):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = { key: values[0] for key, values in parse_qs(url.query).items() }
+        metadata = lambda file: { key: file[key] for key in ("id", "name", "mimeType", "modifiedTime") }
+        if url.path == "/files":
+            listedFolderId = re.match(r"'([^']+)' in parents", params.get("q", "")).group(1)
+            self._sendJson({ "files": [metadata(file) for file in self.files.values()] if listedFolderId == folderId else [] })
+            return
+
+        file = self.files.get(url.path.removeprefix("/files/"))
+        if file is None:
+            self.send_error(404)
+        elif params.get("alt") == "media":
+            DriveStandIn.mediaRequestCount += 1
+            time.sleep(self.latency)
+            with open(file["path"], "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._sendJson(metadata(file))
+
+    def log_message(self, format, *args):
+        pass
+
+def generateFixtureFiles(directory: str, cvCount: int = 20, otherCount: int = 10):
+    for i in range(cvCount):
+        writeDOCX(os.path.join(directory, f"cv_{i}.docx"), generateCVLines(5))
+    for i in range(otherCount):
+        with open(os.path.join(directory, f"notes_{i}.txt"), "w") as f:
+            f.write("Not a CV " * 1000)
+
+def benchmark(fixtureDirectory: str):
+    DriveStandIn.files = {
+        f"file{i}": { "id": f"file{i}", "name": fileName, "mimeType": "application/octet-stream",
+                      "modifiedTime": "2025-01-01T00:00:00.000Z", "path": os.path.join(fixtureDirectory, fileName) }
+        for i, fileName in enumerate(sorted(os.listdir(fixtureDirectory)))
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DriveStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    apiBaseUrl = f"http://127.0.0.1:{server.server_address[1]}"
+    folderUrl = f"https://drive.google.com/drive/folders/{folderId}"
+
+    try:
+        with tempfile.TemporaryDirectory() as workDirectory:
+            for name, maxConcurrency, cacheName in [("serial", 1, "serial_cache"), ("concurrent", 8, "cache"), ("cached", 8, "cache")]:
+                downloader = GDriveDownload(os.path.join(workDirectory, name), apiKey="stand-in", maxConcurrency=maxConcurrency,
+                                            cachePath=os.path.join(workDirectory, cacheName), apiBaseUrl=apiBaseUrl)
+                DriveStandIn.mediaRequestCount = 0
+                startTime = time.perf_counter()
+                filePaths = downloader.downloadPdfFileOrFolder(folderUrl)
+                elapsed = time.perf_counter() - startTime
+                print(f"{name}: {len(filePaths)}/{len(DriveStandIn.files)} files kept, "
+                      f"{DriveStandIn.mediaRequestCount} downloaded, {elapsed:.2f} s")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        benchmark(sys.argv[1])
+    else:
+        with tempfile.TemporaryDirectory() as fixtureDirectory:
+            generateFixtureFiles(fixtureDirectory)
+            benchmark(fixtureDirectory)
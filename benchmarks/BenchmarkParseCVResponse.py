@@ -0,0 +1,133 @@
+from modules.parse_cv.ParsedCVTokenizer import tokenizeParsedCV
+import re, timeit
+
+# Micro-benchmark of the single pass tag tokenizer against the previous regex based parsing of <ParsedCV> blocks.
+# Date parsing is left out as it is the same for both.
+# Run from the repository root: python -m benchmarks.BenchmarkParseCVResponse
+
+def regexParsedCV(cvText: str) -> dict:
+    """
+    The previous parseEachCVResponse implementation (without the date and years of experience conversion).
+    """
+    name = re.search(r"<ApplicationName>(.*?)</ApplicationName>", cvText)
+    email = re.search(r"<Email>(.*?)</Email>", cvText)
+    phone = re.search(r"<Phone>(.*?)</Phone>", cvText)
+    linkedIn = re.search(r"<LinkedIn>(.*?)</LinkedIn>", cvText)
+    gitRepo = re.search(r"<GitRepo>(.*?)</GitRepo>", cvText)
+    address = re.search(r"<Address>(.*?)</Address>", cvText)
+    totalYoE = re.search(r"<YearOfExperience>(.*?)</YearOfExperience>", cvText)
+    workExperiences = re.findall(r"<WorkExperience>(.*?)</WorkExperience>", cvText, re.DOTALL)
+    projects = re.findall(r"<Project>(.*?)</Project>", cvText, re.DOTALL)
+    educations = re.findall(r"<Education>(.*?)</Education>", cvText, re.DOTALL)
+    skills = re.findall(r"<Skill>(.*?)</Skill>", cvText)
+    experiencedSkills = re.findall(r"<ExperiencedSkill>(.*?)</ExperiencedSkill><YoE>(.*?)</YoE>", cvText)
+
+    education_entries = []
+    for education in educations:
+        degree = re.search(r"<Degree>(.*?)</Degree>", education)
+        institution = re.search(r"<Institution>(.*?)</Institution>", education)
+        year = re.search(r"<Year>(.*?)</Year>", education)
+        gpa = re.search(r"<GPA>(.*?)</GPA>", education)
+        education_entries.append({
+            "degree": degree.group(1) if degree else None,
+            "institution": institution.group(1) if institution else None,
+            "year": year.group(1) if year else None,
+            "gpa": gpa.group(1) if gpa else None
+        })
+
+    work_experience_entries = []
+    for workExperience in workExperiences:
+        company = re.search(r"<Company>(.*?)</Company>", workExperience)
+        position = re.search(r"<Position>(.*?)</Position>", workExperience)
+        startDate = re.search(r"<StartDate>(.*?)</StartDate>", workExperience)
+        endDate = re.search(r"<EndDate>(.*?)</EndDate>", workExperience)
+        description = re.search(r"<Description>(.*?)</Description>", workExperience, re.DOTALL)
+        work_experience_entries.append({
+            "company": company.group(1) if company else None,
+            "position": position.group(1) if position else None,
+            "startDate": startDate.group(1) if startDate else None,
+            "endDate": endDate.group(1) if endDate else None,
+            "description": description.group(1).strip() if description else None
+        })
+
+    project_entries = []
+    for project in projects:
+        projectName = re.search(r"<ProjectName>(.*?)</ProjectName>", project)
+        startDate = re.search(r"<StartDate>(.*?)</StartDate>", project)
+        endDate = re.search(r"<EndDate>(.*?)</EndDate>", project)
+        description = re.search(r"<Description>(.*?)</Description>", project, re.DOTALL)
+        project_entries.append({
+            "name": projectName.group(1) if projectName else None,
+            "startDate": startDate.group(1) if startDate else None,
+            "endDate": endDate.group(1) if endDate else None,
+            "description": description.group(1).strip() if description else None
+        })
+
+    return {
+        "name": name.group(1) if name else None,
+        "email": email.group(1) if email else None,
+        "phone": phone.group(1) if phone else None,
+        "linkedIn": linkedIn.group(1) if linkedIn else None,
+        "gitRepo": gitRepo.group(1) if gitRepo else None,
+        "address": address.group(1) if address else None,
+        "totalYearsOfExperience": totalYoE.group(1) if totalYoE else None,
+        "workExperiences": work_experience_entries,
+        "projects": project_entries,
+        "educations": education_entries,
+        "skills": skills,
+        "experiencedSkills": [{ "skill": skill[0], "yearsOfExperience": skill[1] } for skill in experiencedSkills]
+    }
+
+def generateParsedCV(i: int, entryCount: int) -> str:
+    workExperiences = "".join(f"""
+        <WorkExperience>
+            <Company>Company {i}-{j}</Company>
+            <StartDate>20{10 + j % 10}</StartDate>
+            <EndDate>20{11 + j % 10}</EndDate>
+            <Position>Software Engineer {j}</Position>
+            <Description>
+            - Developed services handling {j} million requests per day.
+            - Improved system performance by {j}%.
+            - Cached Map<String, Integer> lookups, rendered <b>reports</b> and kept latency <5ms where a<b.
+            </Description>
+        </WorkExperience>""" for j in range(entryCount))
+    projects = "".join(f"""
+        <Project>
+            <ProjectName>Project {i}-{j}</ProjectName>
+            <StartDate>June 2019</StartDate>
+            <EndDate>December 2019</EndDate>
+            <Description>
+            - Built a recommendation engine for project {j}.
+            </Description>
+        </Project>""" for j in range(entryCount))
+    educations = "".join(f"""
+        <Education>
+            <Degree>Bachelor of Science {j}</Degree>
+            <Institution>University {j}</Institution>
+            <Year>2016-2020</Year>
+            <GPA>3.{j % 10}</GPA>
+        </Education>""" for j in range(2))
+    skills = "".join(f"\n        <Skill>Skill {j}</Skill>" for j in range(entryCount * 2)) + "\n        <Skill>Java generics (List<T>)</Skill>"
+    experiencedSkills = "".join(f"\n        <ExperiencedSkill>Experienced skill {j}</ExperiencedSkill><YoE>{j % 5 + 1}</YoE>" for j in range(entryCount))
+    return f"""
+        <ApplicationName>Applicant {i}</ApplicationName>
+        <Email>applicant{i}@example.com</Email>
+        <Phone>+1234567{i:03d}</Phone>
+        <LinkedIn>https://www.linkedin.com/in/applicant{i}</LinkedIn>
+        <GitRepo>https://github.com/applicant{i}</GitRepo>
+        <YearOfExperience>{entryCount}</YearOfExperience>
+        <Address>{i} Main St, City, Country</Address>{workExperiences}{projects}{educations}{skills}{experiencedSkills}
+        <Certification>Certification {i}</Certification>
+    """
+
+if __name__ == "__main__":
+    for cvCount, entryCount in [(5, 3), (20, 10), (50, 30)]:
+        response = "\n".join(f'<ParsedCV index="{i}">{generateParsedCV(i, entryCount)}</ParsedCV>' for i in range(cvCount))
+        blocks = re.findall(r"<ParsedCV[^>]*>(.*?)</ParsedCV>", response, re.DOTALL)
+        assert all(regexParsedCV(block) == tokenizeParsedCV(block) for block in blocks), "Both parsers should give the same result"
+
+        repeat = 20
+        regexTime = min(timeit.repeat(lambda: [regexParsedCV(block) for block in blocks], number=repeat, repeat=3)) / repeat
+        tokenizerTime = min(timeit.repeat(lambda: [tokenizeParsedCV(block) for block in blocks], number=repeat, repeat=3)) / repeat
+        print(f"{cvCount} CVs with {entryCount} entries each ({len(response) // 1024} KB): "
+              f"regex {regexTime * 1000:.2f} ms, tokenizer {tokenizerTime * 1000:.2f} ms, speedup {regexTime / tokenizerTime:.2f}x")
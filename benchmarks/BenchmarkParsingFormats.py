@@ -0,0 +1,73 @@
+from modules.parse_cv.CVParsingFormat import cvParsingFormats
+from modules.parse_cv.ParsedCVTokenizer import tokenizeParsedCV
+from benchmarks.BenchmarkParseCVResponse import generateParsedCV
+import json, sys, time, timeit
+
+# Compare the output formats of the parsing prompt ("xml" and "compact").
+# Offline (default): output tokens and block parsing time per CV on generated CVs, converting the XML output to the compact format.
+# Live: output tokens reported by the model and wall time per CV on real CV files, calling the model once per format.
+# Run from the repository root:
+#   python -m benchmarks.BenchmarkParsingFormats
+#   python -m benchmarks.BenchmarkParsingFormats --live <directory of CV files>
+
+def countTokens(text: str) -> int:
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("o200k_base").encode(text))
+    except ImportError:
+        return len(text) // 4 + 1
+
+def toCompactFormat(index: int, cvData: dict) -> str:
+    compact = {
+        "i": index, "n": cvData["name"], "e": cvData["email"], "p": cvData["phone"], "li": cvData["linkedIn"],
+        "g": cvData["gitRepo"], "y": cvData["totalYearsOfExperience"], "a": cvData["address"],
+        "w": [{ "c": we["company"], "t": we["position"], "s": we["startDate"], "e": we["endDate"], "d": we["description"] } for we in cvData["workExperiences"]],
+        "pr": [{ "n": project["name"], "s": project["startDate"], "e": project["endDate"], "d": project["description"] } for project in cvData["projects"]],
+        "ed": [{ "d": edu["degree"], "i": edu["institution"], "y": edu["year"], "g": edu["gpa"] } for edu in cvData["educations"]],
+        "sk": cvData["skills"],
+        "xs": [[skill["skill"], skill["yearsOfExperience"]] for skill in cvData["experiencedSkills"]],
+    }
+    return json.dumps(compact, ensure_ascii=False, separators=(",", ":"))
+
+def benchmarkOffline(cvCount: int = 20, entryCount: int = 5):
+    xmlResponse = "\n".join(f'<ParsedCV index="{i}">{generateParsedCV(i, entryCount)}</ParsedCV>' for i in range(cvCount))
+    xmlBlocks, _ = cvParsingFormats["xml"].findBlocks(xmlResponse)
+    compactResponse = "\n".join(toCompactFormat(int(index), tokenizeParsedCV(block)) for index, block in xmlBlocks)
+    compactBlocks, _ = cvParsingFormats["compact"].findBlocks(compactResponse)
+    assert [tokenizeParsedCV(block) for _, block in xmlBlocks] == [cvParsingFormats["compact"].tokenize(block) for _, block in compactBlocks], \
+        "Both formats should give the same ParsedCV input"
+
+    for formatName, response in [("xml", xmlResponse), ("compact", compactResponse)]:
+        parsingFormat = cvParsingFormats[formatName]
+        parse = lambda: [parsingFormat.tokenize(block) for _, block in parsingFormat.findBlocks(response)[0]]
+        assert len(parse()) == cvCount
+        parseTime = min(timeit.repeat(parse, number=10, repeat=3)) / 10
+        print(f"{formatName}: {countTokens(response) / cvCount:.0f} output tokens per CV, "
+              f"{parseTime / cvCount * 1e6:.1f} us to parse each CV")
+
+def benchmarkLive(directory: str):
+    from langchain_core.prompts import ChatPromptTemplate
+    from modules.read_cv_directory.CVProcessor import CVProcessor
+    from modules.parse_cv.ParseCVFiles import openaiCVParsingModel, cvParsingPrompts
+
+    documents = CVProcessor(directory, savePath=directory).processCVFiles()
+    cvText = "\n".join(f'<CV index="{i}">{document.page_content}</CV>' for i, document in enumerate(documents))
+    for formatName, prompt in cvParsingPrompts.items():
+        chain = ChatPromptTemplate.from_messages([
+            ("system", prompt),
+            ("human", "Now these are the CVs you need to parse:\n{cv_text}")
+        ]) | openaiCVParsingModel
+        startTime = time.perf_counter()
+        message = chain.invoke({"cv_text": cvText})
+        elapsed = time.perf_counter() - startTime
+
+        blocks, _ = cvParsingFormats[formatName].findBlocks(message.content)
+        outputTokens = (message.usage_metadata or {}).get("output_tokens") or countTokens(message.content)
+        print(f"{formatName}: {len(blocks)}/{len(documents)} CVs parsed, {outputTokens / len(documents):.0f} output tokens "
+              f"and {elapsed / len(documents):.2f} s per CV")
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "--live":
+        benchmarkLive(sys.argv[2])
+    else:
+        benchmarkOffline()
@@ -0,0 +1,94 @@
+from controller.DBController import experiencedSkillsCondition
+from database.SkillDictionary import SkillDictionary
+from schema.Application import Application, ExperiencedSkill
+from shared.SkillNormalization import skillKey
+from sqlmodel import SQLModel, Session, create_engine, select, exists, and_
+from sqlalchemy import insert, func
+import random, statistics, sys, tempfile, time
+
+# Multi-skill experience filters on a large experienced skill table: the previous substring filter (one ILIKE '%skill%'
+# scan of the experienced skills per requested skill) against the canonical skill ids (one indexed GROUP BY HAVING query).
+# Uses a fresh database in a temporary directory: SQLite by default, or the database URL given (e.g. an empty MariaDB database,
+# its tables are created).
+# Run from the repository root:
+#   python -m benchmarks.BenchmarkSkillFilter [<experienced skill count, default 1000000>] [<database URL>]
+
+skillsPerApplication = 10
+searches = [
+    { "JavaScript": 3, "Python": 2 },
+    { "js": 5, "SQL": 1, "Docker": 2 },
+    { "Kubernetes": 4 },
+    { "Skill 1234": 1, "Python": 1 },
+]
+
+def generateSkillNames(count: int = 2000) -> list[str]:
+    common = ["JavaScript", "JS", "javascript", "Python", "python3", "SQL", "Docker", "Kubernetes", "K8s", "React", "ReactJS",
+              "TypeScript", "Java", "C#", "Go", "AWS", "Git", "Linux", "HTML", "CSS"]
+    return common + [f"Skill {i}" for i in range(count - len(common))]
+
+def seed(engine, skillRowCount: int, batchSize: int = 20000):
+    random.seed(0)
+    skillNames = generateSkillNames()
+    # Zipf like popularity: the common skills are in most CVs
+    weights = [1 / (rank + 1) for rank in range(len(skillNames))]
+    skillIds = SkillDictionary(engine).getSkillIds(skillNames)
+    applicationCount = skillRowCount // skillsPerApplication
+
+    with Session(engine) as session:
+        for start in range(0, applicationCount, batchSize // skillsPerApplication):
+            applications = [{ "vectorDbUuid": f"uuid-{i}", "name": f"Applicant {i}" }
+                            for i in range(start, min(start + batchSize // skillsPerApplication, applicationCount))]
+            session.execute(insert(Application), applications)
+            firstId = session.exec(select(func.max(Application.id))).one() - len(applications) + 1
+            rows = []
+            for applicationId in range(firstId, firstId + len(applications)):
+                for skillName in set(random.choices(skillNames, weights, k=skillsPerApplication)):
+                    rows.append({ "application_id": applicationId, "skill": skillName, "skill_id": skillIds[skillKey(skillName)],
+                                  "yearsOfExperience": round(random.uniform(0, 10), 1) })
+            session.execute(insert(ExperiencedSkill), rows)
+            session.commit()
+        return session.exec(select(func.count(ExperiencedSkill.id))).one()
+
+def substringQuery(search: dict):
+    sqlQuery = select(Application.id)
+    for skill, experience in search.items():
+        sqlQuery = sqlQuery.where(exists().where(and_(
+            ExperiencedSkill.application_id == Application.id,
+            ExperiencedSkill.skill.ilike(f"%{skill}%"),
+            ExperiencedSkill.yearsOfExperience >= experience
+        )))
+    return sqlQuery
+
+def canonicalQuery(skillDictionary: SkillDictionary, search: dict):
+    skillRequirements = [(skillDictionary.findSkillIds(skill), experience) for skill, experience in search.items()]
+    return select(Application.id).where(experiencedSkillsCondition(skillRequirements))
+
+def measure(engine, buildQuery, repeat: int = 5) -> tuple[float, int]:
+    durations = []
+    with Session(engine) as session:
+        for _ in range(repeat):
+            startTime = time.perf_counter()
+            resultCount = len(session.exec(buildQuery()).all())
+            durations.append(time.perf_counter() - startTime)
+    return statistics.median(durations), resultCount
+
+def benchmark(skillRowCount: int, databaseUrl: str | None):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(databaseUrl or f"sqlite:///{directory}/skills.sqlite3")
+        SQLModel.metadata.drop_all(engine)
+        SQLModel.metadata.create_all(engine)
+        startTime = time.perf_counter()
+        rowCount = seed(engine, skillRowCount)
+        print(f"Seeded {rowCount} experienced skills in {time.perf_counter() - startTime:.1f} s")
+
+        skillDictionary = SkillDictionary(engine)
+        for search in searches:
+            substringDuration, substringCount = measure(engine, lambda: substringQuery(search))
+            canonicalDuration, canonicalCount = measure(engine, lambda: canonicalQuery(skillDictionary, search))
+            # The counts differ where substrings match other skills ("Java" in "JavaScript") or miss synonyms ("JS")
+            print(f"{search}: substring {substringDuration * 1000:.1f} ms ({substringCount} applications), "
+                  f"canonical {canonicalDuration * 1000:.1f} ms ({canonicalCount} applications)")
+        engine.dispose()
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) >= 2 else 1000000, sys.argv[2] if len(sys.argv) >= 3 else None)
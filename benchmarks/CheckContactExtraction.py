@@ -0,0 +1,43 @@
+from modules.parse_cv.ContactExtractor import extractContactFields, extractPhone
+
+# Guard the local extraction of the contact fields: the values are pre-filled into the parsed CVs, so a wrong match
+# (e.g. a phone number joined with the dates of the next line) ends up in the saved application.
+# Exits with an error on a regression.
+# Run from the repository root:
+#   python -m benchmarks.CheckContactExtraction
+
+# (CV text, expected phone number or None)
+phoneCases = [
+    ("Phone: 0901234567", "0901234567"),
+    ("Phone: +84 901 234 567 | Email: a@b.com", "+84 901 234 567"),
+    ("Tel: (028) 3823-4567", "(028) 3823-4567"),
+    ("Phone: 0901234567\n2019 - 2021 Company", "0901234567"),
+    ("Mobile:\n0901 234 567\n12 Main", "0901 234 567"),
+    ("Experience\n2019 - 2021\n123456789", None),
+    ("Student ID 123456789", None),
+]
+
+# (CV text, expected contact fields)
+contactCases = [
+    ("John Doe\nEmail: john.doe@example.com  Phone: +1 860 716 5996\nAddress: 12 Main St, Hartford  LinkedIn: linkedin.com/in/johndoe\n"
+     "github.com/johndoe",
+     { "email": "john.doe@example.com", "phone": "+1 860 716 5996", "address": "12 Main St, Hartford",
+       "linkedIn": "https://www.linkedin.com/in/johndoe", "gitRepo": "https://github.com/johndoe" }),
+    ("Nguyễn Văn A\nSĐT: 0901234567\n2018 - 2022 Đại học Bách Khoa", { "phone": "0901234567" }),
+]
+
+def check():
+    for text, expectedPhone in phoneCases:
+        phone = extractPhone(text)
+        if phone != expectedPhone:
+            raise AssertionError(f"extractPhone({text!r}) returned {phone!r} instead of {expectedPhone!r}")
+    print(f"{len(phoneCases)} phone cases ok")
+
+    for text, expectedFields in contactCases:
+        fields = extractContactFields(text)
+        if fields != expectedFields:
+            raise AssertionError(f"extractContactFields({text!r}) returned {fields} instead of {expectedFields}")
+    print(f"{len(contactCases)} contact field cases ok")
+
+if __name__ == "__main__":
+    check()
@@ -0,0 +1,53 @@
+from langchain_core.prompts import ChatPromptTemplate
+from modules.parse_cv.CVParsingFormat import cvParsingFormats
+from modules.parse_cv.ParseCVFiles import cvParsingPrompts, parseEachCVResponse
+import json
+
+# Guard the output examples of the parsing prompts: every line of the compact (JSON Lines) example must be a valid JSON
+# object, and the example of each output format must parse into the same ParsedCV, so a model copying any of them gives
+# a response the parser accepts. Exits with an error on a regression.
+# Run from the repository root:
+#   python -m benchmarks.CheckPromptExamples
+
+def renderPrompt(prompt: str) -> str:
+    # The prompt as the model receives it, with the template escapes ({{ and }}) resolved
+    return ChatPromptTemplate.from_messages([("system", prompt)]).format_messages()[0].content
+
+def exampleOutput(prompt: str) -> str:
+    text = renderPrompt(prompt)
+    start = text.index("The output should be in the following format:") + len("The output should be in the following format:")
+    return text[start:text.index("End of instruction.", start)].strip()
+
+def comparableCV(parsedCV) -> dict:
+    # The descriptions of the XML example keep the indentation of the prompt, compare their lines without it
+    cv = dict(vars(parsedCV))
+    for field in ["workExperiences", "projects"]:
+        cv[field] = [{ **entry, "description": [line.strip() for line in (entry["description"] or "").splitlines()] }
+                     for entry in cv[field]]
+    return cv
+
+def check():
+    compactExample = exampleOutput(cvParsingPrompts["compact"])
+    for lineNumber, line in enumerate(compactExample.splitlines(), 1):
+        try:
+            json.loads(line)
+        except ValueError as e:
+            raise AssertionError(f"Line {lineNumber} of the compact example isn't valid JSON ({e}): {line}")
+    print(f"compact: {len(compactExample.splitlines())} example line(s) of valid JSON ok")
+
+    parsedCVs = {}
+    for formatName, prompt in cvParsingPrompts.items():
+        parsingFormat = cvParsingFormats[formatName]
+        blocks, _ = parsingFormat.findBlocks(exampleOutput(prompt))
+        if len(blocks) != 1 or blocks[0][0] != "7":
+            raise AssertionError(f"The {formatName} example should have one block of index 7, found {[index for index, _ in blocks]}")
+        parsedCVs[formatName] = comparableCV(parseEachCVResponse(blocks[0][1], parsingFormat=parsingFormat))
+        print(f"{formatName}: example parsed ok")
+
+    if parsedCVs["compact"] != parsedCVs["xml"]:
+        differences = [field for field in parsedCVs["xml"] if parsedCVs["xml"][field] != parsedCVs["compact"].get(field)]
+        raise AssertionError(f"The examples parse into different ParsedCVs, fields {differences} differ")
+    print("xml and compact examples give the same ParsedCV ok")
+
+if __name__ == "__main__":
+    check()
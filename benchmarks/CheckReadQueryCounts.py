@@ -0,0 +1,76 @@
+from benchmarks.BenchmarkAddApplications import generateParsedCVs
+from controller.DBController import DBController, APPLICATION_RELATIONSHIPS
+from shared.QueryObject import SearchCVQuery
+from langchain_chroma import Chroma
+from langchain_huggingface import HuggingFaceEmbeddings
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from contextlib import contextmanager
+import asyncio, sys, tempfile
+
+# Guard against N+1 queries in the read paths: the number of SQL statements of getApplication, searchApplications and
+# getAllApplications (and their async versions) must not depend on the number of applications returned.
+# Uses a database seeded with generated CVs: SQLite by default (needs aiosqlite), or the given database URLs of the same
+# empty database, e.g. mysql+pymysql://... and mysql+aiomysql://... (its tables are created). Exits with an error on a regression.
+# Run from the repository root:
+#   python -m benchmarks.CheckReadQueryCounts [<database URL> <async database URL>]
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._increment)
+
+    def _increment(self, *args):
+        self.count += 1
+
+    @contextmanager
+    def expect(self, name: str, expectedCount: int):
+        self.count = 0
+        yield
+        status = "ok" if self.count == expectedCount else "FAILED"
+        print(f"{name}: {self.count} queries (expected {expectedCount}) {status}")
+        if self.count != expectedCount:
+            raise AssertionError(f"{name} ran {self.count} queries instead of {expectedCount}")
+
+def check(databaseUrl: str | None, asyncDatabaseUrl: str | None, cvCount: int = 60):
+    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(databaseUrl or f"sqlite:///{directory}/applications.sqlite3")
+        asyncEngine = create_async_engine(asyncDatabaseUrl or f"sqlite+aiosqlite:///{directory}/applications.sqlite3")
+        SQLModel.metadata.drop_all(engine)
+        SQLModel.metadata.create_all(engine)
+        vectorStore = Chroma(collection_name="applications", embedding_function=embeddings, persist_directory=f"{directory}/vectordb")
+        dbController = DBController(engine, vectorStore, asyncEngine)
+        applicationIds = dbController.addApplications(generateParsedCVs(cvCount))
+
+        counter = QueryCounter(engine)
+        asyncCounter = QueryCounter(asyncEngine.sync_engine)
+        query = SearchCVQuery(skills=["Python"], requirementDescription="Backend developer")
+        relationshipCount = len(APPLICATION_RELATIONSHIPS)
+        # One query for the applications (and one for the page count), and one per loaded relationship
+        for include, loadedCount in [(None, relationshipCount), (["education"], 1), ([], 0)]:
+            for pageSize in [1, 10, 50]:
+                with counter.expect(f"getAllApplications(pageSize={pageSize}, include={include})", 2 + loadedCount):
+                    dbController.getAllApplications(1, pageSize, include=include)
+            with counter.expect(f"getApplication(include={include})", 1 + loadedCount):
+                dbController.getApplication(applicationIds[0], include=include)
+            with counter.expect(f"searchApplications(include={include})", 1 + loadedCount):
+                dbController.searchApplications(query, include=include)
+
+        async def checkAsync():
+            for include, loadedCount in [(None, relationshipCount), ([], 0)]:
+                for pageSize in [1, 50]:
+                    with asyncCounter.expect(f"agetAllApplications(pageSize={pageSize}, include={include})", 2 + loadedCount):
+                        await dbController.agetAllApplications(1, pageSize, include=include)
+                with asyncCounter.expect(f"agetApplication(include={include})", 1 + loadedCount):
+                    await dbController.agetApplication(applicationIds[0], include=include)
+                with asyncCounter.expect(f"asearchApplications(include={include})", 1 + loadedCount):
+                    await dbController.asearchApplications(query, include=include)
+            await asyncEngine.dispose()
+
+        asyncio.run(checkAsync())
+        engine.dispose()
+
+if __name__ == "__main__":
+    check(sys.argv[1] if len(sys.argv) >= 3 else None, sys.argv[2] if len(sys.argv) >= 3 else None)
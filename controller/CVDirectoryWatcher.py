@@ -0,0 +1,42 @@
+from controller.ProcessCVController import ProcessCVController
+import threading
+
+class CVDirectoryWatcher:
+    """
+    Poll a drop folder in a background thread, ingesting the CV files added or changed in it since the last poll.
+    """
+    def __init__(self, processCVController: ProcessCVController, directory: str, interval: float = 60.0, removeDeleted: bool = False):
+        self.processCVController = processCVController
+        self.directory = directory
+        self.interval = interval
+        self.removeDeleted = removeDeleted
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def syncOnce(self) -> dict:
+        result = self.processCVController.syncCVDirectory(self.directory, self.removeDeleted)
+        # Deleted files that are kept are reported by every sync, only the new deletions are logged
+        newDeletedCount = sum(1 for deletedFile in result["deleted_files"] if deletedFile["new"])
+        if result["added_application_ids"] or result["updated_application_ids"] or newDeletedCount or result["failed_files"]:
+            print(f"Synced {self.directory}: {result['message']} {newDeletedCount} deleted and {len(result['failed_files'])} failed files.")
+        return result
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.syncOnce()
+            except Exception as e:
+                # Keep watching, the files that failed are retried on the next poll
+                print(f"Error syncing CV directory {self.directory}: {e}")
+            self._stopped.wait(self.interval)
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="CVDirectoryWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
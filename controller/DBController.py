@@ -1,17 +1,27 @@
 from langchain.vectorstores import VectorStore
 from langchain_core.documents import Document
-from sqlmodel import Session, select, and_
-from sqlalchemy import func
+from sqlmodel import Session, select, and_, or_
+from sqlalchemy import func, text, DateTime, Integer, case, false
+from sqlalchemy.orm import selectinload, noload
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from database.SqlQuery import SqlQueryObject
+from database.AsyncSqlQuery import AsyncSqlQueryObject
+from database.CachedCount import CachedCount
+from database.SkillDictionary import SkillDictionary
 from database.VectorQuery import VectorQueryObject
 from settings import get_settings
 from schema.Application import Application, Education, ExperiencedSkill, WorkExperience, Project
 from modules.parse_cv.ParsedCV import ParsedCV
 from shared.QueryObject import SearchCVQuery
+from shared.PageCursor import encodeCursor, decodeCursor
+from shared.SkillNormalization import skillKey
+from shared.LookupNormalization import (normalizeEmail, normalizePhone, nationalPhoneDigits, normalizeProfileUrl,
+                                        isFullEmail, isEmailDomain, hasUrlHost, fullTextWords, setLookupColumns)
 
-import uuid, re
-from typing import List, Dict, Any
+import uuid, re, asyncio
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
 def camelCaseToText(camel_case_str: str) -> str:
     modifiedStr = list(map(lambda x: '_' + x.lower() if x.isupper() else x, camel_case_str))
@@ -24,16 +34,151 @@ def dictToVectorStoreString(data: Dict[str, Any]) -> str:
     """
     return "\n".join(f"{camelCaseToText(key)}: {value}\n" for key, value in data.items() if value is not None) + '\n'
 
+# Relationships of an application, by the key they are returned under
+APPLICATION_RELATIONSHIPS = {
+    "education": Application.education,
+    "experiencedSkills": Application.skills,
+    "workExperiences": Application.workExperiences,
+    "projects": Application.projects,
+}
+
+def loadApplicationRelationships(sqlQuery, include: Optional[Iterable[str]] = None):
+    """
+    Load the included relationships (all by default) of the selected applications in bulk, with one SELECT ... IN query
+    per relationship instead of one lazy load per application and relationship. The other relationships aren't loaded.
+    """
+    include = APPLICATION_RELATIONSHIPS.keys() if include is None else include
+    for key, relationship in APPLICATION_RELATIONSHIPS.items():
+        sqlQuery = sqlQuery.options(selectinload(relationship) if key in include else noload(relationship))
+    return sqlQuery
+
+# Sort keys of each order of the application list (ending with the id, so the order is total) and whether they are descending
+APPLICATION_ORDERS = {
+    "name": ([Application.name, Application.id], False),
+    "nameDesc": ([Application.name, Application.id], True),
+    "id": ([Application.id], False),
+    "lastUpdated": ([Application.lastUpdated, Application.id], False),
+    "lastUpdatedDesc": ([Application.lastUpdated, Application.id], True),
+}
+DEFAULT_APPLICATION_ORDER = "lastUpdatedDesc"
+
+def keysetCondition(keys: List[Any], values: List[Any], after: bool):
+    """
+    (key1, key2, ...) > (value1, value2, ...) (or < if not after), expanded so the index on the keys can be used.
+    """
+    conditions = []
+    for i, key in enumerate(keys):
+        equalities = [keys[j] == values[j] for j in range(i)]
+        conditions.append(and_(*equalities, key > values[i] if after else key < values[i]))
+    return or_(*conditions)
+
+def cursorValue(key, value: Any) -> Any:
+    """
+    Convert a sort key value of a cursor to the type of its column (datetimes are ISO strings in the cursors).
+    Raise a ValueError if the value doesn't have the type of the column, e.g. in a tampered cursor.
+    """
+    if isinstance(key.type, DateTime):
+        if not isinstance(value, str):
+            raise ValueError("Invalid cursor.")
+        return datetime.fromisoformat(value)
+    expectedType = int if isinstance(key.type, Integer) else str
+    if not isinstance(value, expectedType) or isinstance(value, bool):
+        raise ValueError("Invalid cursor.")
+    return value
+
+# The conditions of the contact field filters are chosen by the shape of the searched value: exact or prefix matches
+# on the indexed lookup columns when possible, substring matches (full scans) otherwise.
+
+def prefixCondition(column, prefix: str):
+    # The pattern is a literal so the index on the column can be used
+    escapedPrefix = prefix.replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return column.like(f"{escapedPrefix}%", escape="/")
+
+def emailCondition(email: str):
+    normalizedEmail = normalizeEmail(email)
+    if isFullEmail(normalizedEmail):
+        return Application.emailNormalized == normalizedEmail
+    if isEmailDomain(normalizedEmail):
+        # A domain, or the beginning of a dotted local part (e.g. "john.doe")
+        return or_(prefixCondition(Application.emailReversed, normalizedEmail[::-1]),
+                   prefixCondition(Application.emailNormalized, normalizedEmail))
+    if "@" in normalizedEmail[1:]:
+        return prefixCondition(Application.emailNormalized, normalizedEmail)
+    return Application.emailNormalized.contains(normalizedEmail, autoescape=True)
+
+# Shortest number matched by its ending digits, shorter keywords are fragments matched anywhere in the numbers
+minPhoneSuffixLength = 7
+# Lengths of the country calling codes
+countryCodeLengths = (1, 2, 3)
+
+def phoneCondition(phone: str):
+    digits = normalizePhone(phone)
+    if not digits:
+        return Application.phone.ilike(f"%{phone}%")
+    nationalDigits = nationalPhoneDigits(phone)
+    if len(nationalDigits) < minPhoneSuffixLength:
+        return Application.phoneNormalized.contains(digits)
+    # The same digits, or the numbers ending with the national number (saved with or without the country code)
+    conditions = [prefixCondition(Application.phoneNormalized, digits),
+                  prefixCondition(Application.phoneReversed, nationalDigits[::-1])]
+    if phone.strip().startswith("+") or digits.startswith("00"):
+        # An international number also matches the numbers saved without its country code
+        nationalNumbers = [nationalDigits[length:][::-1] for length in countryCodeLengths
+                           if len(nationalDigits) - length >= minPhoneSuffixLength]
+        if nationalNumbers:
+            conditions.append(Application.phoneReversed.in_(nationalNumbers))
+    return or_(*conditions)
+
+def profileUrlCondition(column, normalizedColumn, url: str):
+    normalizedUrl = normalizeProfileUrl(url)
+    if normalizedUrl and hasUrlHost(normalizedUrl):
+        return prefixCondition(normalizedColumn, normalizedUrl)
+    return column.ilike(f"%{url}%")
+
+def textCondition(column, value: str, dialectName: str):
+    """
+    Full-text match of all the words (as prefixes) on MariaDB when they are long enough to be indexed, substring match otherwise.
+    """
+    words = fullTextWords(value)
+    if words and dialectName in ("mysql", "mariadb"):
+        return column.match(" ".join(f"+{word}*" for word in words))
+    return column.ilike(f"%{value}%")
+
+def experiencedSkillsCondition(skillRequirements: List[Tuple[List[int], float]]):
+    """
+    Applications having all the required skills (any of the skill ids of each requirement) with at least their years
+    of experience, as one GROUP BY HAVING query on the experienced skills using their (skill_id, yearsOfExperience) index.
+    """
+    if any(not skillIds for skillIds, _ in skillRequirements):
+        return false()
+    conditions = [
+        and_(ExperiencedSkill.skill_id.in_(skillIds), ExperiencedSkill.yearsOfExperience >= yearsOfExperience)
+        for skillIds, yearsOfExperience in skillRequirements
+    ]
+    applicationIds = select(ExperiencedSkill.application_id).where(or_(*conditions)).group_by(ExperiencedSkill.application_id)
+    if len(conditions) > 1:
+        applicationIds = applicationIds.having(and_(*[func.max(case((condition, 1), else_=0)) == 1 for condition in conditions]))
+    return Application.id.in_(applicationIds)
+
 settings = get_settings()
+# Cached application counts by database URL (without the driver, so the sync and async engines share it), shared by
+# the controllers (one is created per request)
+applicationCounts: Dict[str, CachedCount] = {}
+
 class DBController:
-    def __init__(self, sql_engine, vector_store):
+    def __init__(self, sql_engine, vector_store, async_sql_engine=None):
         self.sql_query = SqlQueryObject(Application, sql_engine)
         self.sql_engine = sql_engine
         self.vector_query = VectorQueryObject(Document, vector_store)
+        self.skillDictionary = SkillDictionary(sql_engine)
+        # Used by the async methods (a prefix), which don't block the event loop of the API routes
+        self.async_sql_engine = async_sql_engine
+        self.async_sql_query = AsyncSqlQueryObject(Application, async_sql_engine) if async_sql_engine is not None else None
 
     def processParsedCV(self, parsed_cv: ParsedCV):
         # Convert ParsedCV to Application schema
         vectorDbUuid = str(uuid.uuid4()) # UUID referencing the vector database document
+        skillIds = self.skillDictionary.getSkillIds(skill['skill'] for skill in parsed_cv.experiencedSkills)
         application = Application(
             vectorDbUuid=vectorDbUuid,
             name=parsed_cv.name,
@@ -54,6 +199,7 @@ class DBController:
             skills=[
                 ExperiencedSkill(
                     skill=skill['skill'],
+                    skill_id=skillIds.get(skillKey(skill['skill'])),
                     yearsOfExperience=skill['yearsOfExperience']
                 ) for skill in parsed_cv.experiencedSkills
             ],
@@ -83,6 +229,9 @@ class DBController:
                          f"Projects: \n{"".join([dictToVectorStoreString(project) for project in parsed_cv.projects])}\n",
             metadata={"application_id": application.id}
         )
+        if settings.application_summary_in_sql:
+            application.skillsAndExperience = skillsAndExperienceDocument.page_content
+        setLookupColumns(application)
         return application, skillsAndExperienceDocument
     
     def addApplication(self, parsed_cv: ParsedCV):
@@ -93,10 +242,44 @@ class DBController:
         
         # Add to Vector database
         skillsAndExperienceDocument.id = application.vectorDbUuid
+        skillsAndExperienceDocument.metadata = self._vectorMetadata(application)
         self.vector_query.add(skillsAndExperienceDocument, id=application.vectorDbUuid)
+        self._applicationCount(self.sql_engine).invalidate()
         
         return application.id
     
+    def addApplications(self, parsed_cvs: List[ParsedCV]) -> List[int]:
+        """
+        Add the applications of the parsed CVs in a single transaction with batched INSERTs,
+        and their vector documents in a single batched call (one embedding batch).
+        Returns the ids of the applications, in the same order as the parsed CVs.
+        """
+        if not parsed_cvs:
+            return []
+        # Add the new skills of the batch at once
+        self.skillDictionary.getSkillIds(skill['skill'] for parsed_cv in parsed_cvs for skill in parsed_cv.experiencedSkills)
+        processed = [self.processParsedCV(parsed_cv) for parsed_cv in parsed_cvs]
+        applications = [application for application, _ in processed]
+        documents = [document for _, document in processed]
+
+        with Session(self.sql_engine) as session:
+            self.sql_query.addMany(applications, [Education, ExperiencedSkill, WorkExperience, Project], session)
+            applicationIds = [application.id for application in applications]
+            vectorDbUuids = [application.vectorDbUuid for application in applications]
+            for document, application in zip(documents, applications):
+                document.id = application.vectorDbUuid
+                document.metadata = self._vectorMetadata(application)
+
+            # The vector documents are added before committing, so a failure doesn't leave applications without them
+            self.vector_query.addMany(documents, ids=vectorDbUuids)
+            try:
+                session.commit()
+            except Exception:
+                self.vector_query.engine.delete(vectorDbUuids)
+                raise
+        self._applicationCount(self.sql_engine).invalidate()
+        return applicationIds
+    
     def updateApplication(self, id: str, parsed_cv: ParsedCV):
         application, skillsAndExperienceDocument = self.processParsedCV(parsed_cv)
         application.id = id
@@ -107,30 +290,25 @@ class DBController:
             return None
         
         # Update in Vector database
+        skillsAndExperienceDocument.metadata = self._vectorMetadata(application)
         self.vector_query.update(application.vectorDbUuid, skillsAndExperienceDocument)
+        self._applicationCount(self.sql_engine).invalidate()
         
         return application.id
     
-    def getApplication(self, id: str):
+    def getApplication(self, id: str, include: Optional[Iterable[str]] = None):
         # Get from SQL database
         with Session(self.sql_engine) as session:
-            sqlQuery = select(Application).where(Application.id == id)
+            sqlQuery = loadApplicationRelationships(select(Application).where(Application.id == id), include)
             application = session.exec(sqlQuery).one_or_none()
 
             if not application:
                 return None
             
-            # Get from Vector database
-            vectorDoc = self.vector_query.selectByIds([application.vectorDbUuid])
+            # Get from Vector database (unless stored in SQL)
+            vectorDoc = self._getSummaryDocuments([application]).get(application.vectorDbUuid)
             
-            return {
-                "application": application,
-                "education": application.education if application.education else [],
-                "experiencedSkills": application.skills if application.skills else [],
-                "workExperiences": application.workExperiences if application.workExperiences else [],
-                "projects": application.projects if application.projects else [],
-                "skillsAndExperience": vectorDoc[0] if vectorDoc else None
-            }
+            return self._applicationToDict(application, vectorDoc, include)
     
     def deleteApplication(self, id: str):
         # Delete from SQL database
@@ -140,107 +318,328 @@ class DBController:
         
         # Delete from Vector database
         self.vector_query.delete(deleted_application.vectorDbUuid)
+        self._applicationCount(self.sql_engine).invalidate()
         
         return deleted_application
     
-    def searchApplications(self, query: SearchCVQuery, vectorSearchK: int = 20):
-        with Session(self.sql_engine) as session:
-            name = query.name
-            email = query.email
-            phone = query.phone
-            linkedIn = query.linkedIn
-            gitRepo = query.gitRepo
-            experiencedSkills = query.experiencedSkills
-
-            # Build SQL query
-            sqlQuery = select(Application)
-            if name:
-                sqlQuery = sqlQuery.where(Application.name.ilike(f"%{name}%"))
-            if email:
-                sqlQuery = sqlQuery.where(Application.email.ilike(f"%{email}%"))
-            if phone:
-                sqlQuery = sqlQuery.where(Application.phone.ilike(f"%{phone}%"))
-            if linkedIn:
-                sqlQuery = sqlQuery.where(Application.linkedIn.ilike(f"%{linkedIn}%"))
-            if gitRepo:
-                sqlQuery = sqlQuery.where(Application.gitRepo.ilike(f"%{gitRepo}%"))
-
-            if experiencedSkills:
-                for skill, experience in experiencedSkills.items():
-                    sqlQuery = sqlQuery.where(
-                        and_(
-                            ExperiencedSkill.skill.ilike(f"%{skill}%"),
-                            ExperiencedSkill.yearsOfExperience >= experience
-                        )
-                    )
-
-            # Search in vector database
-            keywords: List[str] = query.keywords
-            skills: List[str] = query.skills
-            jobTitles: List[str] = query.jobTitles
-            location = query.location
-            requirementDescription = query.requirementDescription
-
-            vectorQuery = ("Keywords: " + ", ".join(keywords) + "\n") if (keywords != None and keywords != []) else "" + \
-                          ("Skills: " + ", ".join(skills) + "\n") if (skills != None and skills != []) else "" + \
-                          ("Job Titles: " + ", ".join(jobTitles) + "\n") if (jobTitles != None and jobTitles != []) else "" + \
-                          "Address: " + (location if location else "") + "\n" + \
-                          "Description: " + (requirementDescription if requirementDescription else "")
-            
-            vectorDocs = self.vector_query.select(query=vectorQuery, k=vectorSearchK)
-            documentIds = [doc.id for doc in vectorDocs if doc.id]
+    def _getSummaryDocuments(self, applications: List[Application]) -> Dict[str, Document]:
+        """
+        Get the skills and experience documents of the applications by their vectorDbUuid: built from SQL when the summary
+        is stored there, and the others fetched from the vector database in a single call.
+        """
+        documents = {}
+        missingIds = []
+        for application in applications:
+            if application.skillsAndExperience is not None:
+                documents[application.vectorDbUuid] = Document(
+                    id=application.vectorDbUuid,
+                    page_content=application.skillsAndExperience,
+                    metadata={"application_id": application.id}
+                )
+            else:
+                missingIds.append(application.vectorDbUuid)
+        if missingIds:
+            for document in self.vector_query.selectByIds(missingIds):
+                documents[document.id] = document
+        return documents
 
-            if documentIds:
-                sqlQuery = sqlQuery.where(Application.vectorDbUuid.in_(documentIds))
+    def _applicationToDict(self, application: Application, skillsAndExperience, include: Optional[Iterable[str]] = None):
+        applicationDict = { "application": application }
+        for key, relationship in APPLICATION_RELATIONSHIPS.items():
+            if include is None or key in include:
+                applicationDict[key] = getattr(application, relationship.key) or []
+        applicationDict["skillsAndExperience"] = skillsAndExperience
+        return applicationDict
 
-            results = session.exec(sqlQuery).all()
-            applications = []
+    def _getSkillRequirements(self, experiencedSkills: Optional[Dict[str, float]]) -> List[Tuple[List[int], float]]:
+        """
+        Resolve the searched experienced skills to the ids of their canonical skills, with the minimum years of experience.
+        """
+        return [(self.skillDictionary.findSkillIds(skill), experience) for skill, experience in (experiencedSkills or {}).items()]
 
-            for application in results:
-                correspondingExperiencedDoc = next(filter(
-                    lambda doc: doc.id == application.vectorDbUuid,
-                    vectorDocs
-                ), None)
-                education = application.education if application.education else []
-                experiencedSkills = application.skills if application.skills else []
-                applications.append({
-                    "application": application,
-                    "education": education,
-                    "experiencedSkills": experiencedSkills,
-                    "workExperiences": application.workExperiences if application.workExperiences else [],
-                    "projects": application.projects if application.projects else [],
-                    "skillsAndExperience": correspondingExperiencedDoc.page_content if correspondingExperiencedDoc else None
-                })
+    def _buildSearchQueries(self, query: SearchCVQuery, dialectName: str, skillRequirements: List[Tuple[List[int], float]]):
+        """
+        Build the SQL query (without the vector documents filter) and the vector store query text of a search.
+        """
+        name = query.name
+        email = query.email
+        phone = query.phone
+        linkedIn = query.linkedIn
+        gitRepo = query.gitRepo
+        address = query.address
+
+        # Build SQL query
+        sqlQuery = select(Application)
+        if name:
+            sqlQuery = sqlQuery.where(textCondition(Application.name, name, dialectName))
+        if email:
+            sqlQuery = sqlQuery.where(emailCondition(email))
+        if phone:
+            sqlQuery = sqlQuery.where(phoneCondition(phone))
+        if linkedIn:
+            sqlQuery = sqlQuery.where(profileUrlCondition(Application.linkedIn, Application.linkedInNormalized, linkedIn))
+        if gitRepo:
+            sqlQuery = sqlQuery.where(profileUrlCondition(Application.gitRepo, Application.gitRepoNormalized, gitRepo))
+        if address:
+            sqlQuery = sqlQuery.where(textCondition(Application.address, address, dialectName))
+
+        if skillRequirements:
+            sqlQuery = sqlQuery.where(experiencedSkillsCondition(skillRequirements))
+
+        # Search in vector database
+        keywords: List[str] = query.keywords
+        skills: List[str] = query.skills
+        jobTitles: List[str] = query.jobTitles
+        location = query.location
+        requirementDescription = query.requirementDescription
+
+        vectorQuery = ("Keywords: " + ", ".join(keywords) + "\n") if (keywords != None and keywords != []) else "" + \
+                      ("Skills: " + ", ".join(skills) + "\n") if (skills != None and skills != []) else "" + \
+                      ("Job Titles: " + ", ".join(jobTitles) + "\n") if (jobTitles != None and jobTitles != []) else "" + \
+                      "Address: " + (location if location else "") + "\n" + \
+                      "Description: " + (requirementDescription if requirementDescription else "")
+        return sqlQuery, vectorQuery
+
+    def _vectorMetadata(self, application: Application) -> Dict[str, Any]:
+        """
+        Metadata of the vector document of an application: its id and its filterable lookup fields.
+        Chroma doesn't accept None values, the missing fields are left out.
+        """
+        metadata = {
+            "application_id": int(application.id) if application.id is not None else None,
+            "name": application.name,
+            "email": application.emailNormalized,
+            "phone": application.phoneNormalized,
+            "linkedIn": application.linkedInNormalized,
+            "gitRepo": application.gitRepoNormalized,
+        }
+        return { key: value for key, value in metadata.items() if value is not None }
+
+    def _candidateIdsQuery(self, sqlQuery):
+        # One more candidate than the SQL first limit tells whether the filters are selective enough
+        return sqlQuery.with_only_columns(Application.id).limit(settings.search_sql_first_max_candidates + 1)
+
+    def _documentsCondition(self, vectorDocs: List[Document]):
+        return Application.vectorDbUuid.in_([doc.id for doc in vectorDocs if doc.id])
+
+    def _matchingDocumentIdsQuery(self, sqlQuery, vectorDocs: List[Document]):
+        return sqlQuery.with_only_columns(Application.vectorDbUuid).where(self._documentsCondition(vectorDocs))
+
+    def _searchVectors(self, vectorQuery: str, k: int, candidateIds: Optional[List[int]] = None) -> List[Document]:
+        vectorFilter = { "application_id": { "$in": list(candidateIds) } } if candidateIds is not None else None
+        return self.vector_query.select(query=vectorQuery, k=k, filter=vectorFilter)
+
+    def _searchCandidates(self, vectorQuery: str, vectorSearchK: int, candidateIds: List[int]) -> Optional[List[Document]]:
+        """
+        SQL first search: rank only the candidate applications of the SQL filters, by filtering the vector search on their ids
+        (the application id metadata, added to the documents of previous versions by schema.InitDB.backfillVectorApplicationIds).
+        Returns None if there are too many candidates, or if fewer documents than k and than the candidates are found (e.g.
+        documents not backfilled yet), they are searched vector first instead.
+        """
+        if len(candidateIds) > settings.search_sql_first_max_candidates:
+            return None
+        if not candidateIds:
+            return []
+        vectorDocs = self._searchVectors(vectorQuery, vectorSearchK, candidateIds)
+        if len(vectorDocs) < min(vectorSearchK, len(candidateIds)):
+            return None
+        return vectorDocs
+
+    def _nextVectorSearchK(self, k: int, vectorDocCount: int, matchingCount: int, vectorSearchK: int) -> Optional[int]:
+        """
+        Vector first search: the next k to search with if too few of the nearest documents passed the SQL filters,
+        None once there are enough, the vector store has no more documents or the maximum k is reached.
+        """
+        maxK = max(settings.search_vector_max_k, vectorSearchK)
+        if matchingCount >= vectorSearchK or vectorDocCount < k or k >= maxK:
+            return None
+        return min(k * 4, maxK)
+
+    def _searchResults(self, results: List[Application], vectorDocs: List[Document], include: Optional[Iterable[str]] = None):
+        # In the order of the vector search
+        ranks = { doc.id: rank for rank, doc in enumerate(vectorDocs) }
+        vectorDocsById = { doc.id: doc for doc in vectorDocs }
+        applications = []
+        for application in sorted(results, key=lambda application: ranks.get(application.vectorDbUuid, len(ranks))):
+            correspondingExperiencedDoc = vectorDocsById.get(application.vectorDbUuid)
+            applications.append(self._applicationToDict(
+                application, correspondingExperiencedDoc.page_content if correspondingExperiencedDoc else None, include
+            ))
+        return applications
+
+    def _buildPageQuery(self, page: int, pageSize: int, orderBy: str, cursor: Optional[str]):
+        """
+        Build the query of a page of applications: with OFFSET without a cursor, or continuing from the row of the cursor
+        (keyset pagination, so deep pages are as fast as the first one). One more row than the page size is selected,
+        to know whether there is a page after it. Return the query, the order and the direction of the page.
+        Raise a ValueError if the cursor is invalid or was created for another order.
+        """
+        orderBy = orderBy if orderBy in APPLICATION_ORDERS else DEFAULT_APPLICATION_ORDER
+        keys, descending = APPLICATION_ORDERS[orderBy]
+        sqlQuery = select(Application)
+        direction = "next"
+        if cursor is None:
+            sqlQuery = sqlQuery.offset((page - 1) * pageSize)
+        else:
+            cursorOrderBy, values, direction = decodeCursor(cursor)
+            if cursorOrderBy != orderBy or len(values) != len(keys):
+                raise ValueError("The cursor was created for another order.")
+            values = [cursorValue(key, value) for key, value in zip(keys, values)]
+            sqlQuery = sqlQuery.where(keysetCondition(keys, values, after=(direction == "next") != descending))
+
+        # The previous page is selected in reverse order, from the row of the cursor
+        reverse = direction == "prev"
+        sqlQuery = sqlQuery.order_by(*[key.desc() if descending != reverse else key.asc() for key in keys]).limit(pageSize + 1)
+        return sqlQuery, orderBy, direction
+
+    def _pageCursors(self, results: List[Application], pageSize: int, orderBy: str, direction: str, isFirstPage: bool):
+        """
+        Return the applications of a page selected with _buildPageQuery, and the cursors of the next and previous pages.
+        """
+        hasMore = len(results) > pageSize
+        results = list(results[:pageSize])
+        if direction == "prev":
+            results.reverse()
+        hasNext = hasMore if direction == "next" else True
+        hasPrevious = not isFirstPage if direction == "next" else hasMore
+
+        keys, _ = APPLICATION_ORDERS[orderBy]
+        keyValues = lambda application: [getattr(application, key.key) for key in keys]
+        nextCursor = encodeCursor(orderBy, keyValues(results[-1]), "next") if results and hasNext else None
+        previousCursor = encodeCursor(orderBy, keyValues(results[0]), "prev") if results and hasPrevious else None
+        return results, nextCursor, previousCursor
+
+    def _countStatement(self, engine):
+        if settings.application_count_approximate and engine.dialect.name in ("mysql", "mariadb"):
+            # Estimate from the table statistics: InnoDB doesn't keep an exact row count, COUNT scans a whole index
+            return text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tableName"
+            ).bindparams(tableName=Application.__tablename__)
+        return select(func.count(Application.id))
+
+    def _applicationCount(self, engine) -> CachedCount:
+        databaseUrl = str(engine.url.set(drivername=engine.url.get_backend_name()))
+        return applicationCounts.setdefault(databaseUrl, CachedCount(settings.application_count_cache_seconds))
+
+    def countApplications(self) -> int:
+        with self.sql_engine.connect() as connection:
+            return connection.execute(self._countStatement(self.sql_engine)).scalar_one() or 0
+
+    async def acountApplications(self) -> int:
+        async with self.async_sql_engine.connect() as connection:
+            return (await connection.execute(self._countStatement(self.async_sql_engine))).scalar_one() or 0
+
+    def searchApplications(self, query: SearchCVQuery, vectorSearchK: int = 20, include: Optional[Iterable[str]] = None):
+        """
+        Search the applications matching the SQL filters of the query, ranked by vector similarity.
+        With selective filters (few candidates) the candidate ids filter the vector search (SQL first), otherwise k is
+        expanded until enough of the nearest documents pass the SQL filters (vector first).
+        """
+        with Session(self.sql_engine) as session:
+            sqlQuery, vectorQuery = self._buildSearchQueries(query, self.sql_engine.dialect.name,
+                                                             self._getSkillRequirements(query.experiencedSkills))
+            hasFilters = sqlQuery.whereclause is not None
+            vectorDocs = None
+            if hasFilters:
+                candidateIds = session.exec(self._candidateIdsQuery(sqlQuery)).all()
+                vectorDocs = self._searchCandidates(vectorQuery, vectorSearchK, candidateIds)
+
+            k = vectorSearchK
+            while vectorDocs is None:
+                nearestDocs = self._searchVectors(vectorQuery, k)
+                matchingIds = set(session.exec(self._matchingDocumentIdsQuery(sqlQuery, nearestDocs)).all()) if hasFilters else None
+                matchingDocs = [doc for doc in nearestDocs if doc.id and (matchingIds is None or doc.id in matchingIds)]
+                k = self._nextVectorSearchK(k, len(nearestDocs), len(matchingDocs), vectorSearchK)
+                if k is None:
+                    vectorDocs = matchingDocs
+
+            vectorDocs = vectorDocs[:vectorSearchK]
+            sqlQuery = sqlQuery.where(self._documentsCondition(vectorDocs))
+            results = session.exec(loadApplicationRelationships(sqlQuery, include)).all()
+            applications = self._searchResults(results, vectorDocs, include)
         return applications
     
-    def getAllApplications(self, page: int = 1, pageSize: int = 10, orderBy: str = "lastUpdated"):
+    def getAllApplications(self, page: int = 1, pageSize: int = 10, orderBy: str = "lastUpdated", include: Optional[Iterable[str]] = None,
+                           cursor: Optional[str] = None):
         
         with Session(self.sql_engine) as session:
-            offset = (page - 1) * pageSize
-            sqlQuery = select(Application).offset(offset).limit(pageSize)
-            if orderBy == "name":
-                sqlQuery = sqlQuery.order_by(Application.name.asc())
-            elif orderBy == "nameDesc":
-                sqlQuery = sqlQuery.order_by(Application.name.desc())
-            elif orderBy == "id":
-                sqlQuery = sqlQuery.order_by(Application.id.asc())
-            elif orderBy == "lastUpdated":
-                sqlQuery = sqlQuery.order_by(Application.lastUpdated.asc())
-            else: # Default to lastUpdated descending
-                sqlQuery = sqlQuery.order_by(Application.lastUpdated.desc())
-
-            results = session.exec(sqlQuery).all()
-            totalPages = (session.exec(select(func.count(Application.id))).one() + pageSize - 1) // pageSize
+            sqlQuery, orderBy, direction = self._buildPageQuery(page, pageSize, orderBy, cursor)
+
+            results = session.exec(loadApplicationRelationships(sqlQuery, include)).all()
+            results, nextCursor, previousCursor = self._pageCursors(results, pageSize, orderBy, direction, cursor is None and page == 1)
+            totalPages = (self._applicationCount(self.sql_engine).get(self.countApplications) + pageSize - 1) // pageSize
+            vectorDocs = self._getSummaryDocuments(results)
             applications = []
 
             for application in results:
-                vectorDoc = self.vector_query.selectByIds([application.vectorDbUuid])
-                applications.append({
-                    "application": application,
-                    "education": application.education if application.education else [],
-                    "experiencedSkills": application.skills if application.skills else [],
-                    "workExperiences": application.workExperiences if application.workExperiences else [],
-                    "projects": application.projects if application.projects else [],
-                    "skillsAndExperience": vectorDoc[0].page_content if vectorDoc else None
-                })
-        return { 'pageCount': totalPages, 'applications': applications }
+                vectorDoc = vectorDocs.get(application.vectorDbUuid)
+                applications.append(self._applicationToDict(application, vectorDoc.page_content if vectorDoc else None, include))
+        return { 'pageCount': totalPages, 'applications': applications, 'nextCursor': nextCursor, 'prevCursor': previousCursor }
+
+    # Async versions used by the API routes. The SQL queries run on the async engine, the relationships can't be lazy loaded
+    # in async sessions so they are always loaded in bulk. The vector store has no async client, its calls run in a thread.
+
+    async def agetApplication(self, id: str, include: Optional[Iterable[str]] = None):
+        # Get from SQL database
+        async with AsyncSession(self.async_sql_engine, expire_on_commit=False) as session:
+            sqlQuery = loadApplicationRelationships(select(Application).where(Application.id == id), include)
+            application = (await session.exec(sqlQuery)).one_or_none()
+        if not application:
+            return None
+
+        # Get from Vector database (unless stored in SQL)
+        vectorDocs = await asyncio.to_thread(self._getSummaryDocuments, [application])
+        return self._applicationToDict(application, vectorDocs.get(application.vectorDbUuid), include)
+
+    async def adeleteApplication(self, id: str):
+        # Delete from SQL database
+        deleted_application = await self.async_sql_query.delete(id)
+        if not deleted_application:
+            return None
+
+        # Delete from Vector database
+        await asyncio.to_thread(self.vector_query.delete, deleted_application.vectorDbUuid)
+        self._applicationCount(self.async_sql_engine).invalidate()
+
+        return deleted_application
+
+    async def asearchApplications(self, query: SearchCVQuery, vectorSearchK: int = 20, include: Optional[Iterable[str]] = None):
+        skillRequirements = await asyncio.to_thread(self._getSkillRequirements, query.experiencedSkills)
+        sqlQuery, vectorQuery = self._buildSearchQueries(query, self.async_sql_engine.dialect.name, skillRequirements)
+        hasFilters = sqlQuery.whereclause is not None
+
+        async with AsyncSession(self.async_sql_engine, expire_on_commit=False) as session:
+            vectorDocs = None
+            if hasFilters:
+                candidateIds = (await session.exec(self._candidateIdsQuery(sqlQuery))).all()
+                vectorDocs = await asyncio.to_thread(self._searchCandidates, vectorQuery, vectorSearchK, candidateIds)
+
+            k = vectorSearchK
+            while vectorDocs is None:
+                nearestDocs = await asyncio.to_thread(self._searchVectors, vectorQuery, k)
+                matchingIds = set((await session.exec(self._matchingDocumentIdsQuery(sqlQuery, nearestDocs))).all()) if hasFilters else None
+                matchingDocs = [doc for doc in nearestDocs if doc.id and (matchingIds is None or doc.id in matchingIds)]
+                k = self._nextVectorSearchK(k, len(nearestDocs), len(matchingDocs), vectorSearchK)
+                if k is None:
+                    vectorDocs = matchingDocs
+
+            vectorDocs = vectorDocs[:vectorSearchK]
+            sqlQuery = sqlQuery.where(self._documentsCondition(vectorDocs))
+            results = (await session.exec(loadApplicationRelationships(sqlQuery, include))).all()
+        return self._searchResults(results, vectorDocs, include)
+
+    async def agetAllApplications(self, page: int = 1, pageSize: int = 10, orderBy: str = "lastUpdated", include: Optional[Iterable[str]] = None,
+                                  cursor: Optional[str] = None):
+        sqlQuery, orderBy, direction = self._buildPageQuery(page, pageSize, orderBy, cursor)
+
+        async with AsyncSession(self.async_sql_engine, expire_on_commit=False) as session:
+            results = (await session.exec(loadApplicationRelationships(sqlQuery, include))).all()
+        results, nextCursor, previousCursor = self._pageCursors(results, pageSize, orderBy, direction, cursor is None and page == 1)
+        totalPages = (await self._applicationCount(self.async_sql_engine).aget(self.acountApplications) + pageSize - 1) // pageSize
+
+        vectorDocs = await asyncio.to_thread(self._getSummaryDocuments, results)
+        applications = []
+        for application in results:
+            vectorDoc = vectorDocs.get(application.vectorDbUuid)
+            applications.append(self._applicationToDict(application, vectorDoc.page_content if vectorDoc else None, include))
+        return { 'pageCount': totalPages, 'applications': applications, 'nextCursor': nextCursor, 'prevCursor': previousCursor }
@@ -1,21 +1,53 @@
-from modules.parse_cv.ParseCVFiles import parseCVs
+from modules.parse_cv.ParseCVFiles import parseCVs, streamParseCVs
 from modules.read_cv_directory.CVProcessor import CVProcessor
+from modules.read_cv_directory.CVFileStore import CVFileStore
+from modules.read_cv_directory.CVDirectoryManifest import CVDirectoryManifest
 from shared.QueryObject import SearchCVQuery
+from langchain_core.documents import Document
 
-from controller.DBController import DBController
+from controller.DBController import DBController, APPLICATION_RELATIONSHIPS
 from fastapi import APIRouter, HTTPException, Depends
 from schema.InitDB import SessionDep
 
-from typing import Annotated, List, Union, Any
+from typing import Annotated, Dict, List, Union, Any
 from pydantic import BaseModel
 from fastapi import Request, UploadFile, File
 from pathvalidate import sanitize_filename
-import os, uuid, datetime, re
+from shared.StreamingPipeline import bufferedStage, chunked
+from settings import get_settings
+import os, uuid, datetime, re, shutil, threading
+
+settings = get_settings()
+
+# The file stores and directory manifests by path, created on first use and shared by the controllers
+# (a controller is created for each request)
+_fileStores: Dict[str, CVFileStore] = {}
+_directoryManifests: Dict[str, CVDirectoryManifest] = {}
+_sharedStoresLock = threading.Lock()
 
 class ProcessCVController:
-    def __init__(self, sqlEngine, vectorStore, baseCVStoragePath: str = 'cv_storage'):
+    def __init__(self, sqlEngine, vectorStore, baseCVStoragePath: str = 'cv_storage', asyncSqlEngine=None):
         self.baseCVStoragePath = baseCVStoragePath
-        self.dbController = DBController(sqlEngine, vectorStore)
+        self.dbController = DBController(sqlEngine, vectorStore, asyncSqlEngine)
+        # Uploaded and downloaded files are moved to the content addressed store, their upload folders are only staging folders
+        self.fileStorePath = os.path.join(baseCVStoragePath, 'store') if settings.cv_file_store_enabled else None
+        self.directoryManifestPath = os.path.join(baseCVStoragePath, 'cv_directory_manifest.sqlite3')
+
+    @property
+    def fileStore(self) -> CVFileStore | None:
+        if self.fileStorePath is None:
+            return None
+        with _sharedStoresLock:
+            if self.fileStorePath not in _fileStores:
+                _fileStores[self.fileStorePath] = CVFileStore(self.fileStorePath)
+            return _fileStores[self.fileStorePath]
+
+    @property
+    def directoryManifest(self) -> CVDirectoryManifest:
+        with _sharedStoresLock:
+            if self.directoryManifestPath not in _directoryManifests:
+                _directoryManifests[self.directoryManifestPath] = CVDirectoryManifest(self.directoryManifestPath)
+            return _directoryManifests[self.directoryManifestPath]
 
     def _generateDownloadFolder(self, isGoogleDrive: bool = False) -> str:
         """
@@ -25,8 +57,37 @@ class ProcessCVController:
         folder_path = os.path.join(self.baseCVStoragePath, folder_name)
         return folder_path
     
+    def _createCVProcessor(self, gDriveUrlOrDirectory: str, downloadFolder: str) -> CVProcessor:
+        return CVProcessor(gDriveUrlOrDirectory, downloadFolder, fileStore=self.fileStore,
+                           uploadName=os.path.basename(downloadFolder), moveFilesIntoStore=True)
+
+    def _removeStagingFolder(self, downloadFolder: str):
+        if self.fileStorePath is not None:
+            shutil.rmtree(downloadFolder, ignore_errors=True)
+
+    def _iterCVDocuments(self, cvProcessors: List[CVProcessor]):
+        for cvProcessor in cvProcessors:
+            yield from cvProcessor.iterCVDocuments()
+
+    def _addUnparsedFile(self, document: Document, failedFiles: List[dict]):
+        fileName = document.metadata.get('file_name') or os.path.basename(document.metadata.get('source', ''))
+        failedFiles.append({ 'file_name': fileName, 'error': "The CV could not be parsed." })
+
+    def _skipUnparsedCVs(self, documents: List[Document], indexedParsedCVs, failedFiles: List[dict]):
+        """
+        Yield the parsed CVs of (document index, parsed CV or None) pairs, adding the files of the CVs that couldn't be
+        parsed to failedFiles.
+        """
+        for i, parsedCV in indexedParsedCVs:
+            if parsedCV is None:
+                self._addUnparsedFile(documents[i], failedFiles)
+            else:
+                yield parsedCV
+
     def addCVFiles(self, googleDriveUrl: str | None = None, files: Union[UploadFile, List[UploadFile]] | None = None):
-        documents = []
+        cvProcessors = []
+        failedFiles = []
+        normalizationStats = { 'characters_before': 0, 'characters_after': 0, 'estimated_tokens_saved': 0 }
         if not googleDriveUrl and not files:
             raise HTTPException(status_code=400, detail="No CV files or Google Drive link provided.")
         
@@ -36,36 +97,100 @@ class ProcessCVController:
         
         if isGoogleDriveUrl:
             # Process Google Drive link
-            cvProcessor = CVProcessor(googleDriveUrl, self._generateDownloadFolder(True))
-            documents.extend(cvProcessor.processCVFiles())
+            cvProcessors.append(self._createCVProcessor(googleDriveUrl, self._generateDownloadFolder(True)))
 
         if files != None and isinstance(files, UploadFile):
             files = [files]  # Ensure files is a list if a single file is provided
 
         if files != None:
             # Process uploaded files
-            documents = []
             downloadPath = self._generateDownloadFolder()
             os.makedirs(downloadPath, exist_ok=True)
             for file in files:
                 fileName = sanitize_filename(file.filename)
                 filePath = os.path.join(downloadPath, fileName)
                 with open(filePath, "wb") as f:
-                    f.write(file.file.read())
-            cvProcessor = CVProcessor(downloadPath, self.baseCVStoragePath)
-            documents.extend(cvProcessor.processCVFiles())
-        
-        if not documents:
-            raise HTTPException(status_code=400, detail="No valid CV files found.")
-        
-        parsed_cvs = parseCVs(documents)
+                    shutil.copyfileobj(file.file, f)
+            cvProcessors.append(self._createCVProcessor(downloadPath, downloadPath))
+
+        # Streaming pipeline: the files are extracted in the background while the CVs extracted so far are parsed
+        # and saved chunk by chunk, so only a bounded number of documents and parsed CVs is held in memory.
+        documents = bufferedStage(self._iterCVDocuments(cvProcessors), settings.cv_ingestion_buffer_size)
+        documentCount = 0
         application_ids = []
-        for parsed_cv in parsed_cvs:
-            application_id = self.dbController.addApplication(parsed_cv)
-            application_ids.append(application_id)
+        for documentChunk in chunked(documents, settings.cv_ingestion_chunk_size):
+            documentCount += len(documentChunk)
+            # When streaming, the applicants are saved (and searchable) as soon as a batch of CVs is parsed
+            if settings.cv_parsing_streaming:
+                indexedParsedCVs = streamParseCVs(documentChunk, keepUnparsed=True)
+            else:
+                indexedParsedCVs = enumerate(parseCVs(documentChunk, keepUnparsed=True))
+            parsed_cvs = self._skipUnparsedCVs(documentChunk, indexedParsedCVs, failedFiles)
+            # Saved in batches: one transaction and one embedding batch for each
+            for parsedCVBatch in chunked(parsed_cvs, settings.cv_db_insert_batch_size):
+                application_ids.extend(self.dbController.addApplications(parsedCVBatch))
+
+        for cvProcessor in cvProcessors:
+            self._removeStagingFolder(cvProcessor.gDriveSavePath)
+            failedFiles.extend(cvProcessor.failedFiles)
+            for key, value in cvProcessor.getNormalizationStats().items():
+                normalizationStats[key] += value
+
+        if documentCount == 0:
+            raise HTTPException(status_code=400, detail="No valid CV files found.")
         
-        return {"application_ids": application_ids, "message": f"Successfully added {len(application_ids)} applications."}
+        return {"application_ids": application_ids, "failed_files": failedFiles, "normalization": normalizationStats, "message": f"Successfully added {len(application_ids)} applications."}
     
+    def syncCVDirectory(self, directory: str, removeDeleted: bool = False):
+        """
+        Incrementally ingest a directory (and its subdirectories): only the files that are new or changed since the last sync
+        are extracted and parsed, and the applications of changed files are updated instead of added again.
+        Deleted files are reported, and with removeDeleted their applications are deleted.
+        """
+        changes = self.directoryManifest.scan(directory)
+        changedFiles = { changedFile['path']: changedFile for changedFile in changes['changed'] }
+        # The files are read in place: they are not copied to the file store, and the directory is the save path
+        # so no download folder is created
+        cvProcessor = CVProcessor(directory, savePath=directory, filePaths=list(changedFiles))
+
+        added_application_ids = []
+        updated_application_ids = []
+        documents = bufferedStage(cvProcessor.iterCVDocuments(), settings.cv_ingestion_buffer_size)
+        for documentChunk in chunked(documents, settings.cv_ingestion_chunk_size):
+            # Keep the unparsed CVs so each parsed CV lines up with its file, unparsed files are retried on the next sync
+            parsed_cvs = parseCVs(documentChunk, keepUnparsed=True)
+            for document, parsed_cv in zip(documentChunk, parsed_cvs):
+                if parsed_cv is None:
+                    self._addUnparsedFile(document, cvProcessor.failedFiles)
+                    continue
+                changedFile = changedFiles[document.metadata['source']]
+                application_id = None
+                if changedFile['applicationId'] is not None:
+                    application_id = self.dbController.updateApplication(changedFile['applicationId'], parsed_cv)
+                if application_id is not None:
+                    updated_application_ids.append(application_id)
+                else:
+                    application_id = self.dbController.addApplication(parsed_cv)
+                    added_application_ids.append(application_id)
+                self.directoryManifest.recordFile(directory, changedFile, application_id)
+
+        deletedFiles = changes['deleted']
+        if removeDeleted and deletedFiles:
+            for deletedFile in deletedFiles:
+                if deletedFile['applicationId'] is not None:
+                    self.dbController.deleteApplication(deletedFile['applicationId'])
+            self.directoryManifest.removeFiles([deletedFile['path'] for deletedFile in deletedFiles])
+
+        return {
+            "added_application_ids": added_application_ids,
+            "updated_application_ids": updated_application_ids,
+            "deleted_files": [{ "path": deletedFile['path'], "application_id": deletedFile['applicationId'], "removed": removeDeleted,
+                                "new": deletedFile['new'] } for deletedFile in deletedFiles],
+            "failed_files": cvProcessor.failedFiles,
+            "unchanged_file_count": changes['unchangedCount'],
+            "message": f"Added {len(added_application_ids)} and updated {len(updated_application_ids)} applications."
+        }
+
     def updateCVFile(self, id: int, googleDriveUrl: str | None = None, file: UploadFile | None = None):
         documents = []
         if not googleDriveUrl and not file:
@@ -81,8 +206,9 @@ class ProcessCVController:
             if not re.match(r"https?://(?:drive)\.google\.com/[^\s]+", googleDriveUrl):
                 raise HTTPException(status_code=400, detail="Invalid Google Drive link provided. We don't support other cloud storage providers yet.")
             
-            cvProcessor = CVProcessor(googleDriveUrl, self._generateDownloadFolder(True))
+            cvProcessor = self._createCVProcessor(googleDriveUrl, self._generateDownloadFolder(True))
             documents.extend(cvProcessor.processCVFiles())
+            self._removeStagingFolder(cvProcessor.gDriveSavePath)
         
 
         if file != None:
@@ -94,8 +220,9 @@ class ProcessCVController:
             filePath = os.path.join(downloadPath, fileName)
             with open(filePath, "wb") as f:
                 f.write(file.file.read())
-            cvProcessor = CVProcessor(downloadPath, self.baseCVStoragePath)
+            cvProcessor = self._createCVProcessor(downloadPath, downloadPath)
             documents.extend(cvProcessor.processCVFiles())
+            self._removeStagingFolder(downloadPath)
         
         if not documents:
             raise HTTPException(status_code=400, detail="No valid CV files found.")
@@ -106,42 +233,53 @@ class ProcessCVController:
             raise HTTPException(status_code=404, detail="Application not found. Cannot update application.")
         return {"application_ids": application_id, "message": f"Successfully updated application with id {application_id}."}
     
-    def getApplication(self, id: int):
-        application = self.dbController.getApplication(id)
+    def _parseInclude(self, include: str | None) -> List[str] | None:
+        """
+        Parse the comma separated relationships to return with the applications, None returns all of them.
+        """
+        if include is None:
+            return None
+        relationships = [relationship.strip() for relationship in include.split(',') if relationship.strip()]
+        unknownRelationships = [relationship for relationship in relationships if relationship not in APPLICATION_RELATIONSHIPS]
+        if unknownRelationships:
+            raise HTTPException(status_code=422, detail=f"Unknown relationships: {', '.join(unknownRelationships)}. "
+                                                        f"Valid relationships are {', '.join(APPLICATION_RELATIONSHIPS)}.")
+        return relationships
+
+    async def getApplication(self, id: int, include: str | None = None):
+        application = await self.dbController.agetApplication(id, self._parseInclude(include))
         if not application:
             raise HTTPException(status_code=404, detail="Application not found.")
         
-        return {
-            "application": application["application"],
-            "education": application["education"],
-            "experiencedSkills": application["experiencedSkills"],
-            "workExperiences": application["workExperiences"],
-            "projects": application["projects"],
-            "skillsAndExperience": application["skillsAndExperience"]
-        }
+        return application
     
-    def deleteApplication(self, id: int):
-        deleted_application = self.dbController.deleteApplication(id)
+    async def deleteApplication(self, id: int):
+        deleted_application = await self.dbController.adeleteApplication(id)
         if not deleted_application:
             raise HTTPException(status_code=404, detail="Application not found.")
         
         return {"message": "Application deleted successfully.", "application_id": deleted_application.id}
     
-    def searchApplications(self, query: SearchCVQuery, vectorSearchK: int = 20):
-        applications = self.dbController.searchApplications(query, vectorSearchK)
+    async def searchApplications(self, query: SearchCVQuery, vectorSearchK: int = 20, include: str | None = None):
+        applications = await self.dbController.asearchApplications(query, vectorSearchK, self._parseInclude(include))
         if not applications:
             raise HTTPException(status_code=404, detail="No applications found matching the search criteria.")
         
         return applications
     
-    def getApplications(self, page: int = 1, pageSize: int = 10, orderBy: str = None):
+    async def getApplications(self, page: int = 1, pageSize: int = 10, orderBy: str = None, include: str | None = None, cursor: str | None = None):
         """
         Get paginated list of applications.
         orderBy can be 'name', 'nameDesc', 'id', 'lastUpdated' (lastUpdated ascending), default sorting by 'lastUpdated' descending.
+        include is the comma separated relationships to return with the applications, by default all of them.
+        cursor is the nextCursor or prevCursor of a page of the same order, it replaces page.
         """
         if page < 1 or pageSize < 1:
             raise HTTPException(status_code=422, detail="Page and page size must be greater than 0.")
-        applications = self.dbController.getAllApplications(page, pageSize, orderBy)
+        try:
+            applications = await self.dbController.agetAllApplications(page, pageSize, orderBy, self._parseInclude(include), cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
         if not applications:
             raise HTTPException(status_code=404, detail="No applications found.")
         
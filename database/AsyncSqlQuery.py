@@ -0,0 +1,81 @@
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Any
+from database.BaseQuery import BaseQueryObject
+
+class AsyncSqlQueryObject(BaseQueryObject):
+    """
+    Async version of SqlQueryObject, running on an AsyncEngine so the database round trips don't block the event loop.
+    Relationships can't be lazy loaded in async sessions, so the selected objects have all their relationships loaded
+    (with one SELECT ... IN query per relationship).
+    """
+    def __init__(self, schema_class, engine):
+        super().__init__(schema_class, engine)
+
+    def _loadRelationships(self, query):
+        for relationship in self.schema_class.__sqlmodel_relationships__:
+            query = query.options(selectinload(getattr(self.schema_class, relationship)))
+        return query
+
+    async def _get(self, session: AsyncSession, id_: Any):
+        query = self._loadRelationships(select(self.schema_class).where(self.schema_class.id == id_))
+        return (await session.exec(query)).one_or_none()
+
+    async def add(self, obj: Any, **kwargs):
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            session.add(obj)
+            await session.commit()
+            await session.refresh(obj)
+        return obj
+
+    async def update(self, id_: Any, new_data: dict):
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            obj = await self._get(session, id_)
+            if not obj:
+                return None
+            for key, value in new_data.items():
+                setattr(obj, key, value)
+            await session.commit()
+        return obj
+
+    async def updateWithObject(self, id_: Any, new_data: Any):
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            obj = await self._get(session, id_)
+            if not obj:
+                return None
+            new_data.id = obj.id
+            # Updates the existing object, and its relationships with the new ones
+            obj = await session.merge(new_data)
+            await session.commit()
+        return obj
+
+    async def delete(self, id_: Any):
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            # The relationships are loaded so the children are deleted with the object
+            obj = await self._get(session, id_)
+            if not obj:
+                return None
+            await session.delete(obj)
+            await session.commit()
+        return obj
+
+    async def select(self, **kwargs) -> List[Any]:
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            query = self._loadRelationships(select(self.schema_class))
+            for key, value in kwargs.items():
+                query = query.where(getattr(self.schema_class, key) == value)
+            results = (await session.exec(query)).all()
+        return results
+
+    async def selectIn(self, attr: str, values: List[Any]) -> List[Any]:
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            query = self._loadRelationships(select(self.schema_class).where(getattr(self.schema_class, attr).in_(values)))
+            results = (await session.exec(query)).all()
+        return results
+
+    async def selectLike(self, attr: str, value: str) -> List[Any]:
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            query = self._loadRelationships(select(self.schema_class).where(getattr(self.schema_class, attr).ilike(f"%{value}%")))
+            results = (await session.exec(query)).all()
+        return results
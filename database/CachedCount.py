@@ -0,0 +1,75 @@
+from typing import Awaitable, Callable
+import asyncio, threading, time
+
+class CachedCount:
+    """
+    A row count cached for maxAge seconds. Once stale, the cached count is still returned while it is refreshed
+    in the background, so only the first request waits for the count (stale while revalidate).
+    The count is invalidated when rows are added or deleted, the next request counts them again.
+    """
+    def __init__(self, maxAge: float):
+        self.maxAge = maxAge
+        self.value: int | None = None
+        self.updatedAt = 0.0
+        self._refreshing = False
+        # Incremented by invalidate, a count started before is outdated and isn't cached
+        self._generation = 0
+        self._lock = threading.Lock()
+        # Keep a reference to the refresh task, the event loop only keeps weak references to its tasks
+        self._refreshTask: asyncio.Task | None = None
+
+    def _set(self, value: int, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self.value = value
+                self.updatedAt = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self.value = None
+            self.updatedAt = 0.0
+            self._generation += 1
+
+    def _startRefresh(self) -> bool:
+        """
+        Return whether the caller should refresh the count, i.e. the cached count is stale and nobody else is refreshing it.
+        """
+        with self._lock:
+            if self._refreshing or time.monotonic() - self.updatedAt < self.maxAge:
+                return False
+            self._refreshing = True
+            return True
+
+    def _refresh(self, count: Callable[[], int], generation: int):
+        try:
+            self._set(count(), generation)
+        except Exception as e:
+            print(f"Error refreshing the cached count: {e}")
+        finally:
+            self._refreshing = False
+
+    async def _arefresh(self, acount: Callable[[], Awaitable[int]], generation: int):
+        try:
+            self._set(await acount(), generation)
+        except Exception as e:
+            print(f"Error refreshing the cached count: {e}")
+        finally:
+            self._refreshing = False
+
+    def get(self, count: Callable[[], int]) -> int:
+        value, generation = self.value, self._generation
+        if self.maxAge <= 0 or value is None:
+            value = count()
+            self._set(value, generation)
+        elif self._startRefresh():
+            threading.Thread(target=self._refresh, args=(count, generation), daemon=True).start()
+        return value
+
+    async def aget(self, acount: Callable[[], Awaitable[int]]) -> int:
+        value, generation = self.value, self._generation
+        if self.maxAge <= 0 or value is None:
+            value = await acount()
+            self._set(value, generation)
+        elif self._startRefresh():
+            self._refreshTask = asyncio.create_task(self._arefresh(acount, generation))
+        return value
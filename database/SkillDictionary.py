@@ -0,0 +1,80 @@
+from sqlmodel import Session, select
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, Iterable, List
+
+from schema.Application import Skill
+from shared.SkillNormalization import skillKey, canonicalSkillName
+
+class SkillDictionary:
+    """
+    The canonical skills table: maps skill names to the id of their canonical skill (case folded, with synonyms merged).
+    The ids are cached by database, a skill's id never changes once added.
+    Keys are compared under the collation of the database, which may merge keys that differ in Python
+    (e.g. "résumé" and "resume" with the accent insensitive default collation of MariaDB): they get the same skill.
+    """
+    _cachedSkillIds: Dict[str, Dict[str, int]] = {}
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.skillIds = SkillDictionary._cachedSkillIds.setdefault(str(engine.url), {})
+
+    def _loadSkillIds(self, session: Session, keys: List[str]):
+        for skill in session.exec(select(Skill).where(Skill.key.in_(keys))):
+            self.skillIds[skill.key] = skill.id
+        # Keys only matching a stored key under the database collation are looked up one by one
+        for key in keys:
+            if key not in self.skillIds:
+                skillId = session.exec(select(Skill.id).where(Skill.key == key)).first()
+                if skillId is not None:
+                    self.skillIds[key] = skillId
+
+    def _insertSkills(self, session: Session, namesByKey: Dict[str, str], keys: List[str]):
+        try:
+            session.execute(insert(Skill), [{ "key": key, "name": canonicalSkillName(namesByKey[key]) } for key in keys])
+            session.commit()
+        except IntegrityError:
+            # Some keys were added by another worker in the meantime, or collide with another key under the database
+            # collation: insert them one by one, skipping the existing ones
+            session.rollback()
+            if len(keys) > 1:
+                for key in keys:
+                    self._insertSkills(session, namesByKey, [key])
+
+    def getSkillIds(self, names: Iterable[str]) -> Dict[str, int | None]:
+        """
+        Return the canonical skill ids of skill names by skill key, adding the unknown skills.
+        The id is None for a skill that could not be added.
+        """
+        namesByKey = {}
+        for name in names:
+            key = skillKey(name)
+            if key is not None:
+                namesByKey.setdefault(key, name)
+
+        missingKeys = [key for key in namesByKey if key not in self.skillIds]
+        if missingKeys:
+            with Session(self.engine) as session:
+                self._loadSkillIds(session, missingKeys)
+                newKeys = [key for key in missingKeys if key not in self.skillIds]
+                if newKeys:
+                    self._insertSkills(session, namesByKey, newKeys)
+                    self._loadSkillIds(session, newKeys)
+        return { key: self.skillIds.get(key) for key in namesByKey }
+
+    def findSkillIds(self, name: str) -> List[int]:
+        """
+        Return the ids of the canonical skills matching a searched skill name: its canonical skill if known,
+        otherwise the skills whose key contains its key (a scan of the skills table only).
+        """
+        key = skillKey(name)
+        if key is None:
+            return []
+        if self.skillIds.get(key) is not None:
+            return [self.skillIds.get(key)]
+        with Session(self.engine) as session:
+            skillId = session.exec(select(Skill.id).where(Skill.key == key)).first()
+            if skillId is not None:
+                self.skillIds[key] = skillId
+                return [skillId]
+            return list(session.exec(select(Skill.id).where(Skill.key.contains(key, autoescape=True))).all())
@@ -1,4 +1,5 @@
 from sqlmodel import Session, select
+from sqlalchemy import insert
 from typing import List, Any
 from database.BaseQuery import BaseQueryObject
 from schema.Application import Application
@@ -14,6 +15,33 @@ class SqlQueryObject(BaseQueryObject):
             session.refresh(obj)
         return obj
     
+    def addMany(self, objs: List[Any], childSchemaClasses: List[Any], session: Session) -> List[Any]:
+        """
+        Insert the objects and their children (objects of childSchemaClasses whose application_id points to their
+        parent) in the given session, with a batched INSERT per table. The session is not committed.
+        """
+        # Children are inserted separately, after their parents get their ids
+        childrenByObj = []
+        for obj in objs:
+            children = []
+            for relationship in self.schema_class.__sqlmodel_relationships__:
+                children.extend(getattr(obj, relationship))
+                setattr(obj, relationship, [])
+            childrenByObj.append(children)
+        session.add_all(objs)
+        session.flush()
+
+        rowsBySchemaClass = { childSchemaClass: [] for childSchemaClass in childSchemaClasses }
+        for obj, children in zip(objs, childrenByObj):
+            for child in children:
+                child.application_id = obj.id
+                rowsBySchemaClass[type(child)].append(child.model_dump(exclude={ 'id' }))
+        for childSchemaClass, rows in rowsBySchemaClass.items():
+            if rows:
+                # A list of parameters runs as an executemany, sent as multi-row INSERTs by the driver
+                session.execute(insert(childSchemaClass), rows)
+        return objs
+
     def update(self, id_: Any, new_data: dict):
         with Session(self.engine) as session:
             obj = session.get(self.schema_class, id_)
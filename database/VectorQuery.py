@@ -3,7 +3,7 @@ from langchain_core.documents import Document
 from langchain_community.vectorstores.utils import filter_complex_metadata
 
 from database.BaseQuery import BaseQueryObject
-from typing import List, Any, Optional, TypeVar, Type
+from typing import List, Any, Optional, TypeVar, Type, Tuple
 
 class VectorQueryObject(BaseQueryObject):
     def __init__(self, schema_class: Type[Document], engine: VectorStore):
@@ -18,6 +18,16 @@ class VectorQueryObject(BaseQueryObject):
         self.engine.add_documents(documents=[obj], ids=[id] if id else None)
         return obj
 
+    def addMany(self, objs: List[Document], ids: List[str]) -> List[Document]:
+        """
+        Add the documents in a single call, so their embeddings are computed in one batch.
+        """
+        objs = filter_complex_metadata(objs)
+        for obj in objs:
+            obj.metadata = dict() if obj.metadata is None else obj.metadata
+        self.engine.add_documents(documents=objs, ids=ids)
+        return objs
+
     def update(self, id_: Any, new_data: Document) -> Optional[Document]:
         # Delete the old document and add the new one
         self.engine.delete([id_])
@@ -28,12 +38,16 @@ class VectorQueryObject(BaseQueryObject):
         new_data.id = id_
         return new_data
 
+    def updateMetadata(self, ids: List[str], metadatas: List[dict]):
+        # Only the metadata is replaced, the documents aren't embedded again
+        self.engine._collection.update(ids=ids, metadatas=metadatas)
+
     def delete(self, id_: Any) -> Optional[Document]:
         self.engine.delete([id_])
         return None
 
     def select(self, **kwargs) -> List[Document]:
-        return self.engine.similarity_search(kwargs.get("query", ""), k=kwargs.get("k", 10))
+        return self.engine.similarity_search(kwargs.get("query", ""), k=kwargs.get("k", 10), filter=kwargs.get("filter"))
     
     def selectByIds(self, ids: List[Any]) -> List[Document]:
         try:
@@ -43,14 +57,22 @@ class VectorQueryObject(BaseQueryObject):
 
             # Patch metadata=None to metadata={}
             docs = []
-            for content, metadata in zip(raw["documents"], raw["metadatas"]):
+            for docId, content, metadata in zip(raw["ids"], raw["documents"], raw["metadatas"]):
                 docs.append(Document(
+                    id=docId,
                     page_content=content,
                     metadata=metadata if metadata is not None else {}
                 ))
         return filter_complex_metadata(docs) if ids else []
     
 
+    def selectMetadata(self, offset: int, limit: int) -> Tuple[List[str], List[dict]]:
+        """
+        Ids and metadata of a page of the stored documents, without their content.
+        """
+        raw = self.engine._collection.get(include=["metadatas"], offset=offset, limit=limit)
+        return raw["ids"], [metadata if metadata is not None else {} for metadata in raw["metadatas"]]
+
     def selectIn(self, attr: str, values: List[Any]) -> List[Document]:
         retrievedDocs = []
         for value in values:
@@ -11,6 +11,7 @@ from modules.read_cv_directory.CVProcessor import CVProcessor
 from modules.parse_cv.ParseCVFiles import parseCVs
 from database.VectorDB import vector_store
 from controller.ProcessCVController import ProcessCVController
+from controller.CVDirectoryWatcher import CVDirectoryWatcher
 from routes.CVUploadRoutes import router as cv_upload_router
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -21,9 +22,18 @@ settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    createDBAndTables()
+    createDBAndTables(vector_store)
+    cvDirectoryWatcher = None
+    if settings.cv_watch_directory:
+        # Ingest the CV files dropped in the watched directory
+        processCVController = ProcessCVController(sqlEngine=engine, vectorStore=vector_store, baseCVStoragePath=settings.default_cv_storage_path)
+        cvDirectoryWatcher = CVDirectoryWatcher(processCVController, settings.cv_watch_directory,
+                                                settings.cv_watch_interval_seconds, settings.cv_watch_remove_deleted)
+        cvDirectoryWatcher.start()
     yield
     # Cleanup code can be added here if needed
+    if cvDirectoryWatcher is not None:
+        cvDirectoryWatcher.stop()
 
 app = FastAPI(lifespan=lifespan)
 
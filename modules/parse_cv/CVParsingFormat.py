@@ -0,0 +1,153 @@
+from modules.parse_cv.ParsedCVTokenizer import tokenizeParsedCV
+import re, json
+
+class ICVParsingFormat:
+    """
+    An output format of the CV parsing prompt: how the parsed CV blocks are found in a (partial) response,
+    and how each block is converted to the ParsedCV input dict.
+    """
+    name: str
+    blockEnd: str # Text ending each block, a streamed response only needs to be searched again when it arrives
+
+    def findBlocks(self, response: str, isComplete: bool = True) -> tuple[list[tuple[str, str]], int]:
+        """
+        Return the (CV index as text, or "" if the model omitted it, block) pairs of the complete blocks in the response,
+        and the position in the response after the last complete block.
+        isComplete is False when the response is still being streamed.
+        """
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def hasApplicantName(self, block: str) -> bool:
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def tokenize(self, block: str) -> dict:
+        """
+        Convert a block to the ParsedCV input dict, with dates and years of experience kept as text.
+        """
+        raise NotImplementedError("Subclasses should implement this method.")
+
+class XMLParsingFormat(ICVParsingFormat):
+    """
+    <ParsedCV index="..."> blocks with a tag for each field.
+    """
+    name = "xml"
+    blockEnd = "</ParsedCV>"
+    blockPattern = re.compile(r"<ParsedCV(?:\s+index=\"?(\d+)\"?)?\s*>(.*?)</ParsedCV>", re.DOTALL)
+    applicationNamePattern = re.compile(r"<ApplicationName>\s*\S.*?</ApplicationName>", re.DOTALL)
+
+    def findBlocks(self, response: str, isComplete: bool = True) -> tuple[list[tuple[str, str]], int]:
+        blocks = []
+        lastEnd = 0
+        for match in self.blockPattern.finditer(response):
+            blocks.append((match.group(1) or "", match.group(2)))
+            lastEnd = match.end()
+        return blocks, lastEnd
+
+    def hasApplicantName(self, block: str) -> bool:
+        return self.applicationNamePattern.search(block) is not None
+
+    def tokenize(self, block: str) -> dict:
+        return tokenizeParsedCV(block)
+
+def _jsonText(value) -> str | None:
+    return None if value is None else str(value)
+
+def _jsonTexts(value) -> list[str]:
+    # A list of texts, the model sometimes answers a single text instead of a list of one
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [str(item) for item in value if item is not None]
+    return []
+
+def _jsonIndex(value) -> str | None:
+    """
+    The CV index of an object as text ("" if it is missing), or None if it isn't an integer (the block is dropped).
+    """
+    if value is None:
+        return ""
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return str(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return value.strip()
+    return None
+
+class CompactJSONParsingFormat(ICVParsingFormat):
+    """
+    One JSON object per line with short keys, e.g. {"i":0,"n":"John Doe","e":"johndoe@gmail.com","w":[...],...}.
+    """
+    name = "compact"
+    blockEnd = "\n"
+
+    def findBlocks(self, response: str, isComplete: bool = True) -> tuple[list[tuple[str, str]], int]:
+        # Only the lines that have been fully generated can be parsed
+        end = len(response) if isComplete else response.rfind("\n") + 1
+        blocks = []
+        for line in response[:end].splitlines():
+            line = line.strip()
+            if not line.startswith("{"):
+                continue # Code fences or other text around the objects
+            try:
+                index = _jsonIndex(json.loads(line).get("i"))
+            except (ValueError, AttributeError):
+                continue
+            if index is None:
+                continue # Invalid index, the CV is parsed again
+            blocks.append((index, line))
+        return blocks, end
+
+    def hasApplicantName(self, block: str) -> bool:
+        try:
+            name = json.loads(block).get("n")
+        except (ValueError, AttributeError):
+            return False
+        return isinstance(name, str) and name.strip() != ""
+
+    def tokenize(self, block: str) -> dict:
+        cv = json.loads(block)
+        return {
+            "name": _jsonText(cv.get("n")),
+            "email": _jsonText(cv.get("e")),
+            "phone": _jsonText(cv.get("p")),
+            "linkedIn": _jsonText(cv.get("li")),
+            "gitRepo": _jsonText(cv.get("g")),
+            "address": _jsonText(cv.get("a")),
+            "totalYearsOfExperience": _jsonText(cv.get("y")),
+            "workExperiences": [
+                {
+                    "company": _jsonText(we.get("c")),
+                    "position": _jsonText(we.get("t")),
+                    "startDate": _jsonText(we.get("s")),
+                    "endDate": _jsonText(we.get("e")),
+                    "description": we["d"].strip() if isinstance(we.get("d"), str) else None
+                } for we in cv.get("w") or [] if isinstance(we, dict)
+            ],
+            "projects": [
+                {
+                    "name": _jsonText(project.get("n")),
+                    "startDate": _jsonText(project.get("s")),
+                    "endDate": _jsonText(project.get("e")),
+                    "description": project["d"].strip() if isinstance(project.get("d"), str) else None
+                } for project in cv.get("pr") or [] if isinstance(project, dict)
+            ],
+            "educations": [
+                {
+                    "degree": _jsonText(edu.get("d")),
+                    "institution": _jsonText(edu.get("i")),
+                    "year": _jsonText(edu.get("y")),
+                    "gpa": _jsonText(edu.get("g"))
+                } for edu in cv.get("ed") or [] if isinstance(edu, dict)
+            ],
+            "skills": _jsonTexts(cv.get("sk")),
+            "experiencedSkills": [
+                {
+                    "skill": str(skill[0]),
+                    "yearsOfExperience": _jsonText(skill[1])
+                } for skill in cv.get("xs") or [] if isinstance(skill, list) and len(skill) == 2
+            ]
+        }
+
+cvParsingFormats: dict[str, ICVParsingFormat] = {
+    XMLParsingFormat.name: XMLParsingFormat(),
+    CompactJSONParsingFormat.name: CompactJSONParsingFormat(),
+}
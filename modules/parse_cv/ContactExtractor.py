@@ -0,0 +1,88 @@
+from functools import lru_cache
+import re
+
+# Deterministic extraction of the contact fields of a CV, so the model doesn't need to output them.
+# spaCy (optional, see the CV_PRE_EXTRACTION_SPACY_MODEL setting) is used to find the applicant name.
+
+emailPattern = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+linkedInPattern = re.compile(r"(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/in/([A-Za-z0-9_%-]+)", re.IGNORECASE)
+gitRepoPattern = re.compile(r"(?:https?://)?(?:www\.)?(github\.com|gitlab\.com|bitbucket\.org)/([A-Za-z0-9_.-]+)", re.IGNORECASE)
+# A phone number stays on one line, so it isn't joined with the digits of the next lines (dates, addresses)
+phonePattern = re.compile(r"(?<![\w+])(\+?\(?\d[\d \t().-]{6,18}\d)(?!\w)")
+phoneLabelPattern = re.compile(r"(?:phone|tel|mobile|cell|sđt|điện thoại)\W{0,5}$", re.IGNORECASE)
+yearRangePattern = re.compile(r"\d{4}\s*[-.–/]\s*\d{2,4}")
+# A labelled address line, ending at the end of the line, a '|' or a wide gap before the next field of the same line
+addressPattern = re.compile(r"^[ \t]*(?:address|location|địa chỉ)[ \t]*[:：][ \t]*([^|\n]+?)(?:[ \t]{2,}|[ \t]*\||[ \t]*$)", re.IGNORECASE | re.MULTILINE)
+
+# Human readable names of the fields, used to tell the model which fields it doesn't need to output
+contactFieldDescriptions = {
+    "name": "name",
+    "email": "email",
+    "phone": "phone number",
+    "linkedIn": "LinkedIn profile URL",
+    "gitRepo": "Git repository URL",
+    "address": "address",
+}
+
+def extractPhone(text: str) -> str | None:
+    """
+    Return the first phone number of the text. To avoid mistaking dates or IDs for phone numbers,
+    a number must start with '+', '(' or '0', or follow a label like "Phone:".
+    """
+    for match in phonePattern.finditer(text):
+        phone = match.group(1).strip()
+        digitCount = sum(character.isdigit() for character in phone)
+        if digitCount < 9 or digitCount > 15 or yearRangePattern.fullmatch(phone):
+            continue
+        if phone[0] in "+(0" or phoneLabelPattern.search(text[max(0, match.start() - 20):match.start()]):
+            return phone
+    return None
+
+@lru_cache(maxsize=1)
+def _loadSpacyModel(modelName: str):
+    try:
+        import spacy
+        return spacy.load(modelName, disable=["parser", "lemmatizer"])
+    except (ImportError, OSError) as e:
+        print(f"Could not load the spaCy model {modelName}, applicant names won't be pre-extracted: {e}")
+        return None
+
+def extractName(text: str, spacyModelName: str) -> str | None:
+    """
+    Return the first person name spaCy finds in the header of the CV (where the name of the applicant usually is).
+    """
+    nlp = _loadSpacyModel(spacyModelName)
+    if nlp is None:
+        return None
+    for entity in nlp(text[:500]).ents:
+        if entity.label_ == "PERSON" and len(entity.text.split()) >= 2:
+            return entity.text.strip()
+    return None
+
+def extractContactFields(text: str, spacyModelName: str | None = None) -> dict:
+    """
+    Return the contact fields found in the CV text, with the ParsedCV field names as keys.
+    Fields that are not found are left out, so the model still extracts them.
+    """
+    fields = {}
+    if match := emailPattern.search(text):
+        fields["email"] = match.group(0)
+    if phone := extractPhone(text):
+        fields["phone"] = phone
+    if match := linkedInPattern.search(text):
+        fields["linkedIn"] = f"https://www.linkedin.com/in/{match.group(1)}"
+    if match := gitRepoPattern.search(text):
+        fields["gitRepo"] = f"https://{match.group(1).lower()}/{match.group(2)}"
+    if match := addressPattern.search(text):
+        fields["address"] = match.group(1)
+    if spacyModelName and (name := extractName(text, spacyModelName)):
+        fields["name"] = name
+    return fields
+
+def formatKnownFields(fields: dict) -> str:
+    """
+    Tag put at the start of a CV in the prompt, listing the fields the model should leave out of its output.
+    """
+    if not fields:
+        return ""
+    return f"<KnownFields>{', '.join(contactFieldDescriptions[field] for field in fields)}</KnownFields>\n"
@@ -0,0 +1,55 @@
+from dateutil.parser import parse as date_parse
+from datetime import datetime
+from functools import lru_cache
+import re
+
+# End dates meaning the work experience or project is still ongoing
+ongoingDateStrings = {"present", "now", "current", "currently", "ongoing", "today", "to date", "till now", "hiện tại"}
+
+monthNumbers = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+
+yearPattern = re.compile(r"(\d{4})")
+yearMonthPattern = re.compile(r"(\d{4})[-/.](\d{1,2})")
+monthYearPattern = re.compile(r"(\d{1,2})[-/.](\d{4})")
+isoDatePattern = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+monthNameYearPattern = re.compile(r"([A-Za-z]+)\.?,?\s+(\d{4})")
+
+def _parseCommonDateFormats(dateString: str) -> datetime | None:
+    """
+    Parse the formats the model outputs most often ("2022", "2020-05", "05/2020", "2020-05-17", "June 2019", "Jun. 2019").
+    Raise ValueError if the string isn't in one of them.
+    """
+    if match := yearPattern.fullmatch(dateString):
+        return datetime(int(match.group(1)), 1, 1)
+    if match := yearMonthPattern.fullmatch(dateString):
+        return datetime(int(match.group(1)), int(match.group(2)), 1)
+    if match := monthYearPattern.fullmatch(dateString):
+        return datetime(int(match.group(2)), int(match.group(1)), 1)
+    if match := isoDatePattern.fullmatch(dateString):
+        return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    if (match := monthNameYearPattern.fullmatch(dateString)) and match.group(1).lower() in monthNumbers:
+        return datetime(int(match.group(2)), monthNumbers[match.group(1).lower()], 1)
+    raise ValueError(f"Not a common date format: {dateString}")
+
+@lru_cache(maxsize=4096)
+def parsingDateString(dateString: str) -> datetime | None:
+    """
+    Parse a start or end date of the parsing output. Missing months and days default to the first month and day.
+    Return None for ongoing end dates ("Present", "Now",...) and strings that aren't dates.
+    """
+    dateString = dateString.strip()
+    if not dateString or dateString.lower() in ongoingDateStrings:
+        return None
+    try:
+        return _parseCommonDateFormats(dateString)
+    except ValueError:
+        pass
+    # Fall back to dateutil for the other formats
+    try:
+        return date_parse(dateString, default=datetime(datetime.now().year, 1, 1))
+    except (ValueError, OverflowError):
+        return None
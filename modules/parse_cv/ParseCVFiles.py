@@ -11,9 +11,14 @@ from langfuse import observe, get_client
 
 from settings import get_settings
 from modules.parse_cv.ParsedCV import ParsedCV, roundYoE
-from dateutil.parser import parse as date_parse
-from datetime import datetime
-import re
+from modules.parse_cv.RateLimiter import RateLimiter
+from modules.parse_cv.ParsedCVCache import ParsedCVCache
+from modules.parse_cv.CVParsingFormat import ICVParsingFormat, cvParsingFormats
+from modules.parse_cv.ContactExtractor import extractContactFields, formatKnownFields
+from modules.parse_cv.DateParser import parsingDateString
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+import re, contextvars, hashlib, os, math, queue
 
 settings = get_settings()
 
@@ -33,8 +38,10 @@ langfuseTracer = Langfuse(
 langfuseHandler = CallbackHandler()
 
 cvParsingPrompt = """
-    Instruction: Parse the following CV texts (each of them are between <CV> and </CV> tags) and extract the following information in the following format (answer with no other text):
-    - Each parsed CV object should be in the <ParsedCV> and </ParsedCV> tags.
+    Instruction: Parse the following CV texts (each of them are between <CV index="..."> and </CV> tags) and extract the following information in the following format (answer with no other text):
+    - Each parsed CV object should be in the <ParsedCV index="..."> and </ParsedCV> tags, with the same index as the <CV index="..."> tag of the CV it was parsed from.
+    - Every CV must have exactly one parsed CV object.
+    - A CV may start with a <KnownFields> tag listing fields that have already been extracted, these fields must be omitted from its parsed CV object.
     - The values in each parsed CV object should be kept in the original language of the CV.
     - If a field is not present in the CV, it should be omitted from the output.
     - The name of the applicant should be in the <ApplicationName> and </ApplicationName> tags.
@@ -63,7 +70,7 @@ cvParsingPrompt = """
     - Each certification entry should be in the <Certification> and </Certification> tags with all the text in that entry.
 
     Example (do not parse this example, just use it as a reference for the output format):
-    <EXAMPLE_CV>
+    <EXAMPLE_CV index="7">
     Name: John Doe  Email: johndoe@gmail.com  Phone: +1234567890
     LinkedIn: https://www.linkedin.com/in/johndoe  Github: https://github.com/johndoe
     Address: 123 Main St, City, Country
@@ -87,7 +94,7 @@ cvParsingPrompt = """
 
     The output should be in the following format:
 
-    <ParsedCV>
+    <ParsedCV index="7">
         <ApplicationName>John Doe</ApplicationName>
         <Email>johndoe@gmail.com</Email>
         <Phone>+1234567890</Phone>
@@ -140,10 +147,66 @@ cvParsingPrompt = """
     End of instruction.
 """
 
+# Shorter output format: one JSON object with short keys per line, cuts the output tokens of the tag names
+compactCVParsingPrompt = """
+    Instruction: Parse the following CV texts (each of them are between <CV index="..."> and </CV> tags) and answer with one JSON object per CV, each on a single line (JSON Lines, answer with no other text, no code fences):
+    - Every CV must have exactly one JSON object, with the index of its <CV index="..."> tag in the "i" key.
+    - A CV may start with a <KnownFields> tag listing fields that have already been extracted, the keys of these fields must be omitted from its JSON object.
+    - The values should be kept in the original language of the CV.
+    - If a field is not present in the CV, its key should be omitted.
+    - Keys: "n": name of the applicant, "e": email, "p": phone number, "li": LinkedIn profile URL, "g": Git repository URL (like Github and GitLab),
+    "a": address (their home address or current working address), "y": total years of experience (number),
+    "w": list of work experiences, "pr": list of projects, "ed": list of education entries, "sk": list of skills,
+    "xs": list of [skill or job title, years of experience] pairs, "ce": list of certifications.
+    - The total years of experience should be calculated by summing the years of experience from work experiences and significant projects (such as internships, freelance work, college/university graduation projects,... etc.).
+    - Each work experience is an object with "c": company, "t": position held, "s": start date, "e": end date (if applicable), "d": description.
+    - Each project is an object with "n": project name, "s": start date, "e": end date (if applicable), "d": description.
+    - Each education entry is an object with "d": degree, "i": institution, "y": year, "g": GPA.
+    - For skills and job titles with experience (e.g. Spring Boot, embedded programming, project management,...), put them in "xs" with their years of experience.
+    If that skill doesn't have a work experience with time associated with it, put it in "sk" like other skills instead.
+
+    Example (do not parse this example, just use it as a reference for the output format):
+    <EXAMPLE_CV index="7">
+    Name: John Doe  Email: johndoe@gmail.com  Phone: +1234567890
+    LinkedIn: https://www.linkedin.com/in/johndoe  Github: https://github.com/johndoe
+    Address: 123 Main St, City, Country
+    Work Experience:
+    ExpriLabs          2022-2024
+    - Developed AI models for natural language processing.
+    - Led a team of 5 engineers as a project manager.
+    TechCorp 2020-2022
+    - Worked on cloud computing solutions.
+    - Improved system performance by 30%.
+    Projects:
+    Detect Fraudulent Transactions using Machine Learning June 2019 - December 2019
+    - Developed a model to detect fraudulent transactions in real-time.
+    - Achieved 95% accuracy in detection.
+    Education:
+    Degree: Bachelor of Science in Computer Science    2016-2020
+    Institution: University of Technology, GPA: 3.8
+    Skills: Python, Machine Learning
+    Certifications: Certified Data Scientist
+    </EXAMPLE_CV>
+
+    The output should be in the following format:
+    {{"i":7,"n":"John Doe","e":"johndoe@gmail.com","p":"+1234567890","li":"https://www.linkedin.com/in/johndoe","g":"https://github.com/johndoe","y":4,"a":"123 Main St, City, Country","w":[{{"c":"ExpriLabs","t":"Project Manager","s":"2022","e":"2024","d":"- Developed AI models for natural language processing.\\n- Led a team of 5 engineers."}},{{"c":"TechCorp","t":"Cloud Engineer","s":"2020","e":"2022","d":"- Worked on cloud computing solutions.\\n- Improved system performance by 30%."}}],"pr":[{{"n":"Detect Fraudulent Transactions using Machine Learning","s":"June 2019","e":"December 2019","d":"- Developed a model to detect fraudulent transactions in real-time.\\n- Achieved 95% accuracy in detection."}}],"ed":[{{"d":"Bachelor of Science in Computer Science","i":"University of Technology","y":"2016-2020","g":"3.8"}}],"sk":["Python","Machine Learning"],"xs":[["Cloud computing",2],["Project management",2]],"ce":["Certified Data Scientist"]}}
+
+    End of instruction.
+"""
+
+cvParsingPrompts = {
+    "xml": cvParsingPrompt,
+    "compact": compactCVParsingPrompt,
+}
+
+# Output format of the parsing prompt, selected with the CV_PARSING_OUTPUT_FORMAT setting
+cvParsingFormat: ICVParsingFormat = cvParsingFormats[settings.cv_parsing_output_format]
+activeCVParsingPrompt = cvParsingPrompts[cvParsingFormat.name]
+
 cvParsingPromptTemplate = ChatPromptTemplate.from_messages(
     [
         (
-            "system", cvParsingPrompt
+            "system", activeCVParsingPrompt
         ),
         (
             "human", "Now these are the CVs you need to parse:\n{cv_text}"
@@ -160,139 +223,314 @@ cvParsingChain = (
     StrOutputParser() 
 )
 
-def parsingDateString(dateString: str) -> datetime | None:
-    try:
-        return date_parse(dateString)
-    except ValueError:
+def parseEachCVResponse(cvText: str, knownFields: dict | None = None, parsingFormat: ICVParsingFormat | None = None) -> ParsedCV:
+    cvData = (parsingFormat or cvParsingFormat).tokenize(cvText)
+    # Fields extracted locally before parsing were left out of the model's output
+    for field, value in (knownFields or {}).items():
+        cvData[field] = value
+
+    for entry in cvData["workExperiences"] + cvData["projects"]:
+        entry["startDate"] = parsingDateString(entry["startDate"]) if entry["startDate"] is not None else None
+        entry["endDate"] = parsingDateString(entry["endDate"]) if entry["endDate"] is not None else None
+
+    if cvData["totalYearsOfExperience"] is not None:
+        cvData["totalYearsOfExperience"] = roundYoE(cvData["totalYearsOfExperience"])
+
+    return ParsedCV(cvData)
+
+
+def estimateTokenCount(text: str) -> int:
+    """
+    Roughly estimate the number of tokens of a text (about 4 characters per token for OpenAI models).
+    """
+    return len(text) // 4 + 1
+
+# Shared by every parsing call in this process, so concurrent uploads don't exceed the model's limits together
+cvParsingRateLimiter = RateLimiter(
+    requestsPerMinute=settings.cv_parsing_requests_per_minute,
+    tokensPerMinute=settings.cv_parsing_tokens_per_minute
+)
+
+# Changes whenever the prompt changes, so cached responses of an older prompt are not reused
+# The pre-extraction settings are part of it, since they change which fields the model outputs
+cvParsingPromptVersion = hashlib.sha256(
+    f"{activeCVParsingPrompt}\0{settings.cv_pre_extraction_enabled}\0{settings.cv_pre_extraction_spacy_model}".encode("utf-8")
+).hexdigest()[:16]
+
+cvParsingCache = ParsedCVCache(
+    path=settings.cv_parse_cache_path or os.path.join(settings.default_cv_storage_path, "parsed_cv_cache.sqlite3"),
+    maxEntries=settings.cv_parse_cache_max_entries,
+    maxAgeSeconds=settings.cv_parse_cache_max_age_days * 24 * 3600 if settings.cv_parse_cache_max_age_days else None
+) if settings.cv_parse_cache_enabled else None
+
+def _getCVContent(cv: str | Document) -> str:
+    return cv.page_content if isinstance(cv, Document) else str(cv)
+
+def _lookupCachedCVs(cvTexts: list[str]) -> tuple[list[str | None], list[str | None]]:
+    """
+    Return the cache key of each CV and its cached <ParsedCV> block (None for the CVs that must be sent to the model).
+    """
+    if cvParsingCache is None:
+        return [None] * len(cvTexts), [None] * len(cvTexts)
+    cacheKeys = [ParsedCVCache.makeKey(_getCVContent(cv), settings.default_model, cvParsingPromptVersion) for cv in cvTexts]
+    return cacheKeys, [cvParsingCache.get(cacheKey) for cacheKey in cacheKeys]
+
+# Token budgets of a single parsing request per model as (max input tokens, max output tokens).
+# They are kept well below the model limits as token counts are only estimated and long outputs degrade the parsing quality.
+cvParsingModelTokenBudgets = {
+    "gpt-4.1": (64000, 16000),
+    "gpt-4.1-mini": (64000, 16000),
+    "gpt-4.1-nano": (32000, 16000),
+    "gpt-4o": (48000, 8000),
+    "gpt-4o-mini": (48000, 8000),
+}
+defaultCVParsingTokenBudget = (16000, 4000)
+
+def getCVParsingTokenBudget(modelName: str) -> tuple[int, int]:
+    """
+    Return the (max input tokens, max output tokens) budget of a parsing request for the model,
+    matching the longest known model name prefix (e.g. dated model snapshots) and applying the settings overrides.
+    """
+    matchingModels = [model for model in cvParsingModelTokenBudgets if modelName.startswith(model)]
+    maxInputTokens, maxOutputTokens = cvParsingModelTokenBudgets[max(matchingModels, key=len)] if matchingModels else defaultCVParsingTokenBudget
+    return (settings.cv_parsing_max_input_tokens or maxInputTokens, settings.cv_parsing_max_output_tokens or maxOutputTokens)
+
+def estimateParsedCVTokenCount(cvTokenCount: int) -> int:
+    """
+    Estimate the output tokens of a parsed CV, the model copies most of the CV text and adds the tags around it.
+    """
+    return cvTokenCount + 150
+
+def _batchMissingCVs(cvTexts: list[str], rawResults: list[str | None], batchSize: int) -> list[list[int]]:
+    """
+    Pack the CVs that are not cached into batches (keeping their order) as large as the input and output token budgets
+    of the model allow, with at most batchSize CVs per batch. A CV larger than the budget is sent alone.
+    """
+    maxInputTokens, maxOutputTokens = getCVParsingTokenBudget(settings.default_model)
+    maxInputTokens -= estimateTokenCount(activeCVParsingPrompt)
+
+    batches = []
+    batchInputTokens = batchOutputTokens = 0
+    for i, rawResult in enumerate(rawResults):
+        if rawResult is not None:
+            continue
+        inputTokens = estimateTokenCount(f"<CV index=\"{i}\">{_getCVContent(cvTexts[i])}</CV>")
+        outputTokens = estimateParsedCVTokenCount(inputTokens)
+        if not batches or len(batches[-1]) >= batchSize or \
+           batchInputTokens + inputTokens > maxInputTokens or batchOutputTokens + outputTokens > maxOutputTokens:
+            batches.append([])
+            batchInputTokens = batchOutputTokens = 0
+        batches[-1].append(i)
+        batchInputTokens += inputTokens
+        batchOutputTokens += outputTokens
+    return batches
+
+def _preExtractFields(cvTexts: list[str]) -> list[dict]:
+    """
+    Extract the contact fields of each CV locally, so the model doesn't need to output them.
+    """
+    if not settings.cv_pre_extraction_enabled:
+        return [{} for _ in cvTexts]
+    return [extractContactFields(_getCVContent(cv), settings.cv_pre_extraction_spacy_model) for cv in cvTexts]
+
+def _formatCVBatch(cvTexts: list[str], knownFields: list[dict], indices: list[int]) -> str:
+    return "\n".join([f"<CV index=\"{i}\">{formatKnownFields(knownFields[i])}{_getCVContent(cvTexts[i])}</CV>" for i in indices])
+
+def _matchParsedCVBlock(indices: list[int], knownFields: list[dict], matched: dict[int, str], position: int, index: str, block: str) -> int | None:
+    """
+    Return the index of the CV (in the batch indices) a parsed CV block belongs to, using the index the model echoes back.
+    Blocks without an index are matched by their position in the response. Blocks with an unknown or duplicated index,
+    or without an applicant name (unless it was extracted locally), return None so their CVs are parsed again.
+    """
+    if index:
+        if not index.isdigit():
+            return None
+        cvIndex = int(index)
+    elif position < len(indices):
+        cvIndex = indices[position]
+    else:
         return None
+    if cvIndex not in indices or cvIndex in matched:
+        return None
+    if "name" not in knownFields[cvIndex] and not cvParsingFormat.hasApplicantName(block):
+        return None
+    return cvIndex
 
-def parseEachCVResponse(cvText: str) -> ParsedCV:
-    name = re.search(r"<ApplicationName>(.*?)</ApplicationName>", cvText)
-    email = re.search(r"<Email>(.*?)</Email>", cvText)
-    phone = re.search(r"<Phone>(.*?)</Phone>", cvText)
-    linkedIn = re.search(r"<LinkedIn>(.*?)</LinkedIn>", cvText)
-    gitRepo = re.search(r"<GitRepo>(.*?)</GitRepo>", cvText)
-    address = re.search(r"<Address>(.*?)</Address>", cvText)
-    totalYoE = re.search(r"<YearOfExperience>(.*?)</YearOfExperience>", cvText)
-    workExperiences = re.findall(r"<WorkExperience>(.*?)</WorkExperience>", cvText, re.DOTALL)
-    projects = re.findall(r"<Project>(.*?)</Project>", cvText, re.DOTALL)
-    educations = re.findall(r"<Education>(.*?)</Education>", cvText, re.DOTALL)
-    skills = re.findall(r"<Skill>(.*?)</Skill>", cvText)
-    experiencedSkills = re.findall(r"<ExperiencedSkill>(.*?)</ExperiencedSkill><YoE>(.*?)</YoE>", cvText)
-
-
-    education_entries = []
-    for education in educations:
-        degree = re.search(r"<Degree>(.*?)</Degree>", education)
-        institution = re.search(r"<Institution>(.*?)</Institution>", education)
-        year = re.search(r"<Year>(.*?)</Year>", education)
-        gpa = re.search(r"<GPA>(.*?)</GPA>", education)
-        education_entries.append({
-                "degree": degree.group(1) if degree else None,
-                "institution": institution.group(1) if institution else None,
-                "year": year.group(1) if year else None,
-                "gpa": gpa.group(1) if gpa else None
-        })
-
-    work_experience_entries = []
-    for workExperience in workExperiences:
-        company = re.search(r"<Company>(.*?)</Company>", workExperience)
-        position = re.search(r"<Position>(.*?)</Position>", workExperience)
-        startDate = re.search(r"<StartDate>(.*?)</StartDate>", workExperience)
-        endDate = re.search(r"<EndDate>(.*?)</EndDate>", workExperience)
-        description = re.search(r"<Description>(.*?)</Description>", workExperience, re.DOTALL)
-
-        work_experience_entries.append({
-            "company": company.group(1) if company else None,
-            "position": position.group(1) if position else None,
-            "startDate": parsingDateString(startDate.group(1)) if startDate else None,
-            "endDate": parsingDateString(endDate.group(1)) if endDate else None,
-            "description": description.group(1).strip() if description else None
-        })
-
-    project_entries = []
-    for project in projects:
-        projectName = re.search(r"<ProjectName>(.*?)</ProjectName>", project)
-        startDate = re.search(r"<StartDate>(.*?)</StartDate>", project)
-        endDate = re.search(r"<EndDate>(.*?)</EndDate>", project)
-        description = re.search(r"<Description>(.*?)</Description>", project, re.DOTALL)
-
-        project_entries.append({
-            "name": projectName.group(1) if projectName else None,
-            "startDate": parsingDateString(startDate.group(1)) if startDate else None,
-            "endDate": parsingDateString(endDate.group(1)) if endDate else None,
-            "description": description.group(1).strip() if description else None
-        })
-
-    return ParsedCV({
-        "name": name.group(1) if name else None,
-        "email": email.group(1) if email else None,
-        "phone": phone.group(1) if phone else None,
-        "linkedIn": linkedIn.group(1) if linkedIn else None,
-        "gitRepo": gitRepo.group(1) if gitRepo else None,
-        "address": address.group(1) if address else None,
-        "totalYearsOfExperience": roundYoE(totalYoE.group(1)) if totalYoE else None,
-        "workExperiences": work_experience_entries,
-        "projects": project_entries,
-        "educations": education_entries,
-        "skills": skills,
-        "experiencedSkills": [
-            {
-                "skill": skill[0],
-                "yearsOfExperience": skill[1]
-            } for skill in experiencedSkills
-        ]
-    })
+def _matchBatchResponse(indices: list[int], knownFields: list[dict], response: str) -> dict[int, str]:
+    matched = {}
+    blocks, _ = cvParsingFormat.findBlocks(response)
+    for position, (index, block) in enumerate(blocks):
+        cvIndex = _matchParsedCVBlock(indices, knownFields, matched, position, index, block)
+        if cvIndex is not None:
+            matched[cvIndex] = block
+    return matched
 
+def _storeBatchResults(matched: dict[int, str], cacheKeys: list[str | None], rawResults: list[str | None]):
+    for i, block in matched.items():
+        rawResults[i] = block
+        if cvParsingCache is not None and cacheKeys[i] is not None:
+            cvParsingCache.set(cacheKeys[i], block)
+
+def _nextRetryBatchSize(batches: list[list[int]]) -> int:
+    # CVs are retried in smaller batches, as long batches are the most likely to be cut short
+    return max(1, math.ceil(max(len(batch) for batch in batches) / 2))
+
+def _estimateRequestTokens(cvText: str) -> int:
+    # The system prompt is sent with every request, the output is assumed to be about as long as the input CVs
+    return estimateTokenCount(activeCVParsingPrompt) + 2 * estimateTokenCount(cvText)
+
+def _reportUnparsedCVs(rawResults: list[str | None], maxAttempts: int, raiseIfAllUnparsed: bool = True):
+    unparsedCount = sum(1 for rawResult in rawResults if rawResult is None)
+    if unparsedCount == 0:
+        return
 
-@observe(name="ParseCVs")
-def parseCVs(cvTexts: list[str], batchSize=5) -> list[ParsedCV]:
     langfuseClient = get_client()
+    with langfuseClient.start_as_current_span(name="ParseCVsError"):
+        langfuseClient.update_current_trace(session_id="parse_cvs")
+        langfuseClient.update_current_span(
+            level="ERROR",
+            status_message=f"Failed to parse {unparsedCount} of {len(rawResults)} CVs after {maxAttempts} attempts."
+        )
+    if raiseIfAllUnparsed and unparsedCount == len(rawResults):
+        raise Exception("Failed to parse CVs after multiple attempts.")
+    print(f"Failed to parse {unparsedCount} of {len(rawResults)} CVs after {maxAttempts} attempts, skipping them.")
+
+def _parseCVBatch(cvTexts: list[str], knownFields: list[dict], indices: list[int]) -> dict[int, str]:
+    cvText = _formatCVBatch(cvTexts, knownFields, indices)
+    # Invoke the parsing chain with the CV text
+    # Use Langfuse to trace the invocation
+    cvParsingRateLimiter.acquire(_estimateRequestTokens(cvText))
+    response = cvParsingChain.invoke({"cv_text": cvText}, config={"callbacks": [langfuseHandler], "metadata": {"langfuse_session_id": "parse_cvs"}})
+    return _matchBatchResponse(indices, knownFields, response)
+
+def _streamCVBatch(cvTexts: list[str], knownFields: list[dict], indices: list[int], blockQueue: queue.Queue):
+    """
+    Stream the response of a batch and put each (CV index, parsed CV block) in the queue as soon as it is complete.
+    None is put in the queue when the batch is done (even if it failed).
+    """
+    try:
+        cvText = _formatCVBatch(cvTexts, knownFields, indices)
+        cvParsingRateLimiter.acquire(_estimateRequestTokens(cvText))
+        buffer = ""
+        matched = {}
+        position = 0
+        for chunk in cvParsingChain.stream({"cv_text": cvText}, config={"callbacks": [langfuseHandler], "metadata": {"langfuse_session_id": "parse_cvs"}}):
+            buffer += chunk
+            # Only look for complete blocks when the chunk may have closed one
+            if cvParsingFormat.blockEnd not in buffer[-(len(chunk) + len(cvParsingFormat.blockEnd)):]:
+                continue
+            blocks, lastEnd = cvParsingFormat.findBlocks(buffer, isComplete=False)
+            for index, block in blocks:
+                cvIndex = _matchParsedCVBlock(indices, knownFields, matched, position, index, block)
+                if cvIndex is not None:
+                    matched[cvIndex] = block
+                    blockQueue.put((cvIndex, block))
+                position += 1
+            # Drop the finished blocks, only the block being generated is kept in memory
+            buffer = buffer[lastEnd:]
 
-    cvCount = len(cvTexts)
+        # The last block of some formats is only complete at the end of the response
+        blocks, _ = cvParsingFormat.findBlocks(buffer, isComplete=True)
+        for index, block in blocks:
+            cvIndex = _matchParsedCVBlock(indices, knownFields, matched, position, index, block)
+            if cvIndex is not None:
+                matched[cvIndex] = block
+                blockQueue.put((cvIndex, block))
+            position += 1
+    finally:
+        blockQueue.put(None)
+
+def _traceParseCVs(cvCount: int, cachedCount: int, batchCount: int, maxConcurrency: int):
+    langfuseClient = get_client()
     with langfuseClient.start_as_current_span(name="ParseCVs"):
         langfuseClient.update_current_trace(session_id="parse_cvs")
         langfuseClient.update_current_span(
             level="DEBUG",
-            status_message=f"Parsing {cvCount} CVs with batch size {batchSize}",
+            status_message=f"Parsing {cvCount} CVs ({cachedCount} cached) in {batchCount} batches with at most {maxConcurrency} concurrent requests",
         )
 
-    if cvCount == 0:
-        return []
-    
-    parsedCVs = []
-    for i in range(0, cvCount, batchSize):
-        batch = cvTexts[i:i + batchSize]
-        cvText = "\n".join([f"<CV>{text}</CV>" for text in batch])
-
-        maxAttempts = 3
-        attempts = 0
-        
-        while attempts < maxAttempts:
-
-            if attempts == maxAttempts - 1:
-                with langfuseClient.start_as_current_span(name="ParseCVsError"):
-                    langfuseClient.update_current_trace(session_id="parse_cvs")
-                    langfuseClient.update_current_span(
-                        level="ERROR",
-                        status_message=f"Failed to parse CVs after {maxAttempts} attempts."
-                    )
-                raise Exception("Failed to parse CVs after multiple attempts.")
-            
-            # Invoke the parsing chain with the CV text
-            # Use Langfuse to trace the invocation
-            response = cvParsingChain.invoke({"cv_text": cvText}, config={"callbacks": [langfuseHandler], "metadata": {"langfuse_session_id": "parse_cvs"}})
-            response = re.findall(r"<ParsedCV>(.*?)</ParsedCV>", response, re.DOTALL)
-            
-            if not response or not isinstance(response, list) or len(response) == 0:
-                attempts += 1
-                continue
+@observe(name="ParseCVs")
+def parseCVs(cvTexts: list[str], batchSize: int | None = None, maxConcurrency: int | None = None, maxAttempts: int = 3,
+             keepUnparsed: bool = False) -> list[ParsedCV]:
+    """
+    Parse the CVs in batches packed by the model's token budget (with at most batchSize CVs per request),
+    sending at most maxConcurrency requests at the same time.
+    CVs found in the parse cache are not sent to the model, and only the CVs missing from a response are sent again
+    (up to maxAttempts times). The parsed CVs are returned in the same order as the input CVs.
+    With keepUnparsed, the CVs that couldn't be parsed are returned as None, so the result lines up with the input
+    (and no error is raised if none of them could be parsed, the caller reports them).
+    """
+    maxConcurrency = maxConcurrency or settings.cv_parsing_max_concurrency
+    batchSize = batchSize or settings.cv_parsing_max_batch_size
+    cacheKeys, rawResults = _lookupCachedCVs(cvTexts)
+    knownFields = _preExtractFields(cvTexts)
+    batches = _batchMissingCVs(cvTexts, rawResults, batchSize)
+    _traceParseCVs(len(cvTexts), len(cvTexts) - sum(len(batch) for batch in batches), len(batches), maxConcurrency)
+
+    for _ in range(maxAttempts):
+        if not batches:
             break
-    
-        for cv in response:
-            parsedCV = parseEachCVResponse(cv)
-            parsedCVs.append(parsedCV)
+        if maxConcurrency <= 1 or len(batches) == 1:
+            results = [_parseCVBatch(cvTexts, knownFields, batch) for batch in batches]
+        else:
+            # The model calls are I/O bound, so threads are enough. Context is copied so Langfuse spans stay nested.
+            with ThreadPoolExecutor(max_workers=min(maxConcurrency, len(batches))) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, _parseCVBatch, cvTexts, knownFields, batch) for batch in batches]
+                results = [future.result() for future in futures]
 
-    return parsedCVs
+        for matched in results:
+            _storeBatchResults(matched, cacheKeys, rawResults)
+        batches = _batchMissingCVs(cvTexts, rawResults, _nextRetryBatchSize(batches))
 
+    _reportUnparsedCVs(rawResults, maxAttempts, raiseIfAllUnparsed=not keepUnparsed)
+    if keepUnparsed:
+        return [parseEachCVResponse(rawResult, knownFields[i]) if rawResult is not None else None for i, rawResult in enumerate(rawResults)]
+    return [parseEachCVResponse(rawResult, knownFields[i]) for i, rawResult in enumerate(rawResults) if rawResult is not None]
+
+@observe(name="StreamParseCVs")
+def streamParseCVs(cvTexts: list[str], batchSize: int | None = None, maxConcurrency: int | None = None, maxAttempts: int = 3,
+                   keepUnparsed: bool = False) -> Iterator[ParsedCV] | Iterator[tuple[int, ParsedCV | None]]:
+    """
+    Streaming version of parseCVs, yielding each parsed CV as soon as the model has finished generating it
+    (cached CVs first). The parsed CVs are yielded in completion order, not in the order of the input CVs.
+    With keepUnparsed, (index of the input CV, parsed CV) pairs are yielded instead, and the CVs that couldn't be parsed
+    are yielded last as (index, None) pairs.
+    """
+    maxConcurrency = maxConcurrency or settings.cv_parsing_max_concurrency
+    batchSize = batchSize or settings.cv_parsing_max_batch_size
+    cacheKeys, rawResults = _lookupCachedCVs(cvTexts)
+    knownFields = _preExtractFields(cvTexts)
+    for i, rawResult in enumerate(rawResults):
+        if rawResult is not None:
+            parsedCV = parseEachCVResponse(rawResult, knownFields[i])
+            yield (i, parsedCV) if keepUnparsed else parsedCV
+
+    batches = _batchMissingCVs(cvTexts, rawResults, batchSize)
+    _traceParseCVs(len(cvTexts), len(cvTexts) - sum(len(batch) for batch in batches), len(batches), maxConcurrency)
+
+    for _ in range(maxAttempts):
+        if not batches:
+            break
+        blockQueue = queue.Queue()
+        with ThreadPoolExecutor(max_workers=min(maxConcurrency, len(batches))) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, _streamCVBatch, cvTexts, knownFields, batch, blockQueue) for batch in batches]
+            runningBatches = len(futures)
+            while runningBatches > 0:
+                item = blockQueue.get()
+                if item is None:
+                    runningBatches -= 1
+                    continue
+                cvIndex, block = item
+                _storeBatchResults({cvIndex: block}, cacheKeys, rawResults)
+                parsedCV = parseEachCVResponse(block, knownFields[cvIndex])
+                yield (cvIndex, parsedCV) if keepUnparsed else parsedCV
+            # Raise the errors of the failed batches
+            for future in futures:
+                future.result()
+        batches = _batchMissingCVs(cvTexts, rawResults, _nextRetryBatchSize(batches))
 
+    _reportUnparsedCVs(rawResults, maxAttempts, raiseIfAllUnparsed=not keepUnparsed)
+    if keepUnparsed:
+        for i, rawResult in enumerate(rawResults):
+            if rawResult is None:
+                yield i, None
@@ -0,0 +1,85 @@
+import sqlite3, hashlib, threading, time, os
+
+class ParsedCVCache():
+    """
+    A persistent SQLite cache mapping the hash of a CV text (with the model name and prompt version)
+    to the raw <ParsedCV> block the model returned for it.
+    Entries older than maxAgeSeconds are ignored and removed, and the least recently used entries
+    are evicted when there are more than maxEntries entries.
+    """
+    def __init__(self, path: str, maxEntries: int = 10000, maxAgeSeconds: float | None = None):
+        self.path = path
+        self.maxEntries = maxEntries
+        self.maxAgeSeconds = maxAgeSeconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS parsed_cv_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, createdAt REAL NOT NULL, lastAccessed REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_parsed_cv_cache_lastAccessed ON parsed_cv_cache (lastAccessed)")
+        connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A new connection per operation so the cache can be shared by the parsing threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def makeKey(cvText: str, modelName: str, promptVersion: str) -> str:
+        return hashlib.sha256(f"{modelName}\0{promptVersion}\0{cvText}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._connect() as connection:
+            row = connection.execute("SELECT response, createdAt FROM parsed_cv_cache WHERE key = ?", (key,)).fetchone()
+            if row and self.maxAgeSeconds and now - row[1] > self.maxAgeSeconds:
+                connection.execute("DELETE FROM parsed_cv_cache WHERE key = ?", (key,))
+                row = None
+            if row:
+                connection.execute("UPDATE parsed_cv_cache SET lastAccessed = ? WHERE key = ?", (now, key))
+        connection.close()
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def set(self, key: str, response: str):
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO parsed_cv_cache (key, response, createdAt, lastAccessed) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self._evict(connection, now)
+        connection.close()
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        if self.maxAgeSeconds:
+            connection.execute("DELETE FROM parsed_cv_cache WHERE createdAt < ?", (now - self.maxAgeSeconds,))
+        if self.maxEntries and self.maxEntries > 0:
+            connection.execute(
+                "DELETE FROM parsed_cv_cache WHERE key IN "
+                "(SELECT key FROM parsed_cv_cache ORDER BY lastAccessed DESC LIMIT -1 OFFSET ?)",
+                (self.maxEntries,)
+            )
+
+    def clear(self):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM parsed_cv_cache")
+        connection.close()
+
+    def stats(self) -> dict:
+        with self._connect() as connection:
+            entries = connection.execute("SELECT COUNT(*) FROM parsed_cv_cache").fetchone()[0]
+        connection.close()
+        with self._lock:
+            return { "entries": entries, "hits": self.hits, "misses": self.misses }
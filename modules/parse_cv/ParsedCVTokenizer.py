@@ -0,0 +1,93 @@
+import re
+
+# Matches either the opening or closing tag of an entry (work experience, project or education),
+# or a whole element without nested tags, e.g. <Email>johndoe@gmail.com</Email>.
+# Values are matched up to their own closing tag, so they may contain '<' and other tags (e.g. "List<String>", "<b>").
+elementPattern = re.compile(
+    r"<(/?)(WorkExperience|Project|Education)>"
+    r"|<([A-Za-z]+)>(.*?)</\3>",
+    re.DOTALL
+)
+
+# Top level tags with a single value and their ParsedCV field
+singleValueTags = {
+    "ApplicationName": "name",
+    "Email": "email",
+    "Phone": "phone",
+    "LinkedIn": "linkedIn",
+    "GitRepo": "gitRepo",
+    "Address": "address",
+    "YearOfExperience": "totalYearsOfExperience",
+}
+
+# Tags of the repeated entries, with their ParsedCV list and the tags of their fields
+entryTags = {
+    "WorkExperience": ("workExperiences", {
+        "Company": "company",
+        "Position": "position",
+        "StartDate": "startDate",
+        "EndDate": "endDate",
+        "Description": "description",
+    }),
+    "Project": ("projects", {
+        "ProjectName": "name",
+        "StartDate": "startDate",
+        "EndDate": "endDate",
+        "Description": "description",
+    }),
+    "Education": ("educations", {
+        "Degree": "degree",
+        "Institution": "institution",
+        "Year": "year",
+        "GPA": "gpa",
+    }),
+}
+
+def tokenizeParsedCV(cvText: str) -> dict:
+    """
+    Build the ParsedCV input dict from a <ParsedCV> block in a single pass over its elements.
+    Values are kept as text (dates and years of experience are not converted), descriptions are stripped.
+    Only the first value of a single value field is kept, like the previous regex based parser.
+    """
+    cvData = {
+        "name": None, "email": None, "phone": None, "linkedIn": None, "gitRepo": None, "address": None,
+        "totalYearsOfExperience": None,
+        "workExperiences": [], "projects": [], "educations": [],
+        "skills": [], "experiencedSkills": [],
+    }
+    skills = cvData["skills"]
+    entryTag = None # Tag of the open work experience, project or education
+    entryFields = None # Field tags of the open entry
+    entry = None # Dict of the open entry
+    lastExperiencedSkill = None # Experienced skill waiting for its <YoE> tag
+
+    for isClosing, entryTagName, tagName, value in (match.groups() for match in elementPattern.finditer(cvText)):
+        if entryTagName is not None:
+            if not isClosing:
+                # An entry that is never closed is dropped
+                entryTag = entryTagName
+                entryFields = entryTags[entryTagName][1]
+                entry = dict.fromkeys(entryFields.values())
+            elif entryTagName == entryTag:
+                cvData[entryTags[entryTag][0]].append(entry)
+                entryTag = entryFields = entry = None
+            continue
+
+        if entry is not None and tagName in entryFields:
+            fieldName = entryFields[tagName]
+            if entry[fieldName] is None:
+                entry[fieldName] = value.strip() if fieldName == "description" else value
+        elif tagName == "Skill":
+            skills.append(value)
+        elif tagName == "ExperiencedSkill":
+            lastExperiencedSkill = { "skill": value, "yearsOfExperience": None }
+        elif tagName == "YoE":
+            if lastExperiencedSkill is not None:
+                lastExperiencedSkill["yearsOfExperience"] = value
+                cvData["experiencedSkills"].append(lastExperiencedSkill)
+                lastExperiencedSkill = None
+        elif tagName in singleValueTags:
+            if cvData[singleValueTags[tagName]] is None:
+                cvData[singleValueTags[tagName]] = value
+
+    return cvData
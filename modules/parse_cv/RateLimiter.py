@@ -0,0 +1,44 @@
+from collections import deque
+import threading, time
+
+class RateLimiter():
+    """
+    A sliding window (one minute) rate limiter for requests per minute and tokens per minute.
+    A limit of 0 or None means that limit is not enforced. It can be shared by threads.
+    """
+    def __init__(self, requestsPerMinute: int | None = None, tokensPerMinute: int | None = None, window: float = 60.0):
+        self.requestsPerMinute = requestsPerMinute or 0
+        self.tokensPerMinute = tokensPerMinute or 0
+        self.window = window
+        self._lock = threading.Lock()
+        self._requests = deque() # (timestamp, tokens) of the requests made in the current window
+
+    def _reserve(self, tokens: int) -> float:
+        """
+        Record a request of the given token count if the limits allow it, return 0.
+        Otherwise return the number of seconds to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._requests and now - self._requests[0][0] >= self.window:
+                self._requests.popleft()
+
+            usedTokens = sum(requestTokens for _, requestTokens in self._requests)
+            # A single request larger than the token limit is let through once the window is empty
+            # so it can never block forever
+            tokensExceeded = self.tokensPerMinute > 0 and self._requests and usedTokens + tokens > self.tokensPerMinute
+            requestsExceeded = self.requestsPerMinute > 0 and len(self._requests) >= self.requestsPerMinute
+
+            if not tokensExceeded and not requestsExceeded:
+                self._requests.append((now, tokens))
+                return 0.0
+            return max(self._requests[0][0] + self.window - now, 0.01)
+
+    def acquire(self, tokens: int = 0):
+        """
+        Block until a request with the given token count can be made.
+        """
+        if not self.requestsPerMinute and not self.tokensPerMinute:
+            return
+        while (waitTime := self._reserve(tokens)) > 0:
+            time.sleep(waitTime)
@@ -0,0 +1,113 @@
+from modules.read_cv_directory.GDriveDownload import isValidCVFileType
+from modules.read_cv_directory.CVFileStore import CVFileStore
+from typing import Iterator
+import sqlite3, time, os
+
+class CVDirectoryManifest():
+    """
+    A persistent SQLite manifest of the CV files ingested from directories: path, size, modification time,
+    SHA-256 and the id of the application created from each file.
+    Scanning a directory only hashes the files whose size or modification time changed, and only returns the files
+    that are new or whose content changed, so re-syncing a directory costs time proportional to its changes.
+    Files missing from the directory are marked as deleted until their entry is removed.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cv_directory_manifest ("
+                "path TEXT PRIMARY KEY, directory TEXT NOT NULL, size INTEGER NOT NULL, mtimeNs INTEGER NOT NULL, "
+                "sha256 TEXT NOT NULL, applicationId INTEGER, deleted INTEGER NOT NULL DEFAULT 0, updatedAt REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_cv_directory_manifest_directory ON cv_directory_manifest (directory)")
+        connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _walkCVFiles(self, directory: str) -> Iterator[os.DirEntry]:
+        directories = [directory]
+        while directories:
+            with os.scandir(directories.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                    elif entry.is_file() and isValidCVFileType(entry.path):
+                        yield entry
+
+    def scan(self, directory: str) -> dict:
+        """
+        Compare the CV files of a directory (and its subdirectories) with the manifest. Return a dict with
+        - 'changed': the new or modified files, as { 'path', 'size', 'mtimeNs', 'sha256', 'applicationId' } dicts
+          (applicationId is the application of the previous version of the file, or None for new files),
+        - 'deleted': the files deleted from the directory whose entry hasn't been removed yet, as { 'path', 'applicationId', 'new' } dicts
+          (new is whether the deletion was found by this scan, the others were reported by a previous one),
+        - 'unchangedCount': the number of unchanged files.
+        """
+        directory = os.path.abspath(directory)
+        with self._connect() as connection:
+            knownFiles = {
+                row[0]: { 'size': row[1], 'mtimeNs': row[2], 'sha256': row[3], 'applicationId': row[4], 'deleted': bool(row[5]) }
+                for row in connection.execute(
+                    "SELECT path, size, mtimeNs, sha256, applicationId, deleted FROM cv_directory_manifest WHERE directory = ?", (directory,)
+                )
+            }
+        connection.close()
+
+        changedFiles = []
+        touchedFiles = []
+        unchangedCount = 0
+        for entry in self._walkCVFiles(directory):
+            stat = entry.stat()
+            knownFile = knownFiles.pop(entry.path, None)
+            if knownFile and not knownFile['deleted'] and knownFile['size'] == stat.st_size and knownFile['mtimeNs'] == stat.st_mtime_ns:
+                unchangedCount += 1
+                continue
+
+            sha256 = CVFileStore.hashFile(entry.path)
+            if knownFile and not knownFile['deleted'] and knownFile['sha256'] == sha256:
+                # Touched but not modified, only the modification time needs updating
+                touchedFiles.append((stat.st_size, stat.st_mtime_ns, time.time(), entry.path))
+                unchangedCount += 1
+                continue
+            changedFiles.append({
+                'path': entry.path, 'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns, 'sha256': sha256,
+                'applicationId': knownFile['applicationId'] if knownFile else None
+            })
+
+        # The files left in knownFiles are no longer in the directory
+        deletedFiles = [{ 'path': path, 'applicationId': knownFile['applicationId'], 'new': not knownFile['deleted'] }
+                        for path, knownFile in knownFiles.items()]
+        with self._connect() as connection:
+            connection.executemany("UPDATE cv_directory_manifest SET size = ?, mtimeNs = ?, updatedAt = ? WHERE path = ?", touchedFiles)
+            connection.executemany(
+                "UPDATE cv_directory_manifest SET deleted = 1, updatedAt = ? WHERE path = ? AND deleted = 0",
+                [(time.time(), deletedFile['path']) for deletedFile in deletedFiles]
+            )
+        connection.close()
+        return { 'changed': changedFiles, 'deleted': deletedFiles, 'unchangedCount': unchangedCount }
+
+    def recordFile(self, directory: str, changedFile: dict, applicationId: int):
+        """
+        Record a changed file returned by scan once its application has been saved.
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cv_directory_manifest (path, directory, size, mtimeNs, sha256, applicationId, deleted, updatedAt) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+                (changedFile['path'], os.path.abspath(directory), changedFile['size'], changedFile['mtimeNs'],
+                 changedFile['sha256'], applicationId, time.time())
+            )
+        connection.close()
+
+    def removeFiles(self, paths: list[str]):
+        """
+        Remove the entries of deleted files, once their applications have been removed.
+        """
+        with self._connect() as connection:
+            connection.executemany("DELETE FROM cv_directory_manifest WHERE path = ?", [(path,) for path in paths])
+        connection.close()
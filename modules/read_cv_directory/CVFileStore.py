@@ -0,0 +1,151 @@
+from datetime import datetime
+import hashlib, json, os, shutil, sys, tempfile, time
+
+class CVFileStore:
+    """
+    Content addressed store of the CV files: each file is saved once, as blobs/<first 2 hash characters>/<SHA-256><extension>,
+    and each upload is a JSON file in uploads/ listing the { file name: SHA-256 } of its files.
+    The pages extracted from a file are saved next to its blob, so a file that is uploaded again isn't extracted again.
+    Blobs no longer referenced by an upload are removed by collectGarbage.
+    """
+    def __init__(self, rootPath: str):
+        self.rootPath = rootPath
+        self.blobsPath = os.path.join(rootPath, 'blobs')
+        self.uploadsPath = os.path.join(rootPath, 'uploads')
+        os.makedirs(self.blobsPath, exist_ok=True)
+        os.makedirs(self.uploadsPath, exist_ok=True)
+
+    @staticmethod
+    def hashFile(filePath: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(filePath, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def _blobDirectory(self, sha256: str) -> str:
+        return os.path.join(self.blobsPath, sha256[:2])
+
+    def getBlobPath(self, sha256: str, fileName: str) -> str:
+        # The extension is kept, the file type of a CV is guessed from it
+        return os.path.join(self._blobDirectory(sha256), sha256 + os.path.splitext(fileName)[1].lower())
+
+    def _getPagesPath(self, sha256: str) -> str:
+        return os.path.join(self._blobDirectory(sha256), sha256 + '.pages.json')
+
+    def _touch(self, path: str) -> bool:
+        """
+        Update the modification time of a stored file, so collectGarbage keeps it while the upload reusing it is in progress
+        (the upload referencing it is only saved at the end). Return whether the file exists.
+        """
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def addFile(self, filePath: str, move: bool = False) -> str:
+        """
+        Add a file to the store and return its SHA-256. With move, the file is moved into the store (or deleted if
+        the store already has it) instead of copied.
+        """
+        sha256 = self.hashFile(filePath)
+        blobPath = self.getBlobPath(sha256, filePath)
+        if self._touch(blobPath):
+            # The pages are reused with the blob, they must not be collected either
+            self._touch(self._getPagesPath(sha256))
+            if move:
+                os.remove(filePath)
+            return sha256
+
+        os.makedirs(os.path.dirname(blobPath), exist_ok=True)
+        if move:
+            shutil.move(filePath, blobPath)
+        else:
+            # Copy to a temporary file first, so a blob is never seen half written
+            fileDescriptor, tempPath = tempfile.mkstemp(dir=os.path.dirname(blobPath))
+            os.close(fileDescriptor)
+            shutil.copyfile(filePath, tempPath)
+            os.replace(tempPath, blobPath)
+        return sha256
+
+    def loadPages(self, sha256: str) -> list[str] | None:
+        """
+        Return the texts of the pages extracted from a file earlier, or None if it hasn't been extracted yet.
+        """
+        try:
+            with open(self._getPagesPath(sha256), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def savePages(self, sha256: str, pageTexts: list[str]):
+        pagesPath = self._getPagesPath(sha256)
+        fileDescriptor, tempPath = tempfile.mkstemp(dir=os.path.dirname(pagesPath))
+        with os.fdopen(fileDescriptor, 'w', encoding='utf-8') as f:
+            json.dump(pageTexts, f, ensure_ascii=False)
+        os.replace(tempPath, pagesPath)
+
+    def saveUpload(self, uploadName: str, references: dict[str, str]):
+        """
+        Save the { file name: SHA-256 } references of the files of an upload.
+        """
+        with open(os.path.join(self.uploadsPath, uploadName + '.json'), 'w', encoding='utf-8') as f:
+            json.dump({ 'created': datetime.now().isoformat(), 'files': references }, f, ensure_ascii=False, indent=2)
+
+    def removeUpload(self, uploadName: str):
+        os.remove(os.path.join(self.uploadsPath, uploadName + '.json'))
+
+    def _referencedHashes(self, maxUploadAgeSeconds: float | None) -> set[str]:
+        referencedHashes = set()
+        for entry in os.scandir(self.uploadsPath):
+            if not entry.name.endswith('.json'):
+                continue
+            if maxUploadAgeSeconds is not None and time.time() - entry.stat().st_mtime > maxUploadAgeSeconds:
+                os.remove(entry.path)
+                continue
+            with open(entry.path, encoding='utf-8') as f:
+                referencedHashes.update(json.load(f)['files'].values())
+        return referencedHashes
+
+    def collectGarbage(self, maxUploadAgeSeconds: float | None = None, minBlobAgeSeconds: float = 3600, dryRun: bool = False) -> list[str]:
+        """
+        Remove the blobs (and their extracted pages) not referenced by any upload, and return their paths.
+        Uploads older than maxUploadAgeSeconds are removed first. Blobs younger than minBlobAgeSeconds are kept,
+        as the upload referencing them may still be in progress.
+        """
+        referencedHashes = self._referencedHashes(None if dryRun else maxUploadAgeSeconds)
+        removedPaths = []
+        for directory in os.scandir(self.blobsPath):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                sha256 = entry.name.split('.')[0]
+                if sha256 in referencedHashes or time.time() - entry.stat().st_mtime < minBlobAgeSeconds:
+                    continue
+                if not dryRun:
+                    os.remove(entry.path)
+                removedPaths.append(entry.path)
+            if not dryRun and not os.listdir(directory.path):
+                os.rmdir(directory.path)
+        return removedPaths
+
+if __name__ == "__main__":
+    # Remove unreferenced CV files from the store of DEFAULT_CV_STORAGE_PATH:
+    #   python -m modules.read_cv_directory.CVFileStore gc [--dry-run] [--max-upload-age-days <days>]
+    import argparse
+    from settings import get_settings
+
+    parser = argparse.ArgumentParser(description="Manage the content addressed CV file store.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    gcParser = subparsers.add_parser('gc', help="Remove the CV files not referenced by any upload.")
+    gcParser.add_argument('--dry-run', action='store_true', help="List the files that would be removed without removing them.")
+    gcParser.add_argument('--max-upload-age-days', type=float, default=None, help="Also remove the uploads older than this.")
+    args = parser.parse_args()
+
+    store = CVFileStore(os.path.join(get_settings().default_cv_storage_path, 'store'))
+    maxUploadAgeSeconds = args.max_upload_age_days * 86400 if args.max_upload_age_days is not None else None
+    removedPaths = store.collectGarbage(maxUploadAgeSeconds, dryRun=args.dry_run)
+    for removedPath in removedPaths:
+        print(removedPath)
+    print(f"{'Would remove' if args.dry_run else 'Removed'} {len(removedPaths)} files.", file=sys.stderr)
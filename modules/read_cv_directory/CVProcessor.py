@@ -1,65 +1,332 @@
-from itertools import groupby
 from modules.read_cv_directory.ProcessCVFileClass import ICVFileProcessor, PDFProcessor, DOCXProcessor, ODTProcessor
 from langchain_core.documents import Document
-from typing import List, Union
-import mimetypes, re, os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Union, Dict, Iterable, Iterator
+import mimetypes, re, os, signal, threading, time
 
 from modules.read_cv_directory.GDriveDownload import GDriveDownload, isValidCVFileType
+from modules.read_cv_directory.CVTextNormalizer import CVTextNormalizer
+from modules.read_cv_directory.CVFileStore import CVFileStore
+from settings import get_settings
 
+settings = get_settings()
 
+cvFileProcessors: Dict[str, ICVFileProcessor] = {
+    'application/pdf': PDFProcessor(),
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': DOCXProcessor(),
+    'application/vnd.oasis.opendocument.text': ODTProcessor()
+}
+
+def getCVMimeType(filePath: str) -> str | None:
+    """
+    Guess the MIME type of a CV file, falling back to the file extension if the MIME type cannot be guessed.
+    """
+    mime_type, _ = mimetypes.guess_type(filePath)
+    if mime_type is None:
+        file_extension = os.path.splitext(filePath)[-1].lower()
+        if file_extension == '.pdf':
+            mime_type = 'application/pdf'
+        elif file_extension == '.docx':
+            mime_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        elif file_extension == '.odt':
+            mime_type = 'application/vnd.oasis.opendocument.text'
+    return mime_type
+
+class ExtractionTimeoutError(Exception):
+    pass
+
+def _raiseExtractionTimeout(signalNumber, frame):
+    raise ExtractionTimeoutError("Extraction timed out.")
+
+def extractCVFile(filePath: str, maxPages: int | None = None, maxCharacters: int | None = None,
+                  timeout: float | None = None) -> List[Document]:
+    """
+    Extract the documents of a single CV file with the processor matching its type.
+    Pages after maxPages are not read and the text after maxCharacters is cut, the truncated documents
+    have a 'truncated' metadata. When run in the main thread of a (worker) process on Unix, the extraction is
+    interrupted after timeout seconds.
+    This is a module level function so it can be sent to worker processes.
+    """
+    mime_type = getCVMimeType(filePath)
+    if mime_type not in cvFileProcessors:
+        raise ValueError(f"Unsupported file type: {filePath}")
+    processor: ICVFileProcessor = cvFileProcessors[mime_type]
+
+    # A timer signal interrupts Python code stuck on a file, a stall in native code is handled by the parent process timeout
+    useTimer = timeout and hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+    if useTimer:
+        previousHandler = signal.signal(signal.SIGALRM, _raiseExtractionTimeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        documents = []
+        characterCount = 0
+        pages = processor.lazyProcess(filePath)
+        try:
+            for doc in pages:
+                if (maxPages and len(documents) >= maxPages) or (maxCharacters and characterCount >= maxCharacters):
+                    documents[-1].metadata['truncated'] = True
+                    break
+                if maxCharacters and characterCount + len(doc.page_content) > maxCharacters:
+                    doc.page_content = doc.page_content[:maxCharacters - characterCount]
+                    doc.metadata['truncated'] = True
+                characterCount += len(doc.page_content)
+                documents.append(doc)
+        finally:
+            # Stop reading the remaining pages
+            if hasattr(pages, 'close'):
+                pages.close()
+        return documents
+    except ExtractionTimeoutError:
+        raise ExtractionTimeoutError(f"Extraction timed out after {timeout} seconds.")
+    finally:
+        if useTimer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previousHandler)
 
 class CVProcessor:
-    def __init__(self, gDriveUrlOrDirectory: str, savePath: str = 'cv_files'):
+    def __init__(self, gDriveUrlOrDirectory: str, savePath: str = 'cv_files',
+                 maxWorkers: int | None = None, fileTimeout: float | None = None,
+                 fileStore: CVFileStore | None = None, uploadName: str | None = None, moveFilesIntoStore: bool = False,
+                 filePaths: List[str] | None = None):
         self.gDriveSavePath = savePath
         self.gDriveUrlOrDirectory = gDriveUrlOrDirectory
-        self.processors = {
-            'application/pdf': PDFProcessor(),
-            'application/vnd.openxmlformats-officedocument.wordprocessingml.document': DOCXProcessor(),
-            'application/vnd.oasis.opendocument.text': ODTProcessor()
-        }
+        self.processors = cvFileProcessors
+        self.maxWorkers = maxWorkers if maxWorkers is not None else settings.cv_extraction_max_workers
+        self.fileTimeout = fileTimeout if fileTimeout is not None else settings.cv_extraction_file_timeout
+        # Limits of the extraction of each file: larger files fail, pages and characters beyond the limits are dropped
+        self.maxFileBytes = settings.cv_extraction_max_file_bytes or None
+        self.maxPages = settings.cv_extraction_max_pages or None
+        self.maxCharacters = settings.cv_extraction_max_characters or None
+        # Extract in worker processes even with a single worker, so a file can't block or crash the API process
+        self.sandboxed = settings.cv_extraction_sandboxed
+        # Files that could not be extracted in the last extraction, as { 'file_name', 'error' } dicts
+        self.failedFiles: List[Dict[str, str]] = []
+        self.normalizer = CVTextNormalizer(maxCharacters=settings.cv_normalization_max_characters or None) if settings.cv_normalization_enabled else None
+        self.charactersBeforeNormalization = self.charactersAfterNormalization = 0
+        # With a file store, the files are added to the store (moved there with moveFilesIntoStore, for downloaded files),
+        # extracted from their blob unless the store already has their pages, and referenced by the upload uploadName
+        self.fileStore = fileStore
+        self.uploadName = uploadName
+        self.moveFilesIntoStore = moveFilesIntoStore
+        # Stored file path -> (original file name, SHA-256) for the files of the last extraction
+        self.storedFiles: Dict[str, tuple[str, str]] = {}
+        self.reusedPagesFilePaths = set()
+        # Only extract these files of the directory instead of listing it (e.g. the files changed since the last sync)
+        self.filePaths = filePaths
         self.gDriveDownloader = GDriveDownload(self.gDriveSavePath)
         try:
             os.makedirs(self.gDriveSavePath, exist_ok=True)
         except Exception as e:
             print(f"Error creating save path {self.gDriveSavePath}: {e}")
             raise e
-    
-    def processCVFiles(self) -> List[Document]:
-        if re.match(r"https?://(?:drive)\.google\.com/[^\s]+", self.gDriveUrlOrDirectory):
+
+    def _getFileName(self, filePath: str) -> str:
+        return self.storedFiles[filePath][0] if filePath in self.storedFiles else os.path.basename(filePath)
+
+    def _addFailedFile(self, filePath: str, error: str):
+        print(f"Error processing CV file {filePath}: {error}")
+        self.failedFiles.append({ 'file_name': self._getFileName(filePath), 'error': error })
+
+    def _prepareFile(self, filePath: str) -> tuple[str, List[Document] | None]:
+        """
+        Check the size of a listed file and add it to the file store (if any). Return the path to extract it from,
+        with its documents if its pages were already extracted.
+        """
+        if self.maxFileBytes and os.path.getsize(filePath) > self.maxFileBytes:
+            raise ValueError(f"File is larger than the limit of {self.maxFileBytes} bytes.")
+        if self.fileStore is None:
+            return filePath, None
+        fileName = os.path.basename(filePath)
+        sha256 = self.fileStore.addFile(filePath, move=self.moveFilesIntoStore)
+        blobPath = self.fileStore.getBlobPath(sha256, fileName)
+        self.storedFiles[blobPath] = (fileName, sha256)
+        pageTexts = self.fileStore.loadPages(sha256)
+        if pageTexts is None:
+            return blobPath, None
+        self.reusedPagesFilePaths.add(blobPath)
+        return blobPath, [Document(page_content=pageText, metadata={ 'source': blobPath, 'file_name': fileName }) for pageText in pageTexts]
+
+    def _extractSerially(self, filePaths: Iterable[str]) -> Iterator[tuple[str, List[Document]]]:
+        for filePath in filePaths:
+            try:
+                filePath, documents = self._prepareFile(filePath)
+                yield filePath, documents if documents is not None else extractCVFile(filePath, self.maxPages, self.maxCharacters)
+            except Exception as e:
+                self._addFailedFile(filePath, str(e))
+
+    def _terminateWorkers(self, executor: ProcessPoolExecutor):
+        """
+        Shut the pool down without waiting for its workers and terminate them, including the ones stuck in native code.
+        """
+        if hasattr(executor, 'terminate_workers'):
+            executor.terminate_workers()
+            return
+        # Before Python 3.14 the executor can't kill its workers, so they are terminated directly.
+        # shutdown() forgets the worker processes, they are listed before it
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def _extractInParallel(self, filePaths: Iterable[str]) -> Iterator[tuple[str, List[Document]]]:
+        """
+        Yield the documents of each file as soon as it is extracted in a worker process. Only maxWorkers files are
+        submitted at a time, so the extracted documents waiting to be consumed stay bounded however many files there are.
+        A file taking longer than fileTimeout fails: the workers are terminated right away, so a stuck worker doesn't keep
+        its slot, and the other files being extracted are restarted in a new pool.
+        If a worker crashes, the pool is restarted and the files it was extracting are retried once.
+        """
+        maxWorkers = max(1, self.maxWorkers)
+        executor = ProcessPoolExecutor(max_workers=maxWorkers)
+        filePaths = iter(filePaths)
+        hasMoreFiles = True
+        # Future -> (file path, time it was submitted), each file gets its own timeout counted from its submission
+        pending = {}
+        # Files resubmitted after a worker crash
+        retriedFilePaths = set()
+        # The worker interrupts the extraction itself after fileTimeout, the grace period lets it report it
+        hardTimeout = self.fileTimeout + 5
+
+        def submit(filePath: str):
+            pending[executor.submit(extractCVFile, filePath, self.maxPages, self.maxCharacters, self.fileTimeout)] = (filePath, time.monotonic())
+
+        try:
+            while hasMoreFiles or pending:
+                while hasMoreFiles and len(pending) < maxWorkers:
+                    filePath = next(filePaths, None)
+                    if filePath is None:
+                        hasMoreFiles = False
+                        break
+                    try:
+                        filePath, documents = self._prepareFile(filePath)
+                    except Exception as e:
+                        self._addFailedFile(filePath, str(e))
+                        continue
+                    if documents is not None:
+                        yield filePath, documents
+                    else:
+                        submit(filePath)
+                if not pending:
+                    continue
+
+                earliestDeadline = min(submitTime for _, submitTime in pending.values()) + hardTimeout
+                done, _ = wait(pending, timeout=max(0, earliestDeadline - time.monotonic()), return_when=FIRST_COMPLETED)
+                crashedFilePaths = []
+                for future in done:
+                    filePath, _ = pending.pop(future)
+                    try:
+                        documents = future.result()
+                    except BrokenProcessPool:
+                        crashedFilePaths.append(filePath)
+                    except Exception as e:
+                        self._addFailedFile(filePath, str(e))
+                    else:
+                        yield filePath, documents
+
+                if crashedFilePaths:
+                    # All the files of a broken pool fail, we can't tell which one crashed the worker
+                    crashedFilePaths.extend(filePath for filePath, _ in pending.values())
+                    pending.clear()
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = ProcessPoolExecutor(max_workers=maxWorkers)
+                    for filePath in crashedFilePaths:
+                        if filePath in retriedFilePaths:
+                            self._addFailedFile(filePath, "The extraction worker crashed.")
+                        else:
+                            retriedFilePaths.add(filePath)
+                            submit(filePath)
+                    continue
+
+                now = time.monotonic()
+                timedOutFutures = [future for future, (_, submitTime) in pending.items() if now - submitTime >= hardTimeout]
+                if timedOutFutures:
+                    for future in timedOutFutures:
+                        filePath, _ = pending.pop(future)
+                        self._addFailedFile(filePath, f"Extraction timed out after {self.fileTimeout} seconds.")
+                    # The stuck workers can't be told apart from the others, the files still being extracted start over
+                    restartedFilePaths = [filePath for filePath, _ in pending.values()]
+                    pending.clear()
+                    self._terminateWorkers(executor)
+                    executor = ProcessPoolExecutor(max_workers=maxWorkers)
+                    for filePath in restartedFilePaths:
+                        submit(filePath)
+        finally:
+            if pending:
+                # Stopped before the files being extracted are done (e.g. the consumer stopped), don't wait for them
+                self._terminateWorkers(executor)
+            else:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _listFilePaths(self) -> Iterable[str]:
+        if self.filePaths is not None:
+            filePaths = self.filePaths
+        elif re.match(r"https?://(?:drive)\.google\.com/[^\s]+", self.gDriveUrlOrDirectory):
             filePaths = self.gDriveDownloader.downloadPdfFileOrFolder(self.gDriveUrlOrDirectory)
         else:
-            with os.scandir(self.gDriveUrlOrDirectory) as entries:
-                filePaths = [entry.path for entry in entries if entry.is_file() and isValidCVFileType(entry.path)]
-        
-        documents = []
+            filePaths = (entry.path for entry in os.scandir(self.gDriveUrlOrDirectory) if entry.is_file() and isValidCVFileType(entry.path))
+
         for filePath in filePaths:
-            mime_type, _ = mimetypes.guess_type(filePath)
-            if mime_type is None:
-                # Fallback to file extension if MIME type cannot be guessed
-                file_extension = os.path.splitext(filePath)[-1].lower()
-                if file_extension == '.pdf':
-                    mime_type = 'application/pdf'
-                elif file_extension == '.docx':
-                    mime_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                elif file_extension == '.odt':
-                    mime_type = 'application/vnd.oasis.opendocument.text'
-                else:
-                    print(f"Unsupported file type: {filePath}")
-                    continue
-            if mime_type in self.processors:
-                processor: ICVFileProcessor = self.processors[mime_type]
-                documents.extend(processor.process(filePath))
+            if getCVMimeType(filePath) in self.processors:
+                yield filePath
             else:
                 print(f"Unsupported file type: {filePath}")
 
-        merged_documents = []
-        documents.sort(key=lambda doc: doc.metadata.get('file_name', ''))
-        for doc in documents:
-            file_name = doc.metadata.get('file_name', 'unknown')
-            if not merged_documents or merged_documents[-1].metadata.get('file_name') != file_name:
-                merged_documents.append(doc)
-            else:
-                merged_documents[-1].page_content += "\n" + doc.page_content
+    def _mergeFileDocuments(self, fileDocuments: List[Document]) -> Document:
+        """
+        Merge the pages of a file into a single document, normalizing its text.
+        """
+        merged_document = fileDocuments[0]
+        if any(doc.metadata.get('truncated') for doc in fileDocuments):
+            merged_document.metadata['truncated'] = True
+        pageTexts = [doc.page_content for doc in fileDocuments]
+        self.charactersBeforeNormalization += sum(len(pageText) for pageText in pageTexts) + len(pageTexts) - 1
+        if self.normalizer is not None:
+            merged_document.page_content = self.normalizer.normalizePages(pageTexts)
+        else:
+            merged_document.page_content = "\n".join(pageTexts)
+        self.charactersAfterNormalization += len(merged_document.page_content)
+        return merged_document
+
+    def iterCVDocuments(self) -> Iterator[Document]:
+        """
+        Yield one merged document per CV file, in extraction order, as soon as the file is extracted.
+        Files are listed and extracted lazily, so the documents can be parsed while the next files are extracted.
+        """
+        self.failedFiles = []
+        self.charactersBeforeNormalization = self.charactersAfterNormalization = 0
+        self.storedFiles = {}
+        self.reusedPagesFilePaths = set()
+        filePaths = self._listFilePaths()
+        if self.maxWorkers > 1 or self.sandboxed:
+            fileDocumentLists = self._extractInParallel(filePaths)
+        else:
+            fileDocumentLists = self._extractSerially(filePaths)
+
+        for filePath, fileDocuments in fileDocumentLists:
+            if filePath in self.storedFiles:
+                fileName, sha256 = self.storedFiles[filePath]
+                for doc in fileDocuments:
+                    doc.metadata['file_name'] = fileName
+                if filePath not in self.reusedPagesFilePaths:
+                    self.fileStore.savePages(sha256, [doc.page_content for doc in fileDocuments])
+            if fileDocuments:
+                yield self._mergeFileDocuments(fileDocuments)
+
+        if self.fileStore is not None and self.uploadName is not None:
+            self.fileStore.saveUpload(self.uploadName, { fileName: sha256 for fileName, sha256 in self.storedFiles.values() })
+
+    def processCVFiles(self) -> List[Document]:
+        return sorted(self.iterCVDocuments(), key=lambda doc: doc.metadata.get('file_name', ''))
+
+    def getNormalizationStats(self) -> Dict[str, int]:
+        """
+        Characters of the extracted CV texts before and after normalization in the last extraction,
+        and the estimated number of prompt tokens saved (about 4 characters per token).
+        """
+        return {
+            'characters_before': self.charactersBeforeNormalization,
+            'characters_after': self.charactersAfterNormalization,
+            'estimated_tokens_saved': (self.charactersBeforeNormalization - self.charactersAfterNormalization) // 4
+        }
 
-        return merged_documents
-    
@@ -0,0 +1,95 @@
+from collections import Counter
+import re
+
+pageNumberPattern = re.compile(r"(?:page|trang)\s*\d{1,3}(?:\s*(?:/|of|trên)\s*\d{1,3})?", re.IGNORECASE)
+# Page numbers without a label ("3", "3 / 5", "3 of 5"): on their own line these can also be CV values (years of experience,
+# team size, short dates), so they are only removed in the first and last lines of a page, where the headers and footers are
+barePageNumberPattern = re.compile(r"(\d{1,3})(?:\s*(?:/|of|trên)\s*(\d{1,3}))?", re.IGNORECASE)
+# Lines without any letter or digit (separators, bullets, box drawing characters left by the layout)
+layoutJunkPattern = re.compile(r"[\W_]*")
+horizontalSpacePattern = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+controlCharacterPattern = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f\ufffd]")
+
+class CVTextNormalizer:
+    """
+    Trims the text extracted from the pages of a CV before it is sent to the model, as every character costs prompt tokens:
+    collapses whitespace, drops page numbers, layout junk and the headers and footers repeated on every page,
+    removes duplicated lines and caps the length of the CV text.
+    """
+    def __init__(self, collapseWhitespace: bool = True, removePageNumbers: bool = True, removeRepeatedHeaders: bool = True,
+                 dedupeLines: bool = True, maxCharacters: int | None = None, headerLineCount: int = 3, minDuplicateLineLength: int = 40):
+        self.collapseWhitespace = collapseWhitespace
+        self.removePageNumbers = removePageNumbers
+        self.removeRepeatedHeaders = removeRepeatedHeaders
+        self.dedupeLines = dedupeLines
+        self.maxCharacters = maxCharacters
+        # Number of lines at the top and bottom of each page where headers and footers are looked for
+        self.headerLineCount = headerLineCount
+        # Lines shorter than this are only removed when repeated right after themselves (e.g. "Python" can appear in several sections)
+        self.minDuplicateLineLength = minDuplicateLineLength
+
+    def _isBarePageNumber(self, line: str) -> bool:
+        match = barePageNumberPattern.fullmatch(line.strip())
+        return match is not None and (match.group(2) is None or int(match.group(1)) <= int(match.group(2)))
+
+    def _cleanLines(self, pageText: str) -> list[str]:
+        pageText = controlCharacterPattern.sub("", pageText)
+        lines = []
+        for line in pageText.splitlines():
+            if self.collapseWhitespace:
+                line = horizontalSpacePattern.sub(" ", line).strip()
+            if self.removePageNumbers and pageNumberPattern.fullmatch(line.strip()):
+                continue
+            if line.strip() and layoutJunkPattern.fullmatch(line.strip()):
+                continue
+            lines.append(line)
+
+        if self.removePageNumbers:
+            nonEmptyIndices = [i for i, line in enumerate(lines) if line.strip()]
+            edgeIndices = set(nonEmptyIndices[:self.headerLineCount] + nonEmptyIndices[-self.headerLineCount:])
+            lines = [line for i, line in enumerate(lines) if i not in edgeIndices or not self._isBarePageNumber(line)]
+        return lines
+
+    def _findRepeatedHeaders(self, pages: list[list[str]]) -> set[str]:
+        """
+        Return the lines found at the top or bottom of at least half of the pages (of a CV with at least 2 pages).
+        """
+        if len(pages) < 2:
+            return set()
+        counts = Counter()
+        for lines in pages:
+            nonEmptyLines = [line for line in lines if line.strip()]
+            counts.update(set(nonEmptyLines[:self.headerLineCount] + nonEmptyLines[-self.headerLineCount:]))
+        return { line for line, count in counts.items() if count >= max(2, (len(pages) + 1) // 2) }
+
+    def normalizePages(self, pageTexts: list[str]) -> str:
+        """
+        Normalize the texts of the pages of a CV (in page order) and join them into the CV text.
+        """
+        pages = [self._cleanLines(pageText) for pageText in pageTexts]
+        repeatedHeaders = self._findRepeatedHeaders(pages) if self.removeRepeatedHeaders else set()
+
+        lines = []
+        seenLines = set()
+        for pageLines in pages:
+            for line in pageLines:
+                if line in repeatedHeaders:
+                    # Keep the first one, the header of the first page often has the name or contacts of the applicant
+                    if line in seenLines:
+                        continue
+                if self.dedupeLines and line:
+                    if lines and line == lines[-1]:
+                        continue
+                    if len(line) >= self.minDuplicateLineLength and line in seenLines:
+                        continue
+                if line:
+                    seenLines.add(line)
+                # Keep at most one empty line between paragraphs
+                if not line and (not lines or not lines[-1]):
+                    continue
+                lines.append(line)
+
+        text = "\n".join(lines).strip()
+        if self.maxCharacters and len(text) > self.maxCharacters:
+            text = text[:self.maxCharacters]
+        return text
@@ -1,4 +1,9 @@
-import gdown, os, mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from pathvalidate import sanitize_filename
+from settings import get_settings
+import gdown, os, mimetypes, re, json, glob, hashlib, shutil, tempfile, urllib.parse, urllib.request
+
+settings = get_settings()
 
 def isValidCVFileType(file_path: str) -> bool:
     """
@@ -17,30 +22,138 @@ def isValidCVFileType(file_path: str) -> bool:
     file_extension = os.path.splitext(file_path)[-1].lower() 
     return mime_type in validCVTypes or file_extension in ['.pdf', '.docx', '.odt']
 
+def getGDriveId(url: str) -> str | None:
+    """
+    Extract the file or folder id of a Google Drive link (…/file/d/<id>/…, …/folders/<id>, …?id=<id>).
+    """
+    match = re.search(r"/(?:file/d|folders)/([A-Za-z0-9_-]+)", url) or re.search(r"[?&]id=([A-Za-z0-9_-]+)", url)
+    return match.group(1) if match else None
+
 class GDriveDownload:
-    def __init__(self, save_path):
+    """
+    Download the CV files of a Google Drive file or folder link.
+    With a Google Drive API key, the folder is listed first and only the CV files are downloaded, concurrently, and
+    the files are cached by their Drive id and modified time, so unchanged files are not downloaded again.
+    Without an API key, the files are listed and downloaded with gdown (still concurrently, but not cached).
+    apiBaseUrl can point to a local HTTP server serving the Drive API responses, to run the downloader without Google Drive.
+    """
+    folderMimeType = 'application/vnd.google-apps.folder'
+
+    def __init__(self, save_path, apiKey: str | None = None, maxConcurrency: int | None = None,
+                 cachePath: str | None = None, apiBaseUrl: str | None = None):
         self.save_path = save_path
+        self.apiKey = apiKey if apiKey is not None else settings.google_drive_api_key
+        self.maxConcurrency = maxConcurrency or settings.gdrive_download_max_concurrency
+        self.cachePath = cachePath or settings.gdrive_cache_path or os.path.join(settings.default_cv_storage_path, 'gdrive_cache')
+        self.apiBaseUrl = (apiBaseUrl or settings.gdrive_api_base_url).rstrip('/')
 
-    def downloadPdfFileOrFolder(self, url: str) -> list[str]:
+    def _requestApi(self, path: str, params: dict) -> urllib.request.Request:
+        query = urllib.parse.urlencode({ **params, 'key': self.apiKey })
+        return urllib.request.Request(f"{self.apiBaseUrl}/{path}?{query}")
+
+    def _getJson(self, path: str, params: dict) -> dict:
+        with urllib.request.urlopen(self._requestApi(path, params), timeout=60) as response:
+            return json.load(response)
+
+    def listFolder(self, folderId: str, relativePath: str = '') -> list[dict]:
+        """
+        List the CV files of a folder and its subfolders as Drive file dicts (id, name, mimeType, modifiedTime),
+        with the folder path relative to the listed folder in 'relativePath'.
         """
-        Downloads a PDF file or folder from Google Drive.
+        files = []
+        pageToken = None
+        while True:
+            params = {
+                'q': f"'{folderId}' in parents and trashed = false",
+                'fields': 'nextPageToken, files(id, name, mimeType, modifiedTime)',
+                'pageSize': 1000
+            }
+            if pageToken:
+                params['pageToken'] = pageToken
+            response = self._getJson('files', params)
+            for file in response.get('files', []):
+                if file['mimeType'] == self.folderMimeType:
+                    files.extend(self.listFolder(file['id'], os.path.join(relativePath, sanitize_filename(file['name']))))
+                elif isValidCVFileType(file['name']):
+                    files.append({ **file, 'relativePath': relativePath })
+            pageToken = response.get('nextPageToken')
+            if not pageToken:
+                return files
 
-        Args:
-            url (str): The URL of the Google Drive file or folder.
+    def _getCachedFilePath(self, file: dict) -> str:
+        modifiedTimeHash = hashlib.sha1(file.get('modifiedTime', '').encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cachePath, f"{file['id']}_{modifiedTimeHash}{os.path.splitext(file['name'])[1].lower()}")
 
-        Returns:
-            list[str]: List of paths to downloaded PDF files.
+    def _downloadFile(self, file: dict) -> str:
+        """
+        Download a Drive file into the save path, from the cache if this version of the file was downloaded before.
+        """
+        cachedFilePath = self._getCachedFilePath(file)
+        if not os.path.exists(cachedFilePath):
+            # Stream to a temporary file, so an interrupted download is never cached
+            fileDescriptor, tempPath = tempfile.mkstemp(dir=self.cachePath)
+            try:
+                with os.fdopen(fileDescriptor, 'wb') as f, urllib.request.urlopen(self._requestApi(f"files/{file['id']}", { 'alt': 'media' }), timeout=300) as response:
+                    shutil.copyfileobj(response, f)
+                os.replace(tempPath, cachedFilePath)
+            except BaseException:
+                os.remove(tempPath)
+                raise
+            # Remove the older versions of the file
+            for oldFilePath in glob.glob(os.path.join(glob.escape(self.cachePath), f"{glob.escape(file['id'])}_*")):
+                if oldFilePath != cachedFilePath:
+                    os.remove(oldFilePath)
+
+        outputDirectory = os.path.join(self.save_path, file.get('relativePath', ''))
+        os.makedirs(outputDirectory, exist_ok=True)
+        outputFilePath = os.path.join(outputDirectory, sanitize_filename(file['name']))
+        shutil.copyfile(cachedFilePath, outputFilePath)
+        return outputFilePath
+
+    def _downloadConcurrently(self, download, items: list) -> list[str]:
+        """
+        Run download on each item with at most maxConcurrency downloads at a time,
+        skipping (and reporting) the items that fail.
         """
-        # If the URL is a folder, use gdown.download_folder
+        filePaths = []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.maxConcurrency, len(items)))) as executor:
+            futures = [(item, executor.submit(download, item)) for item in items]
+            for item, future in futures:
+                try:
+                    filePath = future.result()
+                except Exception as e:
+                    print(f"Error downloading {item}: {e}")
+                    continue
+                if filePath:
+                    filePaths.append(filePath)
+        return filePaths
+
+    def _downloadWithApi(self, url: str) -> list[str]:
+        driveId = getGDriveId(url)
+        if driveId is None:
+            print(f"Not a Google Drive file or folder link: {url}")
+            return []
+        os.makedirs(self.cachePath, exist_ok=True)
         if "folders" in url:
-            gdown.download_folder(url, output=self.save_path, use_cookies=False)
-            # Delete any non-CV files in the folder
-            for file in os.listdir(self.save_path):
-                file_path = os.path.join(self.save_path, file)
-                if not isValidCVFileType(file_path):
-                    os.remove(file_path)
-            # Return all valid files in the folder
-            return [f"{self.save_path}/{file}" for file in os.listdir(self.save_path) if isValidCVFileType(f"{self.save_path}/{file}")]
+            files = self.listFolder(driveId)
+        else:
+            file = self._getJson(f"files/{driveId}", { 'fields': 'id, name, mimeType, modifiedTime' })
+            if not isValidCVFileType(file['name']):
+                print(f"Downloaded file is not a valid CV type: {file['name']}")
+                return []
+            files = [file]
+        return self._downloadConcurrently(self._downloadFile, files)
+
+    def _downloadFolderFileWithGdown(self, folderFile) -> str | None:
+        os.makedirs(os.path.dirname(folderFile.local_path), exist_ok=True)
+        return gdown.download(id=folderFile.id, output=folderFile.local_path, quiet=True, use_cookies=False)
+
+    def _downloadWithGdown(self, url: str) -> list[str]:
+        if "folders" in url:
+            # List the folder without downloading it, then only download the CV files
+            folderFiles = gdown.download_folder(url, output=self.save_path, use_cookies=False, skip_download=True) or []
+            folderFiles = [folderFile for folderFile in folderFiles if isValidCVFileType(folderFile.local_path)]
+            return self._downloadConcurrently(self._downloadFolderFileWithGdown, folderFiles)
         else:
             # Single file Google Drive link
             # Using fuzzy=True to handle various formats of Google Drive links (for example, share links or download links)
@@ -51,4 +164,17 @@ class GDriveDownload:
             else:
                 print(f"Downloaded file is not a valid CV type: {self.save_path}")
                 return []
-        
\ No newline at end of file
+
+    def downloadPdfFileOrFolder(self, url: str) -> list[str]:
+        """
+        Downloads the CV files of a file or folder from Google Drive.
+
+        Args:
+            url (str): The URL of the Google Drive file or folder.
+
+        Returns:
+            list[str]: List of paths to downloaded CV files.
+        """
+        if self.apiKey:
+            return self._downloadWithApi(url)
+        return self._downloadWithGdown(url)
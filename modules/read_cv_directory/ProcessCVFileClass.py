@@ -2,37 +2,169 @@ from langchain_community.document_loaders import UnstructuredWordDocumentLoader
 from langchain_community.document_loaders import UnstructuredODTLoader
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_core.documents import Document
+from typing import Iterator
+import xml.etree.ElementTree as ET
+import zipfile
 
 class ICVFileProcessor:
     def process(self, file_path: str) -> list[Document]:
         raise NotImplementedError("Subclasses should implement this method.")
+
+    def lazyProcess(self, file_path: str) -> Iterator[Document]:
+        """
+        Yield the documents (pages) of the file one by one, so the extraction can stop after enough pages.
+        """
+        yield from self.process(file_path)
     
 class PDFProcessor(ICVFileProcessor):
     def process(self, file_path: str) -> list[Document]:
+        return list(self.lazyProcess(file_path))
+
+    def lazyProcess(self, file_path: str) -> Iterator[Document]:
         loader = PyMuPDFLoader(file_path)
-        documents = loader.load()
-        # Add file name metadata to each document
-        for doc in documents:
+        # Pages are parsed as they are requested
+        for doc in loader.lazy_load():
+            # Add file name metadata to each document
             doc.metadata['file_name'] = file_path.split('/')[-1]
-
-        return documents
+            yield doc
     
-class DOCXProcessor(ICVFileProcessor):
+class ZipXMLProcessor(ICVFileProcessor):
+    """
+    Read the text of a zipped XML document (DOCX, ODT) by streaming its main XML part,
+    keeping the paragraphs and table rows in document order.
+    Files that can't be read this way are read with the unstructured loader instead.
+    """
+    contentPath: str
+
+    def _extractText(self, xmlFile) -> str:
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def _fallbackLoader(self, file_path: str):
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def extractNatively(self, file_path: str) -> list[Document]:
+        with zipfile.ZipFile(file_path) as zipFile, zipFile.open(self.contentPath) as xmlFile:
+            text = self._extractText(xmlFile)
+        return [Document(page_content=text, metadata={ 'source': file_path })]
+
+    def extractWithUnstructured(self, file_path: str) -> list[Document]:
+        return self._fallbackLoader(file_path).load()
+
     def process(self, file_path: str) -> list[Document]:
-        loader = UnstructuredWordDocumentLoader(file_path)
-        documents = loader.load()
+        try:
+            documents = self.extractNatively(file_path)
+        except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+            print(f"Could not read {file_path} natively, falling back to unstructured: {e}")
+            documents = self.extractWithUnstructured(file_path)
         # Add file name metadata to each document
         for doc in documents:
             doc.metadata['file_name'] = file_path.split('/')[-1]
 
         return documents
-    
-class ODTProcessor(ICVFileProcessor):
-    def process(self, file_path: str) -> list[Document]:
-        loader = UnstructuredODTLoader(file_path)
-        documents = loader.load()
-        # Add file name metadata to each document
-        for doc in documents:
-            doc.metadata['file_name'] = file_path.split('/')[-1]
 
-        return documents
\ No newline at end of file
+def _joinTableRow(cells: list[str]) -> str:
+    return " | ".join(cell for cell in cells if cell)
+
+wordNamespace = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+class DOCXProcessor(ZipXMLProcessor):
+    contentPath = "word/document.xml"
+
+    def _paragraphText(self, paragraph: ET.Element) -> str:
+        parts = []
+        for element in paragraph.iter():
+            if element.tag == f"{wordNamespace}t":
+                parts.append(element.text or "")
+            elif element.tag == f"{wordNamespace}tab":
+                parts.append("\t")
+            elif element.tag in (f"{wordNamespace}br", f"{wordNamespace}cr"):
+                parts.append("\n")
+        return "".join(parts).strip()
+
+    def _extractText(self, xmlFile) -> str:
+        lines = []
+        # One list of cells (each a list of paragraphs) per open table row, for nested tables
+        rows: list[list[str]] = []
+        cellParagraphs: list[list[str]] = []
+        for event, element in ET.iterparse(xmlFile, events=("start", "end")):
+            if event == "start":
+                if element.tag == f"{wordNamespace}tr":
+                    rows.append([])
+                elif element.tag == f"{wordNamespace}tc":
+                    cellParagraphs.append([])
+                continue
+
+            if element.tag == f"{wordNamespace}p":
+                text = self._paragraphText(element)
+                if cellParagraphs:
+                    cellParagraphs[-1].append(text)
+                else:
+                    lines.append(text)
+                # Cleared elements keep the memory bounded, and the text boxes nested in a paragraph from being read twice
+                element.clear()
+            elif element.tag == f"{wordNamespace}tc":
+                rows[-1].append(" ".join(text for text in cellParagraphs.pop() if text))
+            elif element.tag == f"{wordNamespace}tr":
+                row = _joinTableRow(rows.pop())
+                if cellParagraphs:
+                    cellParagraphs[-1].append(row)
+                else:
+                    lines.append(row)
+                element.clear()
+        return "\n".join(lines).strip()
+
+    def _fallbackLoader(self, file_path: str):
+        return UnstructuredWordDocumentLoader(file_path)
+
+odtTextNamespace = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+odtTableNamespace = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+
+class ODTProcessor(ZipXMLProcessor):
+    contentPath = "content.xml"
+
+    def _elementText(self, element: ET.Element) -> str:
+        parts = [element.text or ""]
+        for child in element:
+            if child.tag == f"{odtTextNamespace}s":
+                parts.append(" " * int(child.get(f"{odtTextNamespace}c", "1")))
+            elif child.tag == f"{odtTextNamespace}tab":
+                parts.append("\t")
+            elif child.tag == f"{odtTextNamespace}line-break":
+                parts.append("\n")
+            else:
+                parts.append(self._elementText(child))
+            parts.append(child.tail or "")
+        return "".join(parts)
+
+    def _extractText(self, xmlFile) -> str:
+        lines = []
+        rows: list[list[str]] = []
+        cellParagraphs: list[list[str]] = []
+        for event, element in ET.iterparse(xmlFile, events=("start", "end")):
+            if event == "start":
+                if element.tag == f"{odtTableNamespace}table-row":
+                    rows.append([])
+                elif element.tag == f"{odtTableNamespace}table-cell":
+                    cellParagraphs.append([])
+                continue
+
+            if element.tag in (f"{odtTextNamespace}p", f"{odtTextNamespace}h"):
+                text = self._elementText(element).strip()
+                if cellParagraphs:
+                    cellParagraphs[-1].append(text)
+                else:
+                    lines.append(text)
+                element.clear()
+            elif element.tag == f"{odtTableNamespace}table-cell":
+                rows[-1].append(" ".join(text for text in cellParagraphs.pop() if text))
+            elif element.tag == f"{odtTableNamespace}table-row":
+                row = _joinTableRow(rows.pop())
+                if cellParagraphs:
+                    cellParagraphs[-1].append(row)
+                else:
+                    lines.append(row)
+                element.clear()
+        return "\n".join(lines).strip()
+
+    def _fallbackLoader(self, file_path: str):
+        return UnstructuredODTLoader(file_path)
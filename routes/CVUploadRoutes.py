@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form
+from fastapi.concurrency import run_in_threadpool
 
 from shared.Dependencies import getProcessCVController
 from shared.QueryObject import SearchCVQuery
@@ -14,7 +15,8 @@ async def uploadCVFiles(googleDriveUrl: Annotated[Optional[str], Form()] = None,
     """
     Upload CV files or a Google Drive link for processing.
     """
-    return processCVController.addCVFiles(googleDriveUrl=googleDriveUrl, files=files)
+    # The ingestion pipeline is blocking (file extraction, LLM parsing), it runs in a worker thread
+    return await run_in_threadpool(processCVController.addCVFiles, googleDriveUrl=googleDriveUrl, files=files)
     '''try:
         return processCVController.addCVFiles(googleDriveUrl=googleDriveUrl, files=files)
     except HTTPException as e:
@@ -31,7 +33,7 @@ async def updateCVFiles(id: int,
     Update CV files or a Google Drive link for an existing application.
     """
     try:
-        return processCVController.updateCVFile(id, googleDriveUrl=googleDriveUrl, file=file)
+        return await run_in_threadpool(processCVController.updateCVFile, id, googleDriveUrl=googleDriveUrl, file=file)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -39,12 +41,13 @@ async def updateCVFiles(id: int,
     
 @router.post("/search")
 async def searchCVs(query: SearchCVQuery,
+                    include: Optional[str] = None,
                     processCVController: ProcessCVController = Depends(getProcessCVController)):
     """
     Search for CVs based on various criteria.
     """
     try:
-        return processCVController.searchApplications(query)
+        return await processCVController.searchApplications(query, include=include)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -52,12 +55,13 @@ async def searchCVs(query: SearchCVQuery,
     
 @router.get("/{id}")
 async def getCV(id: str, 
+                include: Optional[str] = None,
                 processCVController: ProcessCVController = Depends(getProcessCVController)):
     """
     Get details of a specific CV by ID.
     """
     try:
-        application = processCVController.getApplication(id)
+        application = await processCVController.getApplication(id, include)
         if not application:
             raise HTTPException(status_code=404, detail="Application not found")
         return application
@@ -73,7 +77,7 @@ async def deleteCV(id: str,
     Delete a specific CV by ID.
     """
     try:
-        return processCVController.deleteApplication(id)
+        return await processCVController.deleteApplication(id)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -83,12 +87,14 @@ async def deleteCV(id: str,
 async def listCVsByPage(page: int = 1, 
                         size: int = 10,
                         orderBy: Optional[str] = None,
+                        include: Optional[str] = None,
+                        cursor: Optional[str] = None,
                         processCVController: ProcessCVController = Depends(getProcessCVController)):
     """
     List CVs with pagination.
     """
     try:
-        return processCVController.getApplications(page, size, orderBy)
+        return await processCVController.getApplications(page, size, orderBy, include, cursor)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -1,11 +1,19 @@
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 from sqlalchemy.dialects.mysql import TEXT
 from sqlalchemy.dialects.postgresql import TEXT as PG_TEXT
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 class Application(SQLModel, table=True):
+    __table_args__ = (
+        # Indexes of the sort keys of the application list, for keyset pagination
+        Index("ix_application_lastUpdated_id", "lastUpdated", "id"),
+        Index("ix_application_name_id", "name", "id"),
+        # Full-text indexes of the name and address searches (MariaDB)
+        Index("ix_application_name_fulltext", "name", mysql_prefix="FULLTEXT"),
+        Index("ix_application_address_fulltext", "address", mysql_prefix="FULLTEXT"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     vectorDbUuid: str = Field(index=True, description="UUID referencing the vector database document")
     name: str = Field(index=True, description="Name of the applicant")
@@ -18,8 +26,18 @@ class Application(SQLModel, table=True):
     projects: List['Project'] = Relationship(back_populates="application", cascade_delete=True)
     linkedIn: Optional[str] = Field(default=None, index=True, description="LinkedIn profile URL of the applicant")
     gitRepo: Optional[str] = Field(default=None, index=True, description="Git repository URL (GitHub, GitLab, etc.) of the applicant")
+    # Canonical forms of the contact fields (shared.LookupNormalization) for indexed exact, prefix and suffix (reversed) lookups, not returned
+    emailNormalized: Optional[str] = Field(default=None, index=True, exclude=True, description="Lowercase email")
+    emailReversed: Optional[str] = Field(default=None, index=True, exclude=True, description="Reversed lowercase email, for domain lookups")
+    phoneNormalized: Optional[str] = Field(default=None, index=True, exclude=True, description="Digits of the phone number")
+    phoneReversed: Optional[str] = Field(default=None, index=True, exclude=True, description="Reversed digits of the phone number without its international or trunk prefix, for suffix lookups")
+    linkedInNormalized: Optional[str] = Field(default=None, index=True, exclude=True, description="Canonical LinkedIn profile URL")
+    gitRepoNormalized: Optional[str] = Field(default=None, index=True, exclude=True, description="Canonical Git repository URL")
     yearsOfExperience: Optional[float] = Field(default=None, description="Total years of experience of the applicant")
     lastUpdated: datetime = Field(default_factory=datetime.now, description="Last updated timestamp of the application")
+    # Copy of the vector database document text, stored with application_summary_in_sql. Not returned with the application,
+    # it is returned as its skillsAndExperience.
+    skillsAndExperience: Optional[str] = Field(default=None, sa_column=Column(TEXT), exclude=True, description="Skills and experience summary of the applicant")
 
 class Education(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -30,11 +48,21 @@ class Education(SQLModel, table=True):
     year: Optional[str] = Field(default=None, index=True, description="Year of graduation of period of education")
     gpa: Optional[str] = Field(default=None, description="GPA obtained by the applicant")
 
+class Skill(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    key: str = Field(unique=True, description="Case folded name of the canonical skill, shared by its synonyms (shared.SkillNormalization)")
+    name: str = Field(description="Display name of the canonical skill")
+
 class ExperiencedSkill(SQLModel, table=True):
+    # Index of the experienced skill filters of the search: the applications with a skill and at least some years of experience
+    __table_args__ = (
+        Index("ix_experiencedskill_skill_id_years_application", "skill_id", "yearsOfExperience", "application_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     application_id: int = Field(foreign_key="application.id", index=True, description="ID of the application this skill belongs to")
     application: Optional[Application] = Relationship(back_populates="skills")
     skill: str = Field(index=True, description="Name of the skill")
+    skill_id: Optional[int] = Field(default=None, foreign_key="skill.id", description="ID of the canonical skill")
     yearsOfExperience: Optional[float] = Field(default=None, description="Years of experience in the skill")
 
 class WorkExperience(SQLModel, table=True):
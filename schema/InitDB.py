@@ -1,8 +1,17 @@
 from sqlmodel import Field, Session, SQLModel, create_engine, select
 from fastapi import Depends
-from typing import Annotated
+from typing import Annotated, Optional
 from settings import get_settings
 from sqlalchemy_utils import database_exists, create_database
+from sqlalchemy import inspect, text, or_
+from schema.Application import Application, ExperiencedSkill
+from shared.LookupNormalization import setLookupColumns
+from shared.SkillNormalization import skillKey
+from database.SkillDictionary import SkillDictionary
+from database.VectorQuery import VectorQueryObject
+from langchain.vectorstores import VectorStore
+from langchain_core.documents import Document
+from sqlalchemy.ext.asyncio import create_async_engine
 
 settings = get_settings()
 # Create the database engine
@@ -11,21 +20,130 @@ engine = create_engine(
     echo=True
 )
 
-def createDBAndTables():
+# Async engine (aiomysql driver) used by the API routes, so database round trips don't block the event loop
+asyncEngine = create_async_engine(
+    f"mysql+aiomysql://{settings.mariadb_username}:{settings.mariadb_password}@{settings.mariadb_host}:{settings.mariadb_port}/{settings.mariadb_database}",
+    echo=True
+)
+
+def createDBAndTables(vectorStore: Optional[VectorStore] = None):
     """
-    Create the database and tables if they do not exist.
+    Create the database and tables if they do not exist, and migrate the rows (and the vector documents if the vector
+    store is given) saved by previous versions.
     """
     #Create the database if it does not exist
     if not database_exists(engine.url):
         create_database(engine.url)
         print(f"Database {settings.mariadb_database} created.")
     SQLModel.metadata.create_all(engine)
+    addMissingColumns()
+    addMissingIndexes()
+    backfillLookupColumns()
+    backfillSkillIds()
+    if vectorStore is not None:
+        backfillVectorApplicationIds(vectorStore)
 
-def getSession():
+def addMissingColumns():
+    """
+    Add the nullable columns added to the models since their tables were created (create_all doesn't alter existing tables).
+    """
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            existingColumns = { column["name"] for column in inspector.get_columns(table.name) }
+            for column in table.columns:
+                if column.name not in existingColumns and column.nullable:
+                    columnType = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {columnType}"))
+                    print(f"Column {table.name}.{column.name} added.")
+
+def addMissingIndexes():
+    """
+    Create the indexes added to the models since their tables were created.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            existingIndexes = { index["name"] for index in inspector.get_indexes(table.name) }
+            for index in table.indexes:
+                if index.name not in existingIndexes:
+                    index.create(connection)
+                    print(f"Index {index.name} created.")
+
+def backfillLookupColumns(batchSize: int = 1000):
+    """
+    Fill the lookup columns of the applications saved before these columns were added.
+    """
+    missingLookup = or_(
+        (Application.email != None) & ((Application.emailNormalized == None) | (Application.emailReversed == None)),
+        (Application.phone != None) & ((Application.phoneNormalized == None) | (Application.phoneReversed == None)),
+        (Application.linkedIn != None) & (Application.linkedInNormalized == None),
+        (Application.gitRepo != None) & (Application.gitRepoNormalized == None),
+    )
+    lastId = 0
     with Session(engine) as session:
-        yield session
+        while True:
+            applications = session.exec(
+                select(Application).where(Application.id > lastId, missingLookup).order_by(Application.id).limit(batchSize)
+            ).all()
+            if not applications:
+                break
+            for application in applications:
+                setLookupColumns(application)
+            lastId = applications[-1].id
+            session.commit()
+            print(f"Lookup columns of {len(applications)} applications filled.")
 
-SessionDep = Annotated[Session, Depends(getSession)]
+def backfillSkillIds(batchSize: int = 5000):
+    """
+    Link the experienced skills saved before the canonical skills table was added to their canonical skill.
+    """
+    skillDictionary = SkillDictionary(engine)
+    lastId = 0
+    with Session(engine) as session:
+        while True:
+            experiencedSkills = session.exec(
+                select(ExperiencedSkill).where(ExperiencedSkill.id > lastId, ExperiencedSkill.skill_id == None)
+                .order_by(ExperiencedSkill.id).limit(batchSize)
+            ).all()
+            if not experiencedSkills:
+                break
+            skillIds = skillDictionary.getSkillIds(experiencedSkill.skill for experiencedSkill in experiencedSkills)
+            for experiencedSkill in experiencedSkills:
+                experiencedSkill.skill_id = skillIds.get(skillKey(experiencedSkill.skill))
+            lastId = experiencedSkills[-1].id
+            session.commit()
+            print(f"Canonical skills of {len(experiencedSkills)} experienced skills linked.")
 
+def backfillVectorApplicationIds(vectorStore: VectorStore, batchSize: int = 1000):
+    """
+    Add the application id metadata to the vector documents saved before it was added, the SQL first search filters
+    the vector search on it.
+    """
+    vectorQuery = VectorQueryObject(Document, vectorStore)
+    offset = 0
+    with Session(engine) as session:
+        while True:
+            documentIds, metadatas = vectorQuery.selectMetadata(offset, batchSize)
+            if not documentIds:
+                break
+            offset += len(documentIds)
+            missingMetadata = { documentId: metadata for documentId, metadata in zip(documentIds, metadatas)
+                                if "application_id" not in metadata }
+            if not missingMetadata:
+                continue
+            applicationIds = dict(session.exec(
+                select(Application.vectorDbUuid, Application.id).where(Application.vectorDbUuid.in_(list(missingMetadata)))
+            ).all())
+            updatedIds = [documentId for documentId in missingMetadata if documentId in applicationIds]
+            if updatedIds:
+                vectorQuery.updateMetadata(updatedIds, [{ **missingMetadata[documentId], "application_id": applicationIds[documentId] }
+                                                        for documentId in updatedIds])
+                print(f"Application id of {len(updatedIds)} vector documents added.")
 
+def getSession():
+    with Session(engine) as session:
+        yield session
 
+SessionDep = Annotated[Session, Depends(getSession)]
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 
 class Settings(BaseSettings):
     openai_api_key: str
@@ -17,6 +18,82 @@ class Settings(BaseSettings):
     mariadb_host: str
     mariadb_port: int
     mariadb_database: str
+    # Also store the skills and experience summary of the applications in SQL, so reading them doesn't query the vector database
+    application_summary_in_sql: bool = False
+    # Seconds the number of applications (page count of the list) is cached, it is refreshed in the background once stale (0 = count on each request)
+    application_count_cache_seconds: float = 30.0
+    # Use the row count estimate of the table statistics (MariaDB) instead of counting the applications
+    application_count_approximate: bool = False
+    # Searches whose SQL filters match at most this many applications filter the vector search on their ids (SQL first),
+    # the others search the vectors first and keep the applications passing the filters
+    search_sql_first_max_candidates: int = 2000
+    # Maximum number of nearest vector documents fetched by a vector first search while too few pass the SQL filters
+    search_vector_max_k: int = 500
+
+    # Number of worker processes used to extract text from CV files (1 = extract serially in the API worker)
+    cv_extraction_max_workers: int = 4
+    # Maximum time in seconds to wait for a single CV file to be extracted
+    cv_extraction_file_timeout: float = 60.0
+    # Extract the CV files in worker processes even with a single worker, so a bad file can't block or crash the API
+    cv_extraction_sandboxed: bool = True
+    # Files larger than this fail without being read (0 = no limit)
+    cv_extraction_max_file_bytes: int = 20 * 1024 * 1024
+    # Pages of a CV file after this are not read (0 = no limit)
+    cv_extraction_max_pages: int = 30
+    # Extracted characters of a CV file after this are dropped (0 = no limit)
+    cv_extraction_max_characters: int = 200000
+    # Keep the uploaded CV files once, in a store addressed by their SHA-256, and don't extract known files again
+    cv_file_store_enabled: bool = True
+    # Google Drive API key, used to list Drive folders before downloading them and to cache the downloaded files (gdown is used without it)
+    google_drive_api_key: str | None = None
+    # Maximum number of files downloaded from Google Drive at the same time
+    gdrive_download_max_concurrency: int = 4
+    # Directory of the downloaded Google Drive files cache (defaults to gdrive_cache in the CV storage path)
+    gdrive_cache_path: str | None = None
+    # Base URL of the Google Drive API, can point to a local server standing in for Google Drive
+    gdrive_api_base_url: str = "https://www.googleapis.com/drive/v3"
+    # Directory polled for new, changed and deleted CV files (disabled if not set)
+    cv_watch_directory: str | None = None
+    # Seconds between two polls of the watched directory
+    cv_watch_interval_seconds: float = 60.0
+    # Delete the applications of the files deleted from the watched directory
+    cv_watch_remove_deleted: bool = False
+    # Maximum number of extracted CV documents waiting to be parsed during an upload
+    cv_ingestion_buffer_size: int = 100
+    # Number of CVs parsed and saved together during an upload, new CVs are extracted in the meantime
+    cv_ingestion_chunk_size: int = 80
+    # Number of parsed CVs saved together, in one database transaction and one embedding batch
+    cv_db_insert_batch_size: int = 20
+    # Trim the extracted CV texts (whitespace, page numbers, repeated headers and footers, duplicated lines) before parsing
+    cv_normalization_enabled: bool = True
+    # Maximum number of characters of a CV text sent to the model (0 = no limit)
+    cv_normalization_max_characters: int = 40000
+
+    # Maximum number of CV parsing requests sent to the model at the same time
+    cv_parsing_max_concurrency: int = 4
+    # Maximum number of CVs per parsing request, requests are also limited by the token budget of the model
+    cv_parsing_max_batch_size: int = 20
+    # Overrides of the (estimated) input and output token budget per parsing request of the model (0 = use the model's default)
+    cv_parsing_max_input_tokens: int = 0
+    cv_parsing_max_output_tokens: int = 0
+    # Output format of the parsing prompt: "xml" (tags for each field) or "compact" (one JSON object with short keys per CV)
+    cv_parsing_output_format: Literal["xml", "compact"] = "xml"
+    # Extract the contact fields (email, phone, LinkedIn, Git repository, labelled address) locally instead of asking the model
+    cv_pre_extraction_enabled: bool = True
+    # spaCy model used to also pre-extract the applicant name (e.g. "en_core_web_sm", empty = don't use spaCy)
+    cv_pre_extraction_spacy_model: str = ""
+    # Stream the parsing responses and save each applicant as soon as its CV is parsed
+    cv_parsing_streaming: bool = True
+    # Rate limits of the CV parsing requests (0 = no limit)
+    cv_parsing_requests_per_minute: int = 0
+    cv_parsing_tokens_per_minute: int = 0
+
+    # Persistent cache of parsed CVs, keyed by the CV text, model and prompt version
+    cv_parse_cache_enabled: bool = True
+    # Path of the SQLite cache file (defaults to parsed_cv_cache.sqlite3 in the CV storage path)
+    cv_parse_cache_path: str | None = None
+    cv_parse_cache_max_entries: int = 10000
+    cv_parse_cache_max_age_days: float = 30
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,6 +1,6 @@
 from fastapi import Depends
 from controller.ProcessCVController import ProcessCVController
-from schema.InitDB import engine
+from schema.InitDB import engine, asyncEngine
 from database.VectorDB import vector_store
 from settings import get_settings
 
@@ -10,7 +10,8 @@ async def getProcessCVController() -> ProcessCVController:
     """
     Dependency to get an instance of ProcessCVController.
     """
-    return ProcessCVController(sqlEngine=engine, vectorStore=vector_store, baseCVStoragePath=settings.default_cv_storage_path)
+    return ProcessCVController(sqlEngine=engine, vectorStore=vector_store, baseCVStoragePath=settings.default_cv_storage_path,
+                               asyncSqlEngine=asyncEngine)
 
 async def getDatabaseEngine():
     return engine
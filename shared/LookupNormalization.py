@@ -0,0 +1,88 @@
+import re
+
+# Canonical forms of the contact fields of the applications, stored in indexed lookup columns so they can be searched
+# with exact and prefix matches instead of substring scans.
+
+def normalizeEmail(email: str | None) -> str | None:
+    email = email.strip().lower() if email else ""
+    return email or None
+
+def normalizePhone(phone: str | None) -> str | None:
+    """
+    Digits of a phone number, e.g. "+1 (860) 716-5996" -> "18607165996" (E.164 without the +).
+    """
+    digits = re.sub(r"\D", "", phone) if phone else ""
+    return digits or None
+
+def nationalPhoneDigits(phone: str | None) -> str | None:
+    """
+    Digits of a phone number without its international (00) or trunk (0) prefix, e.g. "0901 234 567" -> "901234567",
+    "0084 901 234 567" and "+84 901 234 567" -> "84901234567". Without a numbering plan the country code can't be told
+    apart from the number, so the national number is matched as a suffix of the international one.
+    """
+    digits = normalizePhone(phone)
+    if not digits or phone.strip().startswith("+"):
+        return digits
+    if digits.startswith("00"):
+        return digits[2:] or None
+    return digits[1:] if digits.startswith("0") and len(digits) > 1 else digits
+
+def reversedPhone(phone: str | None) -> str | None:
+    """
+    Reversed national digits of a phone number, so numbers ending with some digits are found with an indexed prefix match.
+    """
+    digits = nationalPhoneDigits(phone)
+    return digits[::-1] if digits else None
+
+def reversedEmail(email: str | None) -> str | None:
+    """
+    Reversed lowercase email, so emails of a domain are found with an indexed prefix match.
+    """
+    email = normalizeEmail(email)
+    return email[::-1] if email else None
+
+def normalizeProfileUrl(url: str | None) -> str | None:
+    """
+    Canonical profile URL: lowercase, without scheme, www., query, fragment and trailing slash,
+    e.g. "https://www.LinkedIn.com/in/Josh/?trk=1" -> "linkedin.com/in/josh".
+    """
+    url = url.strip().lower() if url else ""
+    url = re.sub(r"^[a-z][a-z0-9+.-]*://", "", url)
+    url = re.sub(r"^www\.", "", url)
+    url = re.split(r"[?#]", url, maxsplit=1)[0].rstrip("/")
+    return url or None
+
+def isFullEmail(email: str) -> bool:
+    return re.fullmatch(r"[^@\s]+@[^@\s]+\.[^@\s]+", email) is not None
+
+def isEmailDomain(email: str) -> bool:
+    """
+    Whether a lowercase email keyword is a domain, with or without the @ (e.g. "@company.com" or "company.com").
+    """
+    return re.fullmatch(r"@?[a-z0-9-]+(\.[a-z0-9-]+)+", email) is not None
+
+def hasUrlHost(url: str) -> bool:
+    """
+    Whether a canonical URL starts with a host (e.g. "github.com/josh"), rather than being a fragment of a path (e.g. "/josh").
+    """
+    return re.match(r"[a-z0-9-]+(\.[a-z0-9-]+)+(/|$)", url) is not None
+
+def fullTextWords(text: str, minLength: int = 3) -> list[str] | None:
+    """
+    Words of a full-text query, or None if one is shorter than the minimum indexed word length (they aren't indexed).
+    """
+    words = re.findall(r"\w+", text)
+    if not words or any(len(word) < minLength for word in words):
+        return None
+    return words
+
+def setLookupColumns(application):
+    """
+    Set the lookup columns of an application from its contact fields.
+    """
+    application.emailNormalized = normalizeEmail(application.email)
+    application.emailReversed = reversedEmail(application.email)
+    application.phoneNormalized = normalizePhone(application.phone)
+    application.phoneReversed = reversedPhone(application.phone)
+    application.linkedInNormalized = normalizeProfileUrl(application.linkedIn)
+    application.gitRepoNormalized = normalizeProfileUrl(application.gitRepo)
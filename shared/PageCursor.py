@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Any, List, Tuple
+import base64, binascii, json
+
+# Opaque cursors of keyset pagination: the order of the pages, the sort key values of the row the page starts after
+# (or before) and the direction of the page from that row ("next" or "prev"), as URL safe base64 JSON.
+
+def encodeCursor(orderBy: str, values: List[Any], direction: str) -> str:
+    payload = {
+        "o": orderBy,
+        "v": [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        "d": direction
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+
+def decodeCursor(cursor: str) -> Tuple[str, List[Any], str]:
+    """
+    Return the order, sort key values (datetimes are left as ISO strings) and direction of a cursor.
+    Raise a ValueError if the cursor is invalid.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        orderBy, values, direction = payload["o"], payload["v"], payload["d"]
+    except (ValueError, binascii.Error, KeyError, TypeError):
+        raise ValueError("Invalid cursor.")
+    if not isinstance(orderBy, str) or not isinstance(values, list) or direction not in ("next", "prev"):
+        raise ValueError("Invalid cursor.")
+    return orderBy, values, direction
@@ -23,6 +23,10 @@ class SearchCVQuery(BaseModel):
         default=None,
         description="Git repository URL (GitHub, GitLab, etc.) of the applicant to search in the CVs.",
     )
+    address: Optional[str] = Field(
+        default=None,
+        description="Words of the address of the applicant to search in the CVs.",
+    )
     experiencedSkills: Optional[Dict[str, float]] = Field(
         default=None,
         description="Dictionary of skills and their years of experience to search in the CVs."
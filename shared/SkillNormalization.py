@@ -0,0 +1,56 @@
+import re
+
+# Canonical names of common skills and their synonyms. The other skills are only case folded.
+CANONICAL_SKILLS = {
+    "JavaScript": ["JS", "ECMAScript", "ES6", "Vanilla JS"],
+    "TypeScript": ["TS"],
+    "Python": ["Python3", "Python 3"],
+    "Go": ["Golang"],
+    "C#": ["CSharp", "C Sharp"],
+    "C++": ["CPP"],
+    "React": ["ReactJS", "React.js"],
+    "Node.js": ["Node", "NodeJS"],
+    "Vue.js": ["Vue", "VueJS"],
+    "Angular": ["AngularJS", "Angular.js"],
+    "Next.js": ["NextJS"],
+    ".NET": ["DotNet", ".NET Core", "ASP.NET", "ASP.NET Core"],
+    "PostgreSQL": ["Postgres", "PSQL"],
+    "MongoDB": ["Mongo"],
+    "Kubernetes": ["K8s"],
+    "AWS": ["Amazon Web Services"],
+    "GCP": ["Google Cloud", "Google Cloud Platform"],
+    "Azure": ["Microsoft Azure"],
+    "Machine Learning": ["ML"],
+    "Artificial Intelligence": ["AI"],
+    "Natural Language Processing": ["NLP"],
+    "CI/CD": ["CICD", "Continuous Integration"],
+    "HTML": ["HTML5"],
+    "CSS": ["CSS3"],
+}
+
+def _foldSkillName(name: str) -> str:
+    # Case folded, without spaces, dots, hyphens and underscores: "React.js", "react js" and "REACTJS" fold the same
+    return re.sub(r"[\s.\-_]+", "", name.casefold())
+
+# Folded name -> (folded canonical name, canonical name)
+_synonyms = {
+    _foldSkillName(synonym): (_foldSkillName(canonicalName), canonicalName)
+    for canonicalName, synonyms in CANONICAL_SKILLS.items()
+    for synonym in [canonicalName] + synonyms
+}
+
+def skillKey(name: str | None) -> str | None:
+    """
+    Key of the canonical skill of a skill name, e.g. "JS", "Javascript" and "javascript" -> "javascript".
+    """
+    foldedName = _foldSkillName(name) if name else ""
+    if not foldedName:
+        return None
+    return _synonyms[foldedName][0] if foldedName in _synonyms else foldedName
+
+def canonicalSkillName(name: str) -> str:
+    """
+    Display name of the canonical skill of a skill name: the canonical name of known skills, the name itself otherwise.
+    """
+    foldedName = _foldSkillName(name)
+    return _synonyms[foldedName][1] if foldedName in _synonyms else name.strip()
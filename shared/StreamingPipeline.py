@@ -0,0 +1,60 @@
+from typing import Iterable, Iterator, TypeVar
+from itertools import islice
+import contextvars, queue, threading
+
+T = TypeVar("T")
+
+def chunked(items: Iterable[T], chunkSize: int) -> Iterator[list[T]]:
+    """
+    Yield lists of up to chunkSize consecutive items, consuming the items lazily.
+    """
+    items = iter(items)
+    while chunk := list(islice(items, chunkSize)):
+        yield chunk
+
+def bufferedStage(items: Iterable[T], maxBufferSize: int) -> Iterator[T]:
+    """
+    Run a stage of a pipeline (iterating items) in a background thread, so it keeps producing while the next stages
+    consume its items. At most maxBufferSize produced items wait to be consumed, which keeps the memory bounded.
+    The errors of the stage are raised to the consumer. If the consumer stops early, the stage is stopped and closed.
+    """
+    buffer = queue.Queue(maxsize=maxBufferSize)
+    stopped = threading.Event()
+    # Marks the end of the items in the buffer, followed by the error of the stage if it failed
+    endOfItems = object()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        error = None
+        try:
+            for item in items:
+                if not put(item):
+                    break
+        except BaseException as e:
+            error = e
+        finally:
+            if hasattr(items, "close"):
+                items.close()
+        put((endOfItems, error))
+
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(produce,), daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if isinstance(item, tuple) and len(item) == 2 and item[0] is endOfItems:
+                if item[1] is not None:
+                    raise item[1]
+                return
+            yield item
+    finally:
+        # Not joined, the stage may be busy producing its next item, it stops before putting it in the buffer
+        stopped.set()